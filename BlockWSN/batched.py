@@ -0,0 +1,216 @@
+# BlockWSN/batched.py
+"""
+Batched multi-run simulation.
+
+All independent runs are advanced together: node state is held in
+(num_runs, num_nodes) arrays and every round applies the same vectorized
+operations to all runs at once, amortizing NumPy's per-call overhead across the
+batch. Each run keeps its own topology and its own random streams, so a run
+produces the same trust and detection series as it would on the array engine.
+"""
+
+import numpy as np
+from . import config
+import networkx as nx
+from .csr_graph import CSRGraph, initialize_csr_graph
+from .events import round_latency_batched, pow_latency
+from .rng import protocol_rng, draw_behaviour_rounds, draw_miners
+from .routing import RoutingForest
+from .energy_trust import compute_energy_tx, TrustModel, DynamicTrustModel, FixedTrustModel
+from .graph_utils import initialize_graph
+from .vectorized import NodeArrays, graph_to_arrays
+
+def stack_topologies(graphs: list[nx.Graph | CSRGraph]) -> NodeArrays:
+    """
+    Stacks the node state of every run's topology along a run axis.
+
+    All topologies have NUM_SENSORS + NUM_GATEWAYS nodes laid out in the same
+    id order, so they stack without padding.
+
+    Args:
+        graphs (list[nx.Graph | CSRGraph]): One topology per run, in run order.
+
+    Returns:
+        NodeArrays: State with a leading run axis, e.g. energy of shape (num_runs, num_nodes).
+    """
+    states = [graph_to_arrays(G) for G in graphs]
+    return NodeArrays(
+        pos=np.stack([s.pos for s in states]),
+        energy=np.stack([s.energy for s in states]),
+        trust=np.stack([s.trust for s in states]),
+        malicious=np.stack([s.malicious for s in states]),
+        num_sensors=config.NUM_SENSORS,
+    )
+
+def _copy_state(state: NodeArrays) -> NodeArrays:
+    return NodeArrays(state.pos, state.energy.copy(), state.trust.copy(), state.malicious, state.num_sensors)
+
+def _nearest_gateways(d2: np.ndarray, sensor_alive: np.ndarray, gateway_alive: np.ndarray) -> np.ndarray:
+    """Nearest active gateway per (run, sensor), or -1 if inactive or unreachable."""
+    masked = np.where(gateway_alive[:, None, :], d2, np.inf)
+    labels = np.argmin(masked, axis=2)
+    return np.where(sensor_alive & gateway_alive.any(axis=1)[:, None], labels, -1)
+
+def _benign_trust_mean(sensor_trust: np.ndarray, benign: np.ndarray, num_benign: np.ndarray) -> np.ndarray:
+    """Mean trust of the non-malicious sensors of each run, or 0 if there are none."""
+    return np.where(num_benign > 0, np.where(benign, sensor_trust, 0.0).sum(axis=1) / np.maximum(num_benign, 1), 0)
+
+# Rounds of behaviour drawn per Generator call; bounds the (run, round, sensor) block.
+BEHAVIOUR_BLOCK = 32
+
+def _run_batched_rounds(state: NodeArrays, rngs: list[np.random.Generator], trust_model: TrustModel,
+                        with_consensus: bool, processing_delay: float,
+                        forests: list[RoutingForest] | None = None) -> dict:
+    """Runs MAX_ROUNDS of a cluster-based protocol over a batch of runs, routing multi-hop if forests are given."""
+    R = state.energy.shape[0]
+    S = state.num_sensors
+    num_gw = state.num_gateways
+    energy, trust = state.energy, state.trust
+    sensor_energy, gw_energy = energy[:, :S], energy[:, S:]
+    sensor_trust, gw_trust = trust[:, :S], trust[:, S:]
+    sensor_malicious = state.malicious[:, :S]
+    benign = ~sensor_malicious
+    num_benign = benign.sum(axis=1)
+    total_malicious = np.maximum(state.malicious.sum(axis=1), 1)
+    tx_fixed = config.E_ELEC * config.PACKET_SIZE
+    tx_amp = config.E_AMP * config.PACKET_SIZE
+
+    diff = state.pos[:, :S, None, :] - state.pos[:, None, S:, :]
+    d2 = np.einsum("rsgk,rsgk->rsg", diff, diff)
+    run_offsets = (np.arange(R) * num_gw)[:, None]
+    gateway_reserve = config.ENERGY_CONSENSUS_VALIDATOR if with_consensus else np.inf
+
+    energy_consumed = np.zeros((R, config.MAX_ROUNDS))
+    latencies = np.zeros((R, config.MAX_ROUNDS))
+    trust_accuracies = np.zeros((R, config.MAX_ROUNDS))
+    detection_rates = np.zeros((R, config.MAX_ROUNDS))
+    alive = None
+
+    for r in range(config.MAX_ROUNDS):
+        round_energy = np.zeros(R)
+        num_validators = np.zeros(R, dtype=int)
+        sensor_alive, gateway_alive = sensor_energy > 0, gw_energy > 0
+        if not (sensor_alive.any() or (gw_energy > gateway_reserve).any()):
+            # Every run is depleted, so every remaining round is empty.
+            latencies[:, r:] = processing_delay
+            trust_accuracies[:, r:] = _benign_trust_mean(sensor_trust, benign, num_benign)[:, None]
+            break
+        # Positions are fixed, so assignments only change when a node runs out of energy.
+        if alive is None or not (np.array_equal(sensor_alive, alive[0]) and np.array_equal(gateway_alive, alive[1])):
+            if forests is None:
+                labels = _nearest_gateways(d2, sensor_alive, gateway_alive)
+                member = labels >= 0
+                gw_idx = np.where(member, labels, 0)
+                dist = np.sqrt(np.take_along_axis(d2, gw_idx[:, :, None], axis=2)[:, :, 0])
+                tx_energy = tx_fixed + tx_amp * (dist**2)
+            else:
+                if alive is None:
+                    changed = range(R)
+                    labels, dist, tx_energy = np.empty((R, S), dtype=np.intp), np.empty((R, S)), np.empty((R, S))
+                else:
+                    changed = np.flatnonzero((sensor_alive != alive[0]).any(axis=1) | (gateway_alive != alive[1]).any(axis=1))
+                # Only the forests of runs that lost a node need rebuilding.
+                for k in changed:
+                    forests[k].update(energy[k] > 0)
+                    labels[k], dist[k], tx_energy[k] = forests[k].labels(), forests[k].path_lengths(), forests[k].costs()
+                member = labels >= 0
+                gw_idx = np.where(member, labels, 0)
+            alive = (sensor_alive, gateway_alive)
+        if r % BEHAVIOUR_BLOCK == 0:
+            block = min(BEHAVIOUR_BLOCK, config.MAX_ROUNDS - r)
+            behaviour = np.stack([draw_behaviour_rounds(rng, m, block) for rng, m in zip(rngs, sensor_malicious)])
+        behaves = behaviour[:, r % BEHAVIOUR_BLOCK]
+
+        counts = np.bincount((run_offsets + gw_idx)[member], minlength=R * num_gw).reshape(R, num_gw)
+        agg_energy = counts * config.E_DA * config.PACKET_SIZE
+        pays_agg = (counts > 0) & (gw_energy > agg_energy)
+        gw_energy -= np.where(pays_agg, agg_energy, 0.0)
+        round_energy += np.where(pays_agg, agg_energy, 0.0).sum(axis=1)
+
+        pays_tx = member & (sensor_energy > tx_energy)
+        sensor_energy -= np.where(pays_tx, tx_energy, 0.0)
+        round_energy += np.where(pays_tx, tx_energy, 0.0).sum(axis=1)
+        sent = pays_tx
+        if forests is not None:
+            # Relays that cannot afford their share are drained but still send.
+            drained = member & ~pays_tx
+            round_energy += np.where(drained, sensor_energy, 0.0).sum(axis=1)
+            sensor_energy[drained] = 0.0
+            sent = member
+
+        rated = member & (sensor_energy > 0)
+        new_trust = trust_model.update(sensor_trust, trust_model.reputation(behaves), sensor_malicious, sensor_energy, r)
+        sensor_trust[rated] = new_trust[rated]
+        correctly_detected = np.count_nonzero(rated & sensor_malicious & (sensor_trust < trust_model.detection_threshold), axis=1)
+
+        if with_consensus and r % config.BLOCK_INTERVAL == 0:
+            validators = (gw_energy > 0) & (gw_trust >= config.TRUST_THRESHOLD) \
+                & (gw_energy > config.ENERGY_CONSENSUS_VALIDATOR)
+            gw_energy[validators] -= config.ENERGY_CONSENSUS_VALIDATOR
+            num_validators = np.count_nonzero(validators, axis=1)
+            round_energy += config.ENERGY_CONSENSUS_VALIDATOR * num_validators
+
+        latencies[:, r] = round_latency_batched(np.where(sent, gw_idx, -1), dist, num_gw, num_validators, processing_delay)
+        energy_consumed[:, r] = round_energy
+        trust_accuracies[:, r] = _benign_trust_mean(sensor_trust, benign, num_benign)
+        detection_rates[:, r] = correctly_detected / total_malicious
+
+    return {'energy': list(energy_consumed), 'latency': list(latencies),
+            'trust': list(trust_accuracies), 'detection': list(detection_rates)}
+
+def _run_batched_pow(state: NodeArrays, rngs: list[np.random.Generator]) -> dict:
+    """Runs the PoW baseline over a batch of runs."""
+    R = state.energy.shape[0]
+    energy = state.energy
+    mining_energy = compute_energy_tx(config.AREA_SIZE / 2) * config.POW_ENERGY_INTENSITY_FACTOR
+    energy_consumed = np.zeros((R, config.MAX_ROUNDS))
+    latencies = np.full((R, config.MAX_ROUNDS), pow_latency())
+
+    for r in range(config.MAX_ROUNDS):
+        if not (energy > mining_energy).any():
+            # No node in any run can mine again; the remaining rounds stay empty.
+            break
+        for k, rng in enumerate(rngs):
+            active = np.flatnonzero(energy[k] > 0)
+            if active.size == 0:
+                continue
+            num_miners = int(active.size * config.POW_MINERS_RATIO)
+            miners = active[draw_miners(rng, active.size, max(1, num_miners))]
+            pays = miners[energy[k, miners] > mining_energy]
+            energy[k, pays] -= mining_energy
+            energy_consumed[k, r] = mining_energy * pays.size
+
+    return {'energy': list(energy_consumed), 'latency': list(latencies), 'trust': [], 'detection': []}
+
+def run_batched(runs: range) -> dict:
+    """
+    Simulates SecureSenseChain, PoW and LEACH for all runs at once.
+
+    Topologies are built with the GRAPH_BACKEND the per-run engines use, so
+    multi-hop routes see the same edge weights (float32 for "csr").
+
+    Args:
+        runs (range): The run indices to simulate, also used as topology seeds.
+
+    Returns:
+        dict: Results in the same layout as the all_results dictionary built by
+        main.run_all_simulations, one per-round array per run.
+    """
+    graphs = [initialize_csr_graph(seed=run) if config.GRAPH_BACKEND == "csr" else initialize_graph(seed=run)
+              for run in runs]
+    state = stack_topologies(graphs)
+
+    def forests():
+        if config.ROUTING_MODE != "multihop":
+            return None
+        return [RoutingForest.from_graph(G) for G in graphs]
+
+    return {
+        'ssc': _run_batched_rounds(_copy_state(state), [protocol_rng(run, "ssc") for run in runs], DynamicTrustModel(),
+                                   with_consensus=True,
+                                   processing_delay=config.SSC_PROCESSING_DELAY, forests=forests()),
+        'pow': _run_batched_pow(_copy_state(state), [protocol_rng(run, "pow") for run in runs]),
+        'leach': _run_batched_rounds(_copy_state(state), [protocol_rng(run, "leach") for run in runs], FixedTrustModel(),
+                                     with_consensus=False, processing_delay=config.LEACH_PROCESSING_DELAY,
+                                     forests=forests()),
+    }
\ No newline at end of file
@@ -0,0 +1,275 @@
+# BlockWSN/benchmark.py
+"""
+Benchmark harness for topology construction, clustering, consensus and the
+per-round cost of each protocol.
+
+Each benchmark is timed over a sweep of network sizes. Results, including peak
+traced memory, are written as JSON, and can be compared against a stored
+baseline to flag slowdowns:
+
+    python -m BlockWSN.benchmark --output bench.json
+    python -m BlockWSN.benchmark --baseline bench.json --output bench_new.json
+
+With --ledger, the report also measures ledger throughput (transactions per
+second and block-assembly latency) for a range of block sizes.
+
+The simulation area grows with the sensor count so that node density, and
+therefore the number of edges per node, matches the default configuration.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import networkx as nx
+import numpy as np
+from . import config
+from .config_utils import override_config
+from .consensus import hdpoa_consensus
+from .csr_graph import initialize_csr_graph
+from .graph_utils import ClusterIndex, initialize_graph, form_clusters
+from .ledger import BlockAssembler, Ledger, Transaction
+from .mobility import mobile_network
+from .rng import protocol_rng
+from .routing import RoutingForest
+from .simulation import securesensechain, pow_simulation, leach_simulation
+from .vectorized import securesensechain_vectorized, leach_simulation_vectorized
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+DEFAULT_BLOCK_SIZES = [1, 16, 64, 256, 1024]
+
+def scaled_config(num_sensors: int) -> dict:
+    """
+    Returns the config overrides for a network of the given size.
+
+    Gateways scale at one per 20 sensors (at least the configured count) and
+    the area grows so that node density stays at its default value.
+    """
+    num_gateways = max(config.NUM_GATEWAYS, num_sensors // 20)
+    area = config.AREA_SIZE * math.sqrt(num_sensors / config.NUM_SENSORS)
+    return {"NUM_SENSORS": num_sensors, "NUM_GATEWAYS": num_gateways, "AREA_SIZE": area}
+
+def _cases(G: nx.Graph) -> dict:
+    """
+    Returns the benchmarked operations.
+
+    Each case is a (setup, fn) pair: setup() prepares a fresh argument outside
+    the timed region (for example a copy of the graph) and fn(arg) is timed.
+    """
+    cluster_index = ClusterIndex.from_graph(G)
+    form_clusters(G, cluster_index)
+    no_setup = lambda: None
+    fresh_graph = G.copy
+    all_alive = np.ones(G.number_of_nodes(), dtype=bool)
+
+    def built_forest():
+        # A forest with the busiest relay about to die, to time one subtree repair.
+        forest = RoutingForest.from_graph(G)
+        forest.update(all_alive)
+        alive = all_alive.copy()
+        alive[np.argmax(forest.relay_loads()[:forest.num_sensors])] = False
+        return forest, alive
+
+    def moving_network():
+        # Every sensor is on its way to a waypoint, to time one round of movement
+        # including range-edge upkeep, which only multi-hop routing needs.
+        with override_config(MOBILITY_MODEL="random_waypoint", ROUTING_MODE="multihop"):
+            return mobile_network(G, 0)
+    return {
+        "initialize_graph": (no_setup, lambda _: initialize_graph(seed=0)),
+        "initialize_csr_graph": (no_setup, lambda _: initialize_csr_graph(seed=0)),
+        "form_clusters": (no_setup, lambda _: form_clusters(G)),
+        "form_clusters_cached": (no_setup, lambda _: form_clusters(G, cluster_index)),
+        "hdpoa_consensus": (no_setup, lambda _: hdpoa_consensus(G)),
+        "routing_forest_build": (no_setup, lambda _: RoutingForest.from_graph(G).update(all_alive)),
+        "routing_forest_repair": (built_forest, lambda arg: arg[0].update(arg[1])),
+        "mobility_step": (moving_network, lambda network: network.step(1)),
+        "round_securesensechain": (fresh_graph, lambda H: securesensechain(H, protocol_rng(0, "ssc"))),
+        "round_pow_simulation": (fresh_graph, lambda H: pow_simulation(H, protocol_rng(0, "pow"))),
+        "round_leach_simulation": (fresh_graph, lambda H: leach_simulation(H, protocol_rng(0, "leach"))),
+        "round_securesensechain_vectorized": (fresh_graph, lambda H: securesensechain_vectorized(H, protocol_rng(0, "ssc"))),
+        "round_leach_simulation_vectorized": (fresh_graph, lambda H: leach_simulation_vectorized(H, protocol_rng(0, "leach"))),
+    }
+
+def _time(setup, fn, repeat: int) -> float:
+    """Returns the best wall-clock time of fn over the given number of repeats."""
+    best = math.inf
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _peak_memory(setup, fn) -> int:
+    """Returns the peak memory traced by tracemalloc while fn runs, in bytes."""
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmarks(sizes: list[int], repeat: int = 3, only: list[str] | None = None) -> dict:
+    """
+    Times every benchmark case over a sweep of network sizes.
+
+    The "round_*" cases run a full protocol call with MAX_ROUNDS set to 1 on a
+    fresh copy of the graph, so they include per-run setup (but not the copy)
+    as well as one round.
+
+    Args:
+        sizes (list[int]): Sensor counts to benchmark.
+        repeat (int): Timing repeats per case; the best time is reported.
+        only (list[str], optional): Restrict the run to these case names.
+
+    Returns:
+        dict: A JSON-serializable report with environment metadata and one
+        entry per (case, size).
+    """
+    results = []
+    for num_sensors in sizes:
+        overrides = scaled_config(num_sensors)
+        with override_config(MAX_ROUNDS=1, **overrides):
+            G = initialize_graph(seed=0)
+            for name, (setup, fn) in _cases(G).items():
+                if only and name not in only:
+                    continue
+                seconds = _time(setup, fn, repeat)
+                peak = _peak_memory(setup, fn)
+                results.append({
+                    "name": name,
+                    "num_sensors": num_sensors,
+                    "num_gateways": overrides["NUM_GATEWAYS"],
+                    "num_edges": G.number_of_edges(),
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                })
+                logging.info(f"{name:<36} n={num_sensors:<7} {seconds * 1e3:10.3f} ms  peak {peak / 2**20:8.2f} MiB")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "networkx": nx.__version__,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def ledger_throughput(num_transactions: int, block_sizes: list[int], repeat: int = 3) -> list[dict]:
+    """
+    Measures how fast sensor transactions are sealed into the ledger.
+
+    One round's worth of transactions, spread over NUM_GATEWAYS gateways, is
+    submitted and sealed into blocks signed by every gateway. This covers leaf
+    hashing, Merkle roots, signing and the verification done on append.
+
+    Args:
+        num_transactions (int): Transactions sealed per measurement.
+        block_sizes (list[int]): BLOCK_SIZE values to compare.
+        repeat (int): Timing repeats; the best time is reported.
+
+    Returns:
+        list[dict]: Per block size, the throughput in transactions per second
+        and the mean assembly latency per block.
+    """
+    transactions = [Transaction(i % config.NUM_SENSORS, i % config.NUM_GATEWAYS, 0, False)
+                    for i in range(num_transactions)]
+    validators = list(range(config.NUM_GATEWAYS))
+    results = []
+    for block_size in block_sizes:
+        best, num_blocks = math.inf, 0
+        for _ in range(repeat):
+            assembler = BlockAssembler(Ledger(), block_size)
+            start = time.perf_counter()
+            for tx in transactions:
+                assembler.submit(tx)
+            num_blocks = len(assembler.seal(0, validators))
+            best = min(best, time.perf_counter() - start)
+        results.append({
+            "block_size": block_size,
+            "num_transactions": num_transactions,
+            "num_blocks": num_blocks,
+            "seconds": best,
+            "transactions_per_second": num_transactions / best,
+            "block_latency_seconds": best / max(num_blocks, 1),
+        })
+        logging.info(f"ledger block_size={block_size:<6} {num_transactions / best:12.0f} tx/s  "
+                     f"{best / max(num_blocks, 1) * 1e3:8.3f} ms/block")
+    return results
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.25) -> list[dict]:
+    """
+    Compares a report against a baseline report.
+
+    Args:
+        report (dict): The current benchmark report.
+        baseline (dict): A previously saved report.
+        tolerance (float): Allowed relative slowdown before a case is flagged.
+
+    Returns:
+        list[dict]: The cases that got slower than the tolerance allows, with
+        their baseline and current times and the ratio between them.
+    """
+    base = {(r["name"], r["num_sensors"]): r for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = base.get((r["name"], r["num_sensors"]))
+        if old is None or old["seconds"] <= 0:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append({"name": r["name"], "num_sensors": r["num_sensors"],
+                                "baseline_seconds": old["seconds"], "seconds": r["seconds"], "ratio": ratio})
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point; returns a non-zero exit code on regressions."""
+    parser = argparse.ArgumentParser(prog="python -m BlockWSN.benchmark", description="Benchmark the simulation over a sweep of network sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help=f"sensor counts to sweep (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats per case (default: 3)")
+    parser.add_argument("--only", nargs="+", help="run only the named benchmark cases")
+    parser.add_argument("--output", default=os.path.join(config.OUTPUT_DIR, "benchmark.json"),
+                        help="where to write the JSON report (default: %(default)s)")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown allowed before a case is flagged (default: 0.25)")
+    parser.add_argument("--ledger", action="store_true", help="also measure ledger throughput")
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=DEFAULT_BLOCK_SIZES,
+                        help=f"block sizes for --ledger (default: {' '.join(map(str, DEFAULT_BLOCK_SIZES))})")
+    parser.add_argument("--ledger-transactions", type=int, default=10000,
+                        help="transactions sealed per ledger measurement (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, repeat=args.repeat, only=args.only)
+    if args.ledger:
+        report["ledger"] = ledger_throughput(args.ledger_transactions, args.block_sizes, repeat=args.repeat)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Benchmark report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            logging.warning(f"Slowdown: {r['name']} n={r['num_sensors']} "
+                            f"{r['baseline_seconds'] * 1e3:.3f} ms -> {r['seconds'] * 1e3:.3f} ms ({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        logging.info("No slowdowns beyond tolerance.")
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - [%(levelname)s] - %(message)s')
+    sys.exit(main())
\ No newline at end of file
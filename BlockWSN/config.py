@@ -6,17 +6,19 @@ This file contains all the tunable parameters for the simulation, including
 network topology, energy models, trust parameters, and output settings.
 """
 
-import os
-
 # --- Simulation Control ---
 NUM_RUNS = 30           # Number of times to run the entire simulation for statistical averaging
 MAX_ROUNDS = 100        # Number of rounds per simulation run
+MASTER_SEED = 2024      # Master seed from which every (run, protocol) random stream is derived
+ENGINE = "graph"        # Round engine for SSC and LEACH: "graph" (networkx dicts) or "vectorized" (NumPy arrays)
+GRAPH_BACKEND = "networkx" # Topology representation: "networkx" or "csr" (compact arrays, see csr_graph.py)
 
 # --- Network Topology ---
 NUM_SENSORS = 100       # Number of sensor nodes
 NUM_GATEWAYS = 5        # Number of gateway nodes
 AREA_SIZE = 100         # Dimensions of the simulation area (AREA_SIZE x AREA_SIZE)
 COMMUNICATION_RANGE = 30 # Maximum distance for a direct edge between nodes
+ROUTING_MODE = "direct" # "direct": sensors transmit straight to their nearest gateway; "multihop": packets are relayed over range edges (see routing.py)
 
 # --- Energy Model Parameters ---
 E_ELEC = 50e-9          # Energy for electronics (Tx/Rx) in Joules/bit
@@ -42,6 +44,33 @@ REPUTATION_PENALTY = 0.1
 POW_MINERS_RATIO = 0.1  # Percentage of nodes actively mining in the PoW simulation
 POW_ENERGY_INTENSITY_FACTOR = 50 # Multiplier for the high cost of a PoW operation
 
+# --- Mobility (see mobility.py) ---
+MOBILITY_MODEL = "static" # "static", "random_waypoint" (sensors travel between random waypoints) or "trace" (positions replayed from MOBILITY_TRACE)
+MOBILITY_MIN_SPEED = 0.5  # Random-waypoint speed range, in metres per round
+MOBILITY_MAX_SPEED = 2.0
+MOBILITY_PAUSE_ROUNDS = 2 # Rounds a sensor waits at each waypoint
+MOBILITY_TRACE = ""       # CSV trace of "round,sensor,x,y" rows for the "trace" model
+
+# --- Ledger (see ledger.py) ---
+BLOCK_INTERVAL = 10     # Rounds between HDPoA consensus rounds, in which pending transactions are sealed into blocks
+BLOCK_SIZE = 256        # Maximum number of transactions per block
+LEDGER_ENABLED = False  # Record SecureSenseChain readings in a signed, append-only block chain (graph and vectorized engines)
+
+# --- Streaming scorer (see streaming.py) ---
+STREAM_HOST = "127.0.0.1" # Address the scorer listens on for records sent by the replay tool
+STREAM_PORT = 9009
+STREAM_QUEUE_SIZE = 64    # Capacity of each queue between the reader, scorer and writer stages, in blocks of records
+STREAM_BATCH_SIZE = 8192  # Maximum number of records scored in one micro-batch
+
+# --- Latency Model (simulated time, see events.py) ---
+BANDWIDTH_BPS = 250e3   # Sensor radio data rate in bits/s (IEEE 802.15.4); one TDMA slot is PACKET_SIZE / BANDWIDTH_BPS
+PROPAGATION_SPEED = 3e8 # Radio propagation speed in m/s
+GATEWAY_PROCESSING_BPS = 1e6 # Rate at which a gateway aggregates received packets, in bits/s
+CONSENSUS_VOTE_TIME = 0.002  # Time for one validator to verify and sign a block, in seconds
+SSC_PROCESSING_DELAY = 0.00085 # Fixed per-round processing delay of SecureSenseChain, in seconds
+POW_BLOCK_TIME = 0.05   # Block interval of the PoW baseline, in seconds
+LEACH_PROCESSING_DELAY = 0.005 # Fixed per-round processing delay of LEACH, in seconds
+
 # --- Output Configuration ---
-OUTPUT_DIR = "simulation_results"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
\ No newline at end of file
+OUTPUT_DIR = "simulation_results"  # Created on demand when results, plots or tables are written
+PLOT_MAX_POINTS = 2000  # Curves with more rounds than this are downsampled (LTTB) before plotting
\ No newline at end of file
@@ -0,0 +1,29 @@
+# BlockWSN/config_utils.py
+"""
+Helpers for working with the settings in config.py.
+
+The simulation reads its parameters as module globals of config.py. This
+module only depends on config, so tools such as the benchmark harness and
+the sweep engine can patch settings without importing each other.
+"""
+
+import contextlib
+from . import config
+
+@contextlib.contextmanager
+def override_config(**values):
+    """
+    Temporarily replaces module-level settings in config.py.
+
+    The settings are process-wide globals: while the context is active every
+    caller in the process sees the new values, so overrides must not be
+    entered concurrently from several threads.
+    """
+    saved = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
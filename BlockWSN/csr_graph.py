@@ -0,0 +1,289 @@
+# BlockWSN/csr_graph.py
+"""
+Compact graph backend for very large networks.
+
+A CSRGraph keeps node state in typed arrays indexed by integer node id (sensors
+0..NUM_SENSORS-1, gateways after them) and the adjacency in compressed sparse
+row form with float32 edge weights. A million-node deployment at the default
+density fits in a few hundred MB, where networkx needs a Python dict per node
+and per edge.
+
+A thin adapter exposes the parts of the networkx interface the simulation
+uses: G.nodes[name] returns a mutable attribute view backed by the arrays, and
+G.nodes(data=True), has_node and copy behave as for nx.Graph. Node names are
+the usual "S<i>" and "G<i>" strings, so form_clusters, hdpoa_consensus and the
+protocol functions run on a CSRGraph unchanged.
+"""
+
+from collections.abc import MutableMapping
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+from . import config
+from .graph_utils import draw_nodes
+
+ATTRIBUTES = ("pos", "energy", "trust", "malicious")
+
+class _NodeAttrs(MutableMapping):
+    """Dict-like view of one node's attributes, backed by the graph's arrays."""
+
+    __slots__ = ("_graph", "_i")
+
+    def __init__(self, graph: "CSRGraph", i: int):
+        self._graph = graph
+        self._i = i
+
+    def __getitem__(self, key):
+        if key == "pos":
+            return tuple(self._graph.pos[self._i].tolist())
+        if key == "malicious":
+            return bool(self._graph.malicious[self._i])
+        if key in ("energy", "trust"):
+            return float(getattr(self._graph, key)[self._i])
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ATTRIBUTES:
+            raise KeyError(f"CSRGraph nodes have a fixed attribute set {ATTRIBUTES}, not {key!r}")
+        getattr(self._graph, key)[self._i] = value
+
+    def __delitem__(self, key):
+        raise TypeError("CSRGraph node attributes cannot be deleted")
+
+    def __iter__(self):
+        return iter(ATTRIBUTES)
+
+    def __len__(self):
+        return len(ATTRIBUTES)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class _NodeView:
+    """Minimal stand-in for nx.Graph.nodes over a CSRGraph."""
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph: "CSRGraph"):
+        self._graph = graph
+
+    def __iter__(self):
+        return iter(self._graph.node_names())
+
+    def __len__(self):
+        return self._graph.number_of_nodes()
+
+    def __contains__(self, name) -> bool:
+        return self._graph.has_node(name)
+
+    def __getitem__(self, name) -> _NodeAttrs:
+        return _NodeAttrs(self._graph, self._graph.node_index(name))
+
+    def __call__(self, data: bool = False):
+        if not data:
+            return iter(self)
+        return ((name, _NodeAttrs(self._graph, i)) for i, name in enumerate(self._graph.node_names()))
+
+def range_adjacency(pos: np.ndarray, chunk_size: int = 65536) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds the CSR adjacency of all node pairs within COMMUNICATION_RANGE.
+
+    Rows are filled a chunk of nodes at a time from bounded k-nearest queries,
+    so peak memory stays close to the size of the result instead of
+    materializing every pair and sorting it.
+
+    Args:
+        pos (np.ndarray): (num_nodes, 2) array of node positions.
+        chunk_size (int): Number of rows queried at once.
+
+    Returns:
+        tuple: indptr (int64), indices (int32, sorted within each row) and
+        weights (float32 distances), each edge stored in both directions.
+    """
+    n = len(pos)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    if n < 2:
+        return indptr, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    radius = config.COMMUNICATION_RANGE
+    tree = cKDTree(pos)
+    chunk_indices, chunk_weights = [], []
+    k = 32
+
+    nnz = 0
+    for lo in range(0, n, chunk_size):
+        hi = min(lo + chunk_size, n)
+        while True:
+            # Slightly enlarged radius, then filtered on the exact distance, as in
+            # graph_utils.range_edges. Retry with a larger k while any row is full.
+            # A list of ranks keeps the output 2-D even when only one neighbour is asked for.
+            dist, nbr = tree.query(pos[lo:hi], k=list(range(1, min(k, n) + 1)),
+                                   distance_upper_bound=radius * (1 + 1e-9))
+            if k >= n or np.isinf(dist[:, -1]).all():
+                break
+            k *= 2
+        order = np.argsort(nbr, axis=1)
+        nbr = np.take_along_axis(nbr, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+        keep = (nbr < n) & (nbr != np.arange(lo, hi)[:, None]) & (dist <= radius)
+
+        indptr[lo + 1:hi + 1] = nnz + np.cumsum(keep.sum(axis=1))
+        nnz = int(indptr[hi])
+        chunk_indices.append(nbr[keep].astype(np.int32))
+        chunk_weights.append(dist[keep].astype(np.float32))
+
+    return indptr, np.concatenate(chunk_indices), np.concatenate(chunk_weights)
+
+class CSRGraph:
+    """
+    Network graph stored as typed node arrays plus a CSR adjacency.
+
+    Args:
+        pos (np.ndarray): (num_nodes, 2) float64 node positions.
+        energy (np.ndarray): float64 residual energy per node.
+        trust (np.ndarray): float64 trust score per node.
+        malicious (np.ndarray): Boolean malicious flag per node.
+        num_sensors (int): Number of sensors; the remaining nodes are gateways.
+        indptr (np.ndarray): CSR row pointer, of length num_nodes + 1.
+        indices (np.ndarray): int32 neighbour ids.
+        weights (np.ndarray): float32 edge lengths, aligned with indices.
+    """
+
+    def __init__(self, pos: np.ndarray, energy: np.ndarray, trust: np.ndarray, malicious: np.ndarray,
+                 num_sensors: int, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray):
+        self.pos = pos
+        self.energy = energy
+        self.trust = trust
+        self.malicious = malicious
+        self.num_sensors = num_sensors
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @property
+    def num_gateways(self) -> int:
+        return len(self.energy) - self.num_sensors
+
+    @property
+    def nodes(self) -> _NodeView:
+        return _NodeView(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the node and adjacency arrays, in bytes."""
+        return sum(a.nbytes for a in (self.pos, self.energy, self.trust, self.malicious,
+                                      self.indptr, self.indices, self.weights))
+
+    def node_index(self, name) -> int:
+        """Converts a node name ("S<i>", "G<i>") or integer id into an integer id."""
+        if isinstance(name, (int, np.integer)):
+            if not 0 <= name < len(self.energy):
+                raise KeyError(name)
+            return int(name)
+        if isinstance(name, str) and name[1:].isdigit():
+            i = int(name[1:])
+            if name[0] == "S" and i < self.num_sensors:
+                return i
+            if name[0] == "G" and i < self.num_gateways:
+                return self.num_sensors + i
+        raise KeyError(name)
+
+    def node_name(self, i: int) -> str:
+        return f"S{i}" if i < self.num_sensors else f"G{i - self.num_sensors}"
+
+    def node_names(self):
+        """Yields the node names in id order."""
+        yield from (f"S{i}" for i in range(self.num_sensors))
+        yield from (f"G{i}" for i in range(self.num_gateways))
+
+    def has_node(self, name) -> bool:
+        try:
+            self.node_index(name)
+        except KeyError:
+            return False
+        return True
+
+    def number_of_nodes(self) -> int:
+        return len(self.energy)
+
+    def number_of_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def neighbors(self, name) -> list[str]:
+        i = self.node_index(name)
+        return [self.node_name(j) for j in self.indices[self.indptr[i]:self.indptr[i + 1]].tolist()]
+
+    def copy(self) -> "CSRGraph":
+        """
+        Returns a graph with its own position, energy and trust arrays.
+
+        Positions change when sensors move (see mobility.py), so they are
+        copied too. Flags and the adjacency are never modified by the
+        protocols and are shared with the original.
+        """
+        return CSRGraph(self.pos.copy(), self.energy.copy(), self.trust.copy(), self.malicious,
+                        self.num_sensors, self.indptr, self.indices, self.weights)
+
+    @classmethod
+    def from_nx(cls, G: nx.Graph) -> "CSRGraph":
+        """
+        Converts a graph created by initialize_graph.
+
+        Args:
+            G (nx.Graph): A graph with "S<i>" sensor and "G<i>" gateway nodes.
+
+        Returns:
+            CSRGraph: The same network; edge weights are rounded to float32.
+        """
+        num_sensors = sum(1 for n in G.nodes if n.startswith("S"))
+        num_gateways = G.number_of_nodes() - num_sensors
+        names = [f"S{i}" for i in range(num_sensors)] + [f"G{i}" for i in range(num_gateways)]
+        index = {name: i for i, name in enumerate(names)}
+        nodes = [G.nodes[n] for n in names]
+
+        edges = np.array([(index[u], index[v], w) for u, v, w in G.edges(data="weight")],
+                         dtype=np.float64).reshape(-1, 3)
+        rows = np.concatenate((edges[:, 0], edges[:, 1])).astype(np.int32)
+        cols = np.concatenate((edges[:, 1], edges[:, 0])).astype(np.int32)
+        adjacency = sparse.csr_matrix((np.tile(edges[:, 2], 2).astype(np.float32), (rows, cols)),
+                                      shape=(len(names), len(names)))
+        adjacency.sort_indices()
+        return cls(
+            pos=np.array([d["pos"] for d in nodes], dtype=np.float64).reshape(-1, 2),
+            energy=np.array([d["energy"] for d in nodes], dtype=np.float64),
+            trust=np.array([d["trust"] for d in nodes], dtype=np.float64),
+            malicious=np.array([d["malicious"] for d in nodes], dtype=bool),
+            num_sensors=num_sensors,
+            indptr=adjacency.indptr.astype(np.int64),
+            indices=adjacency.indices.astype(np.int32, copy=False),
+            weights=adjacency.data.astype(np.float32, copy=False),
+        )
+
+    def to_nx(self) -> nx.Graph:
+        """Converts the graph to networkx, for debugging small networks."""
+        G = nx.Graph()
+        G.add_nodes_from((name, dict(attrs)) for name, attrs in self.nodes(data=True))
+        rows = np.repeat(np.arange(len(self.energy)), np.diff(self.indptr))
+        upper = rows < self.indices
+        G.add_edges_from((self.node_name(i), self.node_name(j), {"weight": w})
+                         for i, j, w in zip(rows[upper].tolist(), self.indices[upper].tolist(),
+                                            self.weights[upper].tolist()))
+        return G
+
+def initialize_csr_graph(seed: int) -> CSRGraph:
+    """
+    CSR counterpart of initialize_graph; draws the same nodes for the same seed.
+
+    Args:
+        seed (int): The random seed for reproducibility.
+
+    Returns:
+        CSRGraph: The network, without creating any per-node Python objects.
+    """
+    pos, malicious = draw_nodes(seed)
+    energy = np.full(len(pos), config.INITIAL_ENERGY_GATEWAY, dtype=np.float64)
+    energy[:config.NUM_SENSORS] = config.INITIAL_ENERGY_SENSOR
+    trust = np.full(len(pos), 0.9, dtype=np.float64)
+    trust[:config.NUM_SENSORS] = config.INITIAL_TRUST_SCORE
+    indptr, indices, weights = range_adjacency(pos)
+    return CSRGraph(pos, energy, trust, malicious, config.NUM_SENSORS, indptr, indices, weights)
\ No newline at end of file
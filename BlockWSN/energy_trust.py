@@ -3,12 +3,18 @@
 Functions for calculating energy consumption and updating trust scores.
 """
 
+import abc
+import numpy as np
 from . import config
 
 def compute_energy_tx(dist: float) -> float:
     """Calculates the energy to transmit a packet over a given distance."""
     return config.E_ELEC * config.PACKET_SIZE + config.E_AMP * config.PACKET_SIZE * (dist**2)
 
+def compute_energy_rx() -> float:
+    """Calculates the energy to receive a packet."""
+    return config.E_ELEC * config.PACKET_SIZE
+
 def compute_energy_agg(num_packets: int) -> float:
     """Calculates the energy to aggregate data from multiple packets."""
     return num_packets * config.E_DA * config.PACKET_SIZE
@@ -17,6 +23,10 @@ def update_trust(node_data: dict, reputation: float, current_trust: float, curre
     """
     Updates a node's trust score based on behavior using a dynamic weighting factor.
 
+    This scalar form is the reference definition of the trust update. The
+    engines call update_trust_array through DynamicTrustModel, which must
+    produce the same scores.
+
     Args:
         node_data (dict): The dictionary of attributes for the node.
         reputation (float): The reputation score from the current round's interaction.
@@ -35,4 +45,135 @@ def update_trust(node_data: dict, reputation: float, current_trust: float, curre
     elif not node_data["malicious"] and node_data["energy"] > 0.1:
         trust = min(0.99, trust + 0.02)
 
-    return max(0.0, min(1.0, trust))
\ No newline at end of file
+    return max(0.0, min(1.0, trust))
+
+def alpha_schedule(num_rounds: int | None = None) -> np.ndarray:
+    """
+    Precomputes the historical-trust weight used by update_trust for every round.
+
+    Args:
+        num_rounds (int, optional): Number of rounds, defaults to MAX_ROUNDS.
+
+    Returns:
+        np.ndarray: alpha for each round index, equal to the value update_trust computes.
+    """
+    progress = np.arange(num_rounds or config.MAX_ROUNDS) / config.MAX_ROUNDS
+    return config.ALPHA_START - (config.ALPHA_START - config.ALPHA_END) * progress
+
+def update_trust_array(trust: np.ndarray, reputation: np.ndarray, malicious: np.ndarray,
+                       energy: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Array version of update_trust for many nodes at once.
+
+    Args:
+        trust (np.ndarray): Trust scores from the previous round.
+        reputation (np.ndarray): Reputation scores from this round's interactions.
+        malicious (np.ndarray): Boolean malicious flags.
+        energy (np.ndarray): Residual energies.
+        alpha (float): The round's weight for historical trust, see alpha_schedule.
+
+    Returns:
+        np.ndarray: The updated trust scores, bounded between 0.0 and 1.0.
+    """
+    trust = alpha * trust + (1 - alpha) * reputation
+    trust = np.where(malicious, trust * 0.8, np.where(energy > 0.1, np.minimum(0.99, trust + 0.02), trust))
+    return np.clip(trust, 0.0, 1.0)
+
+class TrustModel(abc.ABC):
+    """
+    Interface of a trust model for the round engines.
+
+    A model maps each node's behaviour in a round to a reputation score, folds
+    it into the node's trust, and flags nodes whose trust falls below its
+    detection threshold. Subclasses provide update, penalty, reward and
+    detection_threshold; a subclass missing any of them cannot be instantiated.
+    """
+
+    @property
+    @abc.abstractmethod
+    def penalty(self) -> float:
+        """Reputation for malicious behaviour."""
+
+    @property
+    @abc.abstractmethod
+    def reward(self) -> float:
+        """Reputation for honest behaviour."""
+
+    @property
+    @abc.abstractmethod
+    def detection_threshold(self) -> float:
+        """Trust below which a node is flagged."""
+
+    def reputation(self, behaves_maliciously: np.ndarray) -> np.ndarray:
+        return np.where(behaves_maliciously, self.penalty, self.reward)
+
+    @abc.abstractmethod
+    def update(self, trust: np.ndarray, reputation: np.ndarray, malicious: np.ndarray,
+               energy: np.ndarray, current_round: int) -> np.ndarray:
+        """Returns the trust of the given nodes after one round with the given reputations."""
+
+class DynamicTrustModel(TrustModel):
+    """
+    SecureSenseChain's trust model: update_trust with the alpha schedule of one run.
+
+    Args:
+        num_rounds (int, optional): Length of the run, defaults to MAX_ROUNDS.
+    """
+
+    def __init__(self, num_rounds: int | None = None):
+        self._penalty = config.REPUTATION_PENALTY
+        self._reward = config.REPUTATION_REWARD
+        self._detection_threshold = config.TRUST_THRESHOLD
+        self.alpha = alpha_schedule(num_rounds)
+
+    @property
+    def penalty(self) -> float:
+        return self._penalty
+
+    @property
+    def reward(self) -> float:
+        return self._reward
+
+    @property
+    def detection_threshold(self) -> float:
+        return self._detection_threshold
+
+    def update(self, trust: np.ndarray, reputation: np.ndarray, malicious: np.ndarray,
+               energy: np.ndarray, current_round: int) -> np.ndarray:
+        return update_trust_array(trust, reputation, malicious, energy, self.alpha[current_round])
+
+class FixedTrustModel(TrustModel):
+    """
+    Exponential average with fixed weights, as used by the LEACH baseline.
+
+    Args:
+        history_weight (float): Weight of the previous trust score.
+        recent_weight (float): Weight of this round's reputation.
+        penalty (float): Reputation for malicious behaviour.
+        reward (float): Reputation for honest behaviour.
+        detection_threshold (float): Trust below which a node is flagged.
+    """
+
+    def __init__(self, history_weight: float = 0.7, recent_weight: float = 0.3, penalty: float = 0.2,
+                 reward: float = 0.8, detection_threshold: float = 0.5):
+        self.history_weight = history_weight
+        self.recent_weight = recent_weight
+        self._penalty = penalty
+        self._reward = reward
+        self._detection_threshold = detection_threshold
+
+    @property
+    def penalty(self) -> float:
+        return self._penalty
+
+    @property
+    def reward(self) -> float:
+        return self._reward
+
+    @property
+    def detection_threshold(self) -> float:
+        return self._detection_threshold
+
+    def update(self, trust: np.ndarray, reputation: np.ndarray, malicious: np.ndarray,
+               energy: np.ndarray, current_round: int) -> np.ndarray:
+        return self.history_weight * trust + self.recent_weight * reputation
\ No newline at end of file
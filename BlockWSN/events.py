@@ -0,0 +1,183 @@
+# BlockWSN/events.py
+"""
+Discrete-event latency model.
+
+Latency is measured in simulated time rather than Python wall-clock time, so it
+is deterministic and independent of machine load or code speed. Within a round:
+
+1. The members of each cluster transmit one packet to their gateway in
+   consecutive TDMA slots of PACKET_SIZE / BANDWIDTH_BPS seconds, in member
+   order; a packet arrives after its slot plus propagation delay.
+2. When the last packet of a cluster has arrived, the gateway aggregates them
+   at GATEWAY_PROCESSING_BPS.
+3. In consensus rounds, once every gateway has aggregated, the block is sent to
+   each HDPoA validator in turn, which verifies and signs it.
+
+A transaction (one sensor reading) is final when its cluster's aggregate is
+done, or when consensus completes in consensus rounds. The round latency is the
+mean over all transactions plus a fixed per-protocol processing delay.
+"""
+
+import heapq
+import numpy as np
+from . import config
+
+class EventQueue:
+    """A minimal heap-based discrete-event scheduler."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._seq = 0
+
+    def schedule(self, time: float, handler, *args) -> None:
+        """Schedules handler(*args) to run at the given simulated time."""
+        heapq.heappush(self._heap, (time, self._seq, handler, args))
+        self._seq += 1
+
+    def run(self) -> float:
+        """Processes events in time order until none remain; returns the final time."""
+        while self._heap:
+            self.now, _, handler, args = heapq.heappop(self._heap)
+            handler(*args)
+        return self.now
+
+def slot_time() -> float:
+    """Time to transmit one packet over the sensor radio."""
+    return config.PACKET_SIZE / config.BANDWIDTH_BPS
+
+def aggregation_time(num_packets) -> float:
+    """Time for a gateway to aggregate the given number of packets."""
+    return num_packets * (config.PACKET_SIZE / config.GATEWAY_PROCESSING_BPS)
+
+def vote_time() -> float:
+    """Time for one validator to receive, verify and sign a block."""
+    return config.PACKET_SIZE / config.BANDWIDTH_BPS + config.CONSENSUS_VOTE_TIME
+
+def round_latency(cluster_distances: dict, num_validators: int, processing_delay: float) -> float:
+    """
+    Simulates one round as discrete events and returns its transaction latency.
+
+    Args:
+        cluster_distances (dict): For each gateway, the distances of the members
+            that transmitted this round, in slot order.
+        num_validators (int): Validators taking part in consensus this round,
+            0 if there is no consensus round.
+        processing_delay (float): Fixed per-protocol processing delay in seconds.
+
+    Returns:
+        float: Mean transaction latency in simulated seconds.
+    """
+    queue = EventQueue()
+    tx, speed = slot_time(), config.PROPAGATION_SPEED
+    remaining = {gw: len(dists) for gw, dists in cluster_distances.items() if dists}
+    finalized = {}
+    waiting = set(remaining)
+
+    def on_arrival(gateway):
+        remaining[gateway] -= 1
+        if remaining[gateway] == 0:
+            queue.schedule(queue.now + aggregation_time(len(cluster_distances[gateway])), on_aggregated, gateway)
+
+    def on_aggregated(gateway):
+        finalized[gateway] = queue.now
+        waiting.discard(gateway)
+        if not waiting and num_validators:
+            start = queue.now
+            for i in range(num_validators):
+                queue.schedule(start + (i + 1) * vote_time(), on_vote, i)
+
+    def on_vote(i):
+        if i == num_validators - 1:
+            for gateway in finalized:
+                finalized[gateway] = queue.now
+
+    for gateway in remaining:
+        for k, dist in enumerate(cluster_distances[gateway]):
+            queue.schedule((k + 1) * tx + dist / speed, on_arrival, gateway)
+    queue.run()
+
+    num_tx = sum(len(cluster_distances[gw]) for gw in finalized)
+    if num_tx == 0:
+        return processing_delay
+    total = sum(len(cluster_distances[gw]) * t for gw, t in finalized.items())
+    return total / num_tx + processing_delay
+
+def round_latency_arrays(labels: np.ndarray, dist: np.ndarray, num_gateways: int,
+                         num_validators: int, processing_delay: float) -> float:
+    """
+    Closed-form equivalent of round_latency for the array engines.
+
+    Args:
+        labels (np.ndarray): Gateway index of each transmitting member, in member order.
+        dist (np.ndarray): Distance of each transmitting member to its gateway.
+        num_gateways (int): Number of gateways.
+        num_validators (int): Validators taking part in consensus this round, or 0.
+        processing_delay (float): Fixed per-protocol processing delay in seconds.
+
+    Returns:
+        float: Mean transaction latency in simulated seconds.
+    """
+    if labels.size == 0:
+        return processing_delay
+    order = np.argsort(labels, kind="stable")
+    counts = np.bincount(labels, minlength=num_gateways)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(labels.size) - starts[labels[order]]
+
+    arrival = (rank + 1) * slot_time() + dist / config.PROPAGATION_SPEED
+    last_arrival = np.full(num_gateways, -np.inf)
+    np.maximum.at(last_arrival, labels, arrival)
+    active = counts > 0
+    done = last_arrival[active] + aggregation_time(counts[active])
+    if num_validators:
+        done = np.full_like(done, done.max() + num_validators * vote_time())
+    return float((counts[active] * done).sum() / labels.size) + processing_delay
+
+def round_latency_batched(labels: np.ndarray, dist: np.ndarray, num_gateways: int,
+                          num_validators: np.ndarray, processing_delay: float) -> np.ndarray:
+    """
+    round_latency_arrays for one round of many runs at once.
+
+    Every (run, gateway) pair is flattened into one bin, so slot ranks, last
+    arrivals and aggregation times of all runs come from single array passes.
+
+    Args:
+        labels (np.ndarray): (num_runs, num_sensors) gateway index of each
+            sensor that transmitted this round, -1 for the others. Members
+            transmit in sensor order.
+        dist (np.ndarray): (num_runs, num_sensors) distance of each sensor to its gateway.
+        num_gateways (int): Number of gateways per run.
+        num_validators (np.ndarray): Validators taking part in consensus in each run, or 0.
+        processing_delay (float): Fixed per-protocol processing delay in seconds.
+
+    Returns:
+        np.ndarray: Mean transaction latency of each run in simulated seconds.
+    """
+    num_runs = labels.shape[0]
+    runs, sensors = np.nonzero(labels >= 0)
+    keys = runs * num_gateways + labels[runs, sensors]
+    counts = np.bincount(keys, minlength=num_runs * num_gateways)
+    # np.nonzero yields senders run by run in sensor order, so a stable sort
+    # by bin keeps the slot order within every cluster.
+    order = np.argsort(keys, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(keys.size) - starts[keys[order]]
+
+    arrival = (rank + 1) * slot_time() + dist[runs, sensors] / config.PROPAGATION_SPEED
+    last_arrival = np.full(num_runs * num_gateways, -np.inf)
+    np.maximum.at(last_arrival, keys, arrival)
+    counts, last_arrival = counts.reshape(num_runs, num_gateways), last_arrival.reshape(num_runs, num_gateways)
+    active = counts > 0
+    done = np.where(active, last_arrival + aggregation_time(counts), 0.0)
+    consensus_done = np.where(active, done, -np.inf).max(axis=1) + num_validators * vote_time()
+    done = np.where(active & (np.asarray(num_validators)[:, None] > 0), consensus_done[:, None], done)
+    num_tx = counts.sum(axis=1)
+    total = (counts * done).sum(axis=1)
+    return np.where(num_tx > 0, total / np.maximum(num_tx, 1), 0.0) + processing_delay
+
+def pow_latency() -> float:
+    """Latency of the PoW baseline: block interval plus one block transmission."""
+    return config.POW_BLOCK_TIME + config.PACKET_SIZE / config.BANDWIDTH_BPS
\ No newline at end of file
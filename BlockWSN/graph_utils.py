@@ -4,50 +4,71 @@ Utility functions for creating and managing the network graph.
 """
 
 import networkx as nx
+import numpy as np
 import random
-from scipy.spatial import distance
+from scipy.spatial import cKDTree
 from . import config
 
-def initialize_graph(seed: int) -> nx.Graph:
+def draw_nodes(seed: int) -> tuple[np.ndarray, np.ndarray]:
     """
-    Initializes the network graph with sensor and gateway nodes.
+    Draws the node positions and malicious flags for one topology.
 
     Args:
         seed (int): The random seed for reproducibility.
 
     Returns:
-        nx.Graph: A NetworkX graph object representing the WSN.
+        tuple: A (num_nodes, 2) position array and a boolean malicious mask,
+        sensors first and gateways after them.
     """
-    random.seed(seed)
-    G = nx.Graph()
+    rng = random.Random(seed)
+    num_nodes = config.NUM_SENSORS + config.NUM_GATEWAYS
+    pos = np.empty((num_nodes, 2), dtype=np.float64)
+    malicious = np.zeros(num_nodes, dtype=bool)
 
-    # Create sensor nodes
-    sensor_nodes = []
+    # Sensor nodes
     malicious_indices = set()
     for i in range(config.NUM_SENSORS):
-        is_malicious = random.random() < config.MALICIOUS_PROB
+        is_malicious = rng.random() < config.MALICIOUS_PROB
         if is_malicious:
             malicious_indices.add(i)
-        sensor_nodes.append(
-            (f"S{i}", {
-                "pos": (random.uniform(0, config.AREA_SIZE), random.uniform(0, config.AREA_SIZE)),
-                "energy": config.INITIAL_ENERGY_SENSOR,
-                "trust": config.INITIAL_TRUST_SCORE,
-                "malicious": is_malicious
-            })
-        )
+        malicious[i] = is_malicious
+        pos[i] = (rng.uniform(0, config.AREA_SIZE), rng.uniform(0, config.AREA_SIZE))
 
     # Ensure the minimum number of malicious nodes
     while len(malicious_indices) < config.MIN_MALICIOUS_NODES:
-        i = random.randint(0, config.NUM_SENSORS - 1)
+        i = rng.randint(0, config.NUM_SENSORS - 1)
         if i not in malicious_indices:
-            sensor_nodes[i][1]["malicious"] = True
+            malicious[i] = True
             malicious_indices.add(i)
 
-    # Create gateway nodes
+    # Gateway nodes
+    for i in range(config.NUM_SENSORS, num_nodes):
+        pos[i] = (rng.uniform(0, config.AREA_SIZE), rng.uniform(0, config.AREA_SIZE))
+    return pos, malicious
+
+def initialize_graph(seed: int) -> nx.Graph:
+    """
+    Initializes the network graph with sensor and gateway nodes.
+
+    Args:
+        seed (int): The random seed for reproducibility.
+
+    Returns:
+        nx.Graph: A NetworkX graph object representing the WSN.
+    """
+    pos, malicious = draw_nodes(seed)
+    G = nx.Graph()
+    sensor_nodes = [
+        (f"S{i}", {
+            "pos": tuple(pos[i].tolist()),
+            "energy": config.INITIAL_ENERGY_SENSOR,
+            "trust": config.INITIAL_TRUST_SCORE,
+            "malicious": bool(malicious[i])
+        }) for i in range(config.NUM_SENSORS)
+    ]
     gateway_nodes = [
         (f"G{i}", {
-            "pos": (random.uniform(0, config.AREA_SIZE), random.uniform(0, config.AREA_SIZE)),
+            "pos": tuple(pos[config.NUM_SENSORS + i].tolist()),
             "energy": config.INITIAL_ENERGY_GATEWAY,
             "trust": 0.9,
             "malicious": False
@@ -55,35 +76,309 @@ def initialize_graph(seed: int) -> nx.Graph:
     ]
     G.add_nodes_from(sensor_nodes + gateway_nodes)
 
-    # Add edges based on communication range
-    for n1, d1 in G.nodes(data=True):
-        for n2, d2 in G.nodes(data=True):
-            if n1 != n2:
-                dist = distance.euclidean(d1["pos"], d2["pos"])
-                if dist <= config.COMMUNICATION_RANGE:
-                    G.add_edge(n1, n2, weight=dist)
+    G.add_edges_from(range_edges(G))
     return G
 
-def form_clusters(G: nx.Graph) -> dict:
+def range_edges(G: nx.Graph) -> list[tuple[str, str, dict]]:
+    """
+    Finds every pair of nodes within COMMUNICATION_RANGE using a KD-tree.
+
+    Each in-range pair is emitted once, ordered by node insertion order, so that
+    adding the result to a graph yields the same adjacency as a full pairwise scan.
+
+    Args:
+        G (nx.Graph): A graph whose nodes carry a "pos" attribute.
+
+    Returns:
+        list[tuple[str, str, dict]]: Edges as (u, v, {"weight": distance}) tuples.
+    """
+    nodes = list(G.nodes)
+    pos = np.array([G.nodes[n]["pos"] for n in nodes], dtype=np.float64).reshape(-1, 2)
+    first, second, dists = range_pairs(pos)
+    return [(nodes[i], nodes[j], {"weight": d})
+            for i, j, d in zip(first.tolist(), second.tolist(), dists.tolist())]
+
+def range_pairs(pos: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Array counterpart of range_edges over a position array.
+
+    Args:
+        pos (np.ndarray): (num_nodes, 2) array of node positions.
+
+    Returns:
+        tuple: First and second node index (first < second, sorted) and the
+        distance of every pair within COMMUNICATION_RANGE.
+    """
+    if len(pos) < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0)
+    # Query with a slightly enlarged radius and filter on the exact distance so
+    # that pairs right at the boundary are decided the same way as before.
+    pairs = cKDTree(pos).query_pairs(config.COMMUNICATION_RANGE * (1 + 1e-9), output_type="ndarray")
+    if len(pairs) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0)
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    dists = exact_distances(pos[pairs[:, 0]], pos[pairs[:, 1]])
+    keep = dists <= config.COMMUNICATION_RANGE
+    return pairs[keep, 0], pairs[keep, 1], dists[keep]
+
+def exact_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Euclidean distances between broadcastable arrays of (x, y) positions."""
+    # Squares are summed in extended precision, matching the BLAS nrm2 kernel
+    # behind distance.euclidean so edge weights come out bit-for-bit the same.
+    delta = (b - a).astype(np.longdouble)
+    return np.sqrt(np.einsum("...k,...k->...", delta, delta)).astype(np.float64)
+
+class ClusterIndex:
+    """
+    Nearest-gateway assignment that is cached between rounds.
+
+    Sensors are assigned in one batch query against a KD-tree over the active
+    gateways. Later calls only reassign the sensors whose gateway has run out of
+    energy (or that have become active again) and the sensors that moved;
+    sensors that die simply drop out.
+
+    Args:
+        sensor_ids (list): Sensor node IDs, in cluster-member order.
+        gateway_ids (list): Gateway node IDs.
+        sensor_pos (np.ndarray): (num_sensors, 2) array of sensor positions.
+        gateway_pos (np.ndarray): (num_gateways, 2) array of gateway positions.
+    """
+
+    def __init__(self, sensor_ids: list, gateway_ids: list,
+                 sensor_pos: np.ndarray, gateway_pos: np.ndarray):
+        self.sensor_ids = sensor_ids
+        self.gateway_ids = gateway_ids
+        self.sensor_pos = np.asarray(sensor_pos, dtype=np.float64)
+        self.gateway_pos = np.asarray(gateway_pos, dtype=np.float64)
+        self.labels = np.full(len(sensor_ids), -1, dtype=np.intp)
+        self._moved = np.zeros(len(sensor_ids), dtype=bool)
+        self._sensor_alive = None
+        self._gateway_alive = None
+        self._active_gateways = None
+        self._tree = None
+
+    @classmethod
+    def from_graph(cls, G: nx.Graph) -> "ClusterIndex":
+        """Builds an index over the sensor and gateway nodes of a graph."""
+        sensor_ids = [n for n in G.nodes if n.startswith("S")]
+        gateway_ids = [n for n in G.nodes if n.startswith("G")]
+        return cls(sensor_ids, gateway_ids,
+                   np.array([G.nodes[n]["pos"] for n in sensor_ids], dtype=np.float64).reshape(-1, 2),
+                   np.array([G.nodes[n]["pos"] for n in gateway_ids], dtype=np.float64).reshape(-1, 2))
+
+    def _query(self, sensors: np.ndarray) -> None:
+        """Assigns the given sensor indices to their nearest active gateway."""
+        if sensors.size == 0:
+            return
+        if self._active_gateways.size == 0:
+            self.labels[sensors] = -1
+            return
+        _, nearest = self._tree.query(self.sensor_pos[sensors])
+        self.labels[sensors] = self._active_gateways[nearest]
+
+    def assign(self, sensor_alive: np.ndarray, gateway_alive: np.ndarray) -> np.ndarray:
+        """
+        Updates and returns the cluster assignment for the current round.
+
+        Args:
+            sensor_alive (np.ndarray): Boolean mask of sensors with energy left.
+            gateway_alive (np.ndarray): Boolean mask of gateways with energy left.
+
+        Returns:
+            np.ndarray: The gateway index for each sensor, or -1 if it is inactive
+            or there is no active gateway.
+        """
+        gateways_changed = self._gateway_alive is None or not np.array_equal(gateway_alive, self._gateway_alive)
+        if gateways_changed:
+            self._active_gateways = np.flatnonzero(gateway_alive)
+            self._tree = cKDTree(self.gateway_pos[self._active_gateways]) if self._active_gateways.size else None
+
+        if self._sensor_alive is None:
+            stale = sensor_alive
+        else:
+            stale = sensor_alive & (~self._sensor_alive | self._moved)
+            if gateways_changed:
+                lost = np.flatnonzero(self._gateway_alive & ~gateway_alive)
+                stale |= sensor_alive & np.isin(self.labels, lost)
+                if (gateway_alive & ~self._gateway_alive).any():
+                    # A gateway came back, so any sensor might now be closer to it.
+                    stale = sensor_alive.copy()
+
+        self.labels[~sensor_alive] = -1
+        self._query(np.flatnonzero(stale))
+        self._moved[:] = False
+        self._sensor_alive = sensor_alive.copy()
+        self._gateway_alive = gateway_alive.copy()
+        return self.labels
+
+    def move(self, sensors: np.ndarray, pos: np.ndarray) -> None:
+        """
+        Updates the positions of sensors that moved; the next assign call reassigns them.
+
+        Args:
+            sensors (np.ndarray): Indices of the sensors that moved.
+            pos (np.ndarray): Their new (x, y) positions.
+        """
+        self.sensor_pos[sensors] = pos
+        self._moved[sensors] = True
+
+    def clusters(self) -> dict:
+        """Converts the current assignment into a gateway -> sensor list dict."""
+        clusters = {gw: [] for gw in self.gateway_ids}
+        members = np.flatnonzero(self.labels >= 0)
+        for s, g in zip(members.tolist(), self.labels[members].tolist()):
+            clusters[self.gateway_ids[g]].append(self.sensor_ids[s])
+        return clusters
+
+def form_clusters(G: nx.Graph, index: ClusterIndex | None = None) -> dict:
     """
     Forms clusters by assigning each active sensor to the nearest active gateway.
 
     Args:
         G (nx.Graph): The current network graph.
+        index (ClusterIndex, optional): An index kept across rounds of the same
+            run. When given, only sensors affected by energy changes since the
+            previous call are reassigned.
 
     Returns:
         dict: A dictionary where keys are gateway IDs and values are lists of sensor IDs.
     """
-    clusters = {f"G{i}": [] for i in range(config.NUM_GATEWAYS)}
-    active_sensors = [n for n, d in G.nodes(data=True) if n.startswith("S") and d["energy"] > 0]
-    active_gateways = [n for n, d in G.nodes(data=True) if n.startswith("G") and d["energy"] > 0]
+    if index is None:
+        index = ClusterIndex.from_graph(G)
+    nodes = G.nodes
+    sensor_alive = np.fromiter((nodes[n]["energy"] > 0 for n in index.sensor_ids), dtype=bool, count=len(index.sensor_ids))
+    gateway_alive = np.fromiter((nodes[n]["energy"] > 0 for n in index.gateway_ids), dtype=bool, count=len(index.gateway_ids))
+    index.assign(sensor_alive, gateway_alive)
+    return index.clusters()
 
-    if not active_gateways:
-        return clusters
+def cluster_reserve(cluster_index: ClusterIndex, gateway_reserve: float) -> np.ndarray:
+    """
+    Energy reserves of a cluster-based protocol, for a NodeStateIndex.
+
+    Args:
+        cluster_index (ClusterIndex): The run's sensors and gateways.
+        gateway_reserve (float): Energy a gateway needs to act in a round;
+            inf if gateways never act on their own.
+
+    Returns:
+        np.ndarray: Zero for every sensor, which acts while it has energy,
+        then gateway_reserve for every gateway.
+    """
+    return np.concatenate((np.zeros(len(cluster_index.sensor_ids)), np.full(len(cluster_index.gateway_ids), gateway_reserve)))
+
+class NodeStateIndex:
+    """
+    Per-run index of node roles, active nodes and benign sensor trust.
+
+    Nodes are identified by integer id, sensors first and gateways after them.
+    The round engines report the nodes whose energy or trust they changed, so
+    the active sets and the benign trust sum are kept up to date incrementally
+    instead of being rebuilt by scanning every node each round.
+
+    A node is active while its energy is above zero, and funded while its
+    energy is above its reserve, the least it needs to act in a round. Once no
+    node is funded the network is depleted: further rounds can no longer
+    change its state.
+
+    Args:
+        node_ids (list): Node IDs in integer id order.
+        energy (np.ndarray): Residual energy of every node.
+        trust (np.ndarray): Trust score of every node.
+        malicious (np.ndarray): Boolean malicious flag of every node.
+        num_sensors (int): Number of sensors; the remaining nodes are gateways.
+        reserve (float | np.ndarray): Energy reserve, per node or for all nodes.
+    """
+
+    def __init__(self, node_ids: list, energy: np.ndarray, trust: np.ndarray, malicious: np.ndarray,
+                 num_sensors: int, reserve: float | np.ndarray = 0.0):
+        energy = np.asarray(energy, dtype=np.float64)
+        self.node_ids = node_ids
+        self.num_sensors = num_sensors
+        self.reserve = np.broadcast_to(np.asarray(reserve, dtype=np.float64), energy.shape)
+        self.alive = energy > 0
+        self.funded = energy > self.reserve
+        self.num_funded = int(np.count_nonzero(self.funded))
+
+        # Role partitions; roles do not change during a run.
+        self.sensors = np.arange(num_sensors)
+        self.gateways = np.arange(num_sensors, len(energy))
+        self.benign = ~np.asarray(malicious, dtype=bool)
+        self.benign[num_sensors:] = False
+        self.benign_sensors = np.flatnonzero(self.benign)
+        self.malicious_sensors = np.setdiff1d(self.sensors, self.benign_sensors)
+
+        self.trust = np.array(trust, dtype=np.float64)
+        self.benign_trust_sum = float(self.trust[self.benign_sensors].sum())
+        self._active = None
+        self._active_ids = None
+
+    @classmethod
+    def from_graph(cls, G: nx.Graph, reserve: float | np.ndarray = 0.0) -> "NodeStateIndex":
+        """Builds an index over the sensor and gateway nodes of a graph."""
+        sensor_ids = [n for n in G.nodes if n.startswith("S")]
+        node_ids = sensor_ids + [n for n in G.nodes if n.startswith("G")]
+        nodes = [G.nodes[n] for n in node_ids]
+        return cls(node_ids, np.array([d["energy"] for d in nodes], dtype=np.float64),
+                   np.array([d["trust"] for d in nodes], dtype=np.float64),
+                   np.array([d["malicious"] for d in nodes], dtype=bool), len(sensor_ids), reserve)
+
+    @property
+    def sensor_alive(self) -> np.ndarray:
+        return self.alive[:self.num_sensors]
+
+    @property
+    def gateway_alive(self) -> np.ndarray:
+        return self.alive[self.num_sensors:]
+
+    @property
+    def depleted(self) -> bool:
+        return self.num_funded == 0
+
+    def active(self) -> np.ndarray:
+        """Ids of the active nodes, in id order; rebuilt only after a node has died."""
+        if self._active is None:
+            self._active = np.flatnonzero(self.alive)
+        return self._active
+
+    def active_ids(self) -> list:
+        """Node IDs of the active nodes, in id order."""
+        if self._active_ids is None:
+            self._active_ids = [self.node_ids[i] for i in self.active().tolist()]
+        return self._active_ids
+
+    def record_energy(self, nodes: np.ndarray, energy: np.ndarray) -> None:
+        """
+        Records the new energy of nodes that may have crossed zero or their reserve.
+
+        Args:
+            nodes (np.ndarray): Integer ids of the nodes.
+            energy (np.ndarray): Their residual energy.
+        """
+        alive = energy > 0
+        if (alive != self.alive[nodes]).any():
+            self.alive[nodes] = alive
+            self._active = self._active_ids = None
+        funded = energy > self.reserve[nodes]
+        changed = funded != self.funded[nodes]
+        if changed.any():
+            self.num_funded += 2 * int(np.count_nonzero(funded[changed])) - int(np.count_nonzero(changed))
+            self.funded[nodes] = funded
+
+    def record_trust(self, nodes: np.ndarray, trust: np.ndarray) -> None:
+        """
+        Records the new trust scores of nodes and updates the benign trust sum.
+
+        The sum is accumulated in the order the nodes are given, so engines
+        that pass the same nodes in the same order get bit-identical means.
+
+        Args:
+            nodes (np.ndarray): Integer ids of the nodes, without repeats.
+            trust (np.ndarray): Their trust scores.
+        """
+        benign = self.benign[nodes]
+        self.benign_trust_sum += float((trust[benign] - self.trust[nodes[benign]]).sum())
+        self.trust[nodes] = trust
 
-    for sensor in active_sensors:
-        distances = {gw: distance.euclidean(G.nodes[sensor]["pos"], G.nodes[gw]["pos"]) for gw in active_gateways}
-        closest_gateway = min(distances, key=distances.get)
-        clusters[closest_gateway].append(sensor)
-            
-    return clusters
\ No newline at end of file
+    def benign_trust_mean(self) -> float:
+        """Mean trust of the non-malicious sensors, or 0 if there are none."""
+        return self.benign_trust_sum / self.benign_sensors.size if self.benign_sensors.size else 0
\ No newline at end of file
@@ -0,0 +1,109 @@
+# BlockWSN/instrumentation.py
+"""
+Per-phase timing and optional profiling of simulation rounds.
+
+A PhaseTimer accumulates perf_counter_ns time and call counts for each named
+phase of a round. The protocol functions default to NULL_TIMER, whose phases
+are a shared no-op context manager, so instrumentation costs next to nothing
+when it is not requested.
+"""
+
+import contextlib
+import cProfile
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+
+class _Phase:
+    """Context manager that adds its elapsed time to one phase of a PhaseTimer."""
+
+    __slots__ = ("_timer", "_name", "_start")
+
+    def __init__(self, timer: "PhaseTimer", name: str):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self._start
+        self._timer.totals_ns[self._name] = self._timer.totals_ns.get(self._name, 0) + elapsed
+        self._timer.calls[self._name] = self._timer.calls.get(self._name, 0) + 1
+        return False
+
+class PhaseTimer:
+    """Accumulates wall-clock time and call counts per simulation phase."""
+
+    enabled = True
+
+    def __init__(self):
+        self.totals_ns = {}
+        self.calls = {}
+
+    def phase(self, name: str) -> _Phase:
+        """Returns a context manager that times one execution of the named phase."""
+        return _Phase(self, name)
+
+    def summary(self) -> dict:
+        """
+        Returns the phase breakdown collected so far.
+
+        Returns:
+            dict: For each phase, its total time in nanoseconds, call count and
+            share of the total instrumented time.
+        """
+        total = sum(self.totals_ns.values()) or 1
+        return {name: {"total_ns": ns, "calls": self.calls[name], "share": ns / total}
+                for name, ns in sorted(self.totals_ns.items(), key=lambda item: -item[1])}
+
+class _NullTimer:
+    """Stand-in for PhaseTimer when instrumentation is disabled."""
+
+    enabled = False
+    _null = contextlib.nullcontext()
+
+    def phase(self, name: str) -> contextlib.nullcontext:
+        return self._null
+
+    def summary(self) -> dict:
+        return {}
+
+NULL_TIMER = _NullTimer()
+
+@contextlib.contextmanager
+def profiled(path_prefix: str, top: int = 25):
+    """
+    Runs the enclosed block under cProfile and tracemalloc.
+
+    On exit the cProfile statistics are written to <path_prefix>.prof (readable
+    with pstats or snakeviz) and a text report with the slowest functions and
+    the largest allocation sites to <path_prefix>.txt.
+
+    Args:
+        path_prefix (str): Output path without extension.
+        top (int): Number of entries listed in the text report.
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        profiler.dump_stats(path_prefix + ".prof")
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        report.write(f"\nPeak traced memory: {peak / 2**20:.2f} MiB\n\nTop allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            report.write(f"{stat}\n")
+        with open(path_prefix + ".txt", "w") as f:
+            f.write(report.getvalue())
+        logging.info(f"Profile saved to {path_prefix}.prof and {path_prefix}.txt")
\ No newline at end of file
@@ -0,0 +1,228 @@
+# BlockWSN/ledger.py
+"""
+Block and ledger layer of SecureSenseChain.
+
+Every sensor reading delivered to a gateway becomes a transaction. Gateways
+keep the transactions they collect in a pending pool. In each HDPoA consensus
+round (every BLOCK_INTERVAL rounds) they seal the pool into blocks of at most
+BLOCK_SIZE transactions. A block commits to its transactions through a SHA-256
+Merkle root, and to the previous block through its hash. It is signed (HMAC-
+SHA256) by every trusted validator of that round and appended to the chain,
+which only ever grows.
+
+Validator keys are derived from MASTER_SEED and the gateway index, so runs stay
+reproducible; they model key material, not a secure key exchange.
+"""
+
+import hashlib
+import hmac
+import json
+import struct
+from typing import NamedTuple
+from . import config
+
+TX_FORMAT = struct.Struct("<IIIB")
+HEADER_FORMAT = struct.Struct("<IIII")
+GENESIS_HASH = bytes(32)
+
+class Transaction(NamedTuple):
+    """One sensor reading as delivered to a gateway."""
+    sensor: int
+    gateway: int
+    round: int
+    falsified: bool
+
+    def encode(self) -> bytes:
+        return TX_FORMAT.pack(self.sensor, self.gateway, self.round, self.falsified)
+
+    def digest(self) -> bytes:
+        return hashlib.sha256(self.encode()).digest()
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    """
+    Computes the SHA-256 Merkle root of a list of leaf hashes.
+
+    An odd node at the end of a level is paired with itself; the root of an
+    empty list is the hash of the empty string.
+
+    Args:
+        leaves (list[bytes]): The leaf hashes, in block order.
+
+    Returns:
+        bytes: The 32-byte root hash.
+    """
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    level = list(leaves)
+    sha256 = hashlib.sha256
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0]
+
+def validator_key(gateway: int) -> bytes:
+    """Returns the signing key of a gateway validator."""
+    return hashlib.sha256(f"{config.MASTER_SEED}:validator:{gateway}".encode()).digest()
+
+class Block:
+    """
+    A batch of transactions sealed by one gateway.
+
+    Args:
+        index (int): Position of the block in the chain.
+        prev_hash (bytes): Hash of the previous block.
+        round (int): Simulation round in which the block was sealed.
+        proposer (int): Index of the gateway that assembled the block.
+        transactions (list[Transaction]): The transactions, in order.
+    """
+
+    def __init__(self, index: int, prev_hash: bytes, round: int, proposer: int,
+                 transactions: list[Transaction]):
+        self.index = index
+        self.prev_hash = prev_hash
+        self.round = round
+        self.proposer = proposer
+        self.transactions = transactions
+        self.merkle_root = merkle_root([tx.digest() for tx in transactions])
+        self.signatures = {}
+
+    def header(self) -> bytes:
+        return HEADER_FORMAT.pack(self.index, self.round, self.proposer, len(self.transactions)) \
+            + self.prev_hash + self.merkle_root
+
+    @property
+    def hash(self) -> bytes:
+        return hashlib.sha256(self.header()).digest()
+
+    def sign(self, validator: int) -> None:
+        """Adds a validator's HMAC signature over the block hash."""
+        self.signatures[validator] = hmac.new(validator_key(validator), self.hash, hashlib.sha256).digest()
+
+    def verify(self) -> bool:
+        """Checks the Merkle root and that the block carries only valid signatures, at least one."""
+        if self.merkle_root != merkle_root([tx.digest() for tx in self.transactions]):
+            return False
+        block_hash = self.hash
+        return bool(self.signatures) and all(
+            hmac.compare_digest(sig, hmac.new(validator_key(v), block_hash, hashlib.sha256).digest())
+            for v, sig in self.signatures.items())
+
+    def to_json(self) -> dict:
+        return {
+            "index": self.index, "round": self.round, "proposer": self.proposer,
+            "hash": self.hash.hex(), "prev_hash": self.prev_hash.hex(), "merkle_root": self.merkle_root.hex(),
+            "transactions": [list(tx) for tx in self.transactions],
+            "signatures": {str(v): sig.hex() for v, sig in self.signatures.items()},
+        }
+
+class Ledger:
+    """
+    Append-only chain of blocks.
+
+    Args:
+        path (str, optional): If given, the file is created (or truncated) and
+            every appended block is written to it as one JSON line; lines are
+            never rewritten.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._blocks = []
+        self.num_transactions = 0
+        if path:
+            open(path, "w").close()
+
+    @property
+    def blocks(self) -> tuple[Block, ...]:
+        return tuple(self._blocks)
+
+    @property
+    def height(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def head_hash(self) -> bytes:
+        return self._blocks[-1].hash if self._blocks else GENESIS_HASH
+
+    def append(self, block: Block, verify: bool = True) -> None:
+        """
+        Appends a sealed block to the chain.
+
+        Args:
+            block (Block): The block extending the current head.
+            verify (bool): Whether to re-check the Merkle root and signatures.
+                Blocks sealed locally by a BlockAssembler are trusted; Ledger.verify
+                still re-checks them.
+
+        Raises:
+            ValueError: If the block does not extend the current head or fails verification.
+        """
+        if block.index != self.height or block.prev_hash != self.head_hash:
+            raise ValueError(f"Block {block.index} does not extend the chain at height {self.height}")
+        if verify and not block.verify():
+            raise ValueError(f"Block {block.index} has an invalid Merkle root or signature")
+        self._blocks.append(block)
+        self.num_transactions += len(block.transactions)
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(block.to_json()) + "\n")
+
+    def verify(self) -> bool:
+        """Re-checks every block and hash link of the chain."""
+        prev_hash = GENESIS_HASH
+        for index, block in enumerate(self._blocks):
+            if block.index != index or block.prev_hash != prev_hash or not block.verify():
+                return False
+            prev_hash = block.hash
+        return True
+
+class BlockAssembler:
+    """
+    Per-gateway pools of pending transactions that are sealed into blocks.
+
+    Args:
+        ledger (Ledger): The chain sealed blocks are appended to.
+        block_size (int, optional): Maximum transactions per block, defaults to BLOCK_SIZE.
+    """
+
+    def __init__(self, ledger: Ledger, block_size: int | None = None):
+        self.ledger = ledger
+        self.block_size = block_size or config.BLOCK_SIZE
+        self.pending = {}
+
+    def submit(self, tx: Transaction) -> None:
+        self.pending.setdefault(tx.gateway, []).append(tx)
+
+    def num_pending(self) -> int:
+        return sum(len(pool) for pool in self.pending.values())
+
+    def seal(self, current_round: int, validators: list[int]) -> list[Block]:
+        """
+        Seals every pending transaction into blocks signed by the given validators.
+
+        Without validators nothing can be signed, so the pools stay pending
+        until the next consensus round.
+
+        Args:
+            current_round (int): The simulation round.
+            validators (list[int]): Indices of the trusted gateways of this round.
+
+        Returns:
+            list[Block]: The blocks appended to the ledger, in chain order.
+        """
+        if not validators:
+            return []
+        sealed = []
+        for gateway in sorted(self.pending):
+            pool = self.pending[gateway]
+            for start in range(0, len(pool), self.block_size):
+                block = Block(self.ledger.height, self.ledger.head_hash, current_round, gateway,
+                              pool[start:start + self.block_size])
+                for validator in validators:
+                    block.sign(validator)
+                # Merkle root and signatures were just computed here.
+                self.ledger.append(block, verify=False)
+                sealed.append(block)
+        self.pending = {}
+        return sealed
\ No newline at end of file
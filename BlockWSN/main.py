@@ -7,62 +7,273 @@ This script orchestrates the entire simulation process:
 2. Runs simulations for SecureSenseChain, PoW, and LEACH protocols over multiple runs.
 3. Aggregates the results for statistical analysis.
 4. Generates output plots and a summary CSV file.
+
+Subcommands:
+    run     Simulate (the default), store every run and optionally render outputs.
+    plot    Re-render the PDFs from the runs stored for the current configuration.
+    table   Re-create the CSV summary from the stored runs.
 """
 
+import argparse
+import contextlib
+import functools
 import logging
+import os
+import sys
+import networkx as nx
 import numpy as np
-from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
 from . import config
+from .batched import run_batched
+from .csr_graph import CSRGraph, initialize_csr_graph
 from .graph_utils import initialize_graph
+from .instrumentation import PhaseTimer, profiled
+from .ledger import Ledger
+from .mobility import mobile_network
+from .rng import protocol_rng
+from .stats import ResultAggregator
+from .store import ResultStore
 from .simulation import securesensechain, pow_simulation, leach_simulation
+from .vectorized import securesensechain_vectorized, leach_simulation_vectorized
 from .visualization import plot_results, create_comparison_table
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [%(levelname)s] - %(message)s')
 
-def run_all_simulations() -> None:
+def simulate_run(run: int, phases: bool = False, profile_run: int | None = None,
+                 G: nx.Graph | CSRGraph | None = None) -> dict:
     """
-    Runs all simulation protocols, aggregates results, and generates outputs.
+    Runs SecureSenseChain, PoW and LEACH on the topology generated for one seed.
+
+    Args:
+        run (int): The run index, also used as the topology seed.
+        phases (bool): Record per-phase timings for each protocol.
+        profile_run (int, optional): If equal to run, profile this run with
+            cProfile and tracemalloc and write the reports to OUTPUT_DIR.
+        G (nx.Graph | CSRGraph, optional): A prebuilt topology for this seed,
+            e.g. a memoized one; it is not modified. Built from the seed if omitted.
+
+    Returns:
+        dict: Per-protocol dictionaries mapping each collected metric to a
+        per-round NumPy array. With phases enabled, a "phases" entry holds
+        the per-protocol timing breakdown.
     """
-    all_results = {
-        'ssc': {'energy': [], 'latency': [], 'trust': [], 'detection': []},
-        'pow': {'energy': [], 'latency': [], 'trust': [], 'detection': []},
-        'leach': {'energy': [], 'latency': [], 'trust': [], 'detection': []},
-    }
+    if config.ENGINE == "vectorized":
+        run_ssc, run_leach = securesensechain_vectorized, leach_simulation_vectorized
+    else:
+        run_ssc, run_leach = securesensechain, leach_simulation
+    timers = {protocol: PhaseTimer() if phases else None for protocol in ("ssc", "pow", "leach")}
+    ledger = None
+    if config.LEDGER_ENABLED:
+        ledger_dir = os.path.join(config.OUTPUT_DIR, "ledgers")
+        os.makedirs(ledger_dir, exist_ok=True)
+        ledger = Ledger(os.path.join(ledger_dir, f"run_{run}.jsonl"))
 
-    for run in tqdm(range(config.NUM_RUNS), desc="Overall Simulation Progress"):
+    if run == profile_run:
+        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+        profile = profiled(os.path.join(config.OUTPUT_DIR, f"profile_run_{run}"))
+    else:
+        profile = contextlib.nullcontext()
+
+    with profile:
         logging.info(f"--- Starting Run {run + 1}/{config.NUM_RUNS} ---")
-        G = initialize_graph(seed=run)
-        
+        if G is None:
+            G = initialize_csr_graph(seed=run) if config.GRAPH_BACKEND == "csr" else initialize_graph(seed=run)
+
         logging.info("Running SecureSenseChain...")
-        ssc_e, ssc_l, ssc_t, ssc_d = securesensechain(G.copy())
-        all_results['ssc']['energy'].append(ssc_e)
-        all_results['ssc']['latency'].append(ssc_l)
-        all_results['ssc']['trust'].append(ssc_t)
-        all_results['ssc']['detection'].append(ssc_d)
-        
+        ssc_e, ssc_l, ssc_t, ssc_d = run_ssc(G.copy(), protocol_rng(run, "ssc"), timers["ssc"], ledger=ledger,
+                                         mobility=mobile_network(G, run))
+        if ledger is not None:
+            logging.info(f"Ledger: {ledger.height} blocks, {ledger.num_transactions} transactions")
+
         logging.info("Running PoW Baseline...")
-        pow_e, pow_l, pow_t, pow_d = pow_simulation(G.copy())
-        all_results['pow']['energy'].append(pow_e)
-        all_results['pow']['latency'].append(pow_l)
-        
+        pow_e, pow_l, pow_t, pow_d = pow_simulation(G.copy(), protocol_rng(run, "pow"), timers["pow"])
+
         logging.info("Running LEACH Baseline...")
-        leach_e, leach_l, leach_t, leach_d = leach_simulation(G.copy())
-        all_results['leach']['energy'].append(leach_e)
-        all_results['leach']['latency'].append(leach_l)
-        all_results['leach']['trust'].append(leach_t)
-        all_results['leach']['detection'].append(leach_d)
-
-    logging.info("--- Aggregating Results ---")
-    mean_results = {}
-    for protocol, metrics in all_results.items():
-        mean_results[protocol] = {}
-        for metric, data in metrics.items():
-            mean_results[protocol][metric] = np.mean(data, axis=0)
-
-    plot_results(all_results, config.OUTPUT_DIR)
-    create_comparison_table(mean_results, config.OUTPUT_DIR)
+        leach_e, leach_l, leach_t, leach_d = run_leach(G.copy(), protocol_rng(run, "leach"), timers["leach"],
+                                                 mobility=mobile_network(G, run))
+
+    run_result = {
+        'ssc': {'energy': np.asarray(ssc_e), 'latency': np.asarray(ssc_l),
+                'trust': np.asarray(ssc_t), 'detection': np.asarray(ssc_d)},
+        'pow': {'energy': np.asarray(pow_e), 'latency': np.asarray(pow_l)},
+        'leach': {'energy': np.asarray(leach_e), 'latency': np.asarray(leach_l),
+                  'trust': np.asarray(leach_t), 'detection': np.asarray(leach_d)},
+    }
+    if phases:
+        run_result['phases'] = {protocol: timer.summary() for protocol, timer in timers.items()}
+    return run_result
+
+def _log_phase_totals(phase_totals: dict) -> None:
+    """Logs the share of instrumented time spent in each phase, per protocol."""
+    for protocol, totals in phase_totals.items():
+        overall = sum(totals.values()) or 1
+        breakdown = ", ".join(f"{name} {ns / overall:.1%}" for name, ns in sorted(totals.items(), key=lambda item: -item[1]))
+        logging.info(f"Phase breakdown ({protocol}, {overall / 1e9:.3f} s): {breakdown}")
+
+def _split_batch(batch_results: dict, runs: list[int]) -> dict:
+    """Splits run_batched output into per-run results keyed by run index."""
+    return {run: {protocol: {metric: data[k] for metric, data in metrics.items() if data}
+                  for protocol, metrics in batch_results.items()}
+            for k, run in enumerate(runs)}
+
+def run_all_simulations(workers: int = 1, batched: bool = False, resume: bool = False, plot: bool = True,
+                        phases: bool = False, profile_run: int | None = None) -> None:
+    """
+    Runs all simulation protocols, aggregates results, and generates outputs.
+
+    Runs are folded into a streaming ResultAggregator as they finish, so memory
+    use does not grow with NUM_RUNS. Every finished run is also written to the
+    ResultStore under OUTPUT_DIR.
+
+    Args:
+        workers (int): Number of worker processes. Runs are independent given
+            their seed, so with more than one worker they are spread over a
+            process pool; results are merged in run order either way.
+        batched (bool): Simulate all runs at once on (num_runs, num_nodes)
+            arrays instead of one run at a time, in a single process.
+        resume (bool): Reuse runs already in the store for the current
+            configuration instead of simulating them again.
+        plot (bool): Render the plots and summary table at the end. Disable on
+            headless compute workers and use the plot/table subcommands later.
+        phases (bool): Record per-phase timings of every run and store them
+            next to the results. Not available in batched mode.
+        profile_run (int, optional): Run index to profile with cProfile and
+            tracemalloc. Not available in batched mode.
+
+    Raises:
+        ValueError: If batched mode is combined with more than one worker or
+            with a MOBILITY_MODEL other than "static".
+    """
+    from tqdm import tqdm
+
+    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+    store = ResultStore(config.OUTPUT_DIR)
+    runs = list(range(config.NUM_RUNS))
+    pending = [run for run in runs if not (resume and store.has(run))]
+    if len(pending) < len(runs):
+        logging.info(f"--- Resuming: {len(runs) - len(pending)} of {len(runs)} runs already stored ---")
+
+    if batched and workers > 1:
+        raise ValueError("Batched mode runs in a single process; use workers=1")
+    if batched and config.MOBILITY_MODEL != "static":
+        raise ValueError(f"Batched mode only simulates static topologies, not MOBILITY_MODEL {config.MOBILITY_MODEL!r}")
+
+    executor = None
+    if batched:
+        if config.LEDGER_ENABLED:
+            logging.warning("LEDGER_ENABLED is ignored in batched mode; no ledgers are recorded.")
+        batch = {}
+        if pending:
+            logging.info(f"--- Simulating {len(pending)} runs as one batch ---")
+            batch = _split_batch(run_batched(pending), pending)
+        run_results = (batch[run] for run in pending)
+    else:
+        run_one = functools.partial(simulate_run, phases=phases, profile_run=profile_run)
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            run_results = executor.map(run_one, pending)
+        else:
+            run_results = map(run_one, pending)
+
+    aggregator = ResultAggregator()
+    phase_totals = {}
+    pending = set(pending)
+    try:
+        for run in tqdm(runs, desc="Overall Simulation Progress"):
+            if run in pending:
+                run_result = next(run_results)
+                phase_breakdown = run_result.pop('phases', None)
+                store.save(run, run_result)
+                if phase_breakdown:
+                    store.save_phases(run, phase_breakdown)
+                    for protocol, summary in phase_breakdown.items():
+                        totals = phase_totals.setdefault(protocol, {})
+                        for name, entry in summary.items():
+                            totals[name] = totals.get(name, 0) + entry['total_ns']
+            else:
+                run_result = store.load(run)
+            aggregator.add_run(run_result)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if phase_totals:
+        _log_phase_totals(phase_totals)
+
+    if plot:
+        plot_results(aggregator, config.OUTPUT_DIR)
+        create_comparison_table(aggregator.mean_results(), config.OUTPUT_DIR)
     
     logging.info("--- Simulation Complete ---")
 
+def load_results(store: ResultStore) -> ResultAggregator:
+    """
+    Folds every run stored for a configuration into a ResultAggregator.
+
+    Args:
+        store (ResultStore): The store to read from.
+
+    Returns:
+        ResultAggregator: The aggregated results, in seed order.
+
+    Raises:
+        FileNotFoundError: If no runs are stored for the configuration.
+    """
+    seeds = store.seeds()
+    if not seeds:
+        raise FileNotFoundError(f"No stored runs for configuration {store.key} in {store.root}; use the run command first.")
+    aggregator = ResultAggregator()
+    for seed in seeds:
+        aggregator.add_run(store.load(seed))
+    logging.info(f"Loaded {len(seeds)} stored runs for configuration {store.key}")
+    return aggregator
+
+def main(argv: list[str] | None = None) -> None:
+    """Parses the command line and dispatches to the requested subcommand."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    commands = ("run", "plot", "table")
+    if not argv or argv[0] not in commands + ("-h", "--help"):
+        argv = ["run"] + argv
+
+    parser = argparse.ArgumentParser(prog="python -m BlockWSN.main", description="Run the SecureSenseChain simulation.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="simulate all runs and store the results (default)")
+    run_parser.add_argument("--workers", type=int, default=1,
+                            help="number of worker processes used to run simulations in parallel (default: 1)")
+    run_parser.add_argument("--batched", action="store_true",
+                            help="simulate all runs together as one batch of (num_runs, num_nodes) arrays")
+    run_parser.add_argument("--resume", action="store_true",
+                            help="skip runs already stored in OUTPUT_DIR for the current configuration")
+    run_parser.add_argument("--no-plot", action="store_true",
+                            help="only simulate and store results; render them later with the plot/table commands")
+    run_parser.add_argument("--phases", action="store_true",
+                            help="record per-phase timings of every run and store them with the results")
+    run_parser.add_argument("--profile-run", type=int, metavar="RUN",
+                            help="profile the given run index with cProfile and tracemalloc")
+
+    plot_parser = subparsers.add_parser("plot", help="render the comparison PDFs from stored results")
+    plot_parser.add_argument("--band", choices=("std", "ci"), default="std",
+                             help="shade one standard deviation or the 95%% confidence interval (default: std)")
+    plot_parser.add_argument("--workers", type=int, default=4,
+                             help="number of processes used to render the PDFs (default: 4)")
+
+    subparsers.add_parser("table", help="write the CSV summary from stored results")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        if args.batched and (args.phases or args.profile_run is not None):
+            parser.error("--phases and --profile-run are not available with --batched")
+        if args.batched and args.workers > 1:
+            parser.error("--workers is not available with --batched; the batch runs in a single process")
+        if args.batched and config.MOBILITY_MODEL != "static":
+            parser.error(f"--batched only simulates static topologies; MOBILITY_MODEL is {config.MOBILITY_MODEL!r}")
+        run_all_simulations(workers=args.workers, batched=args.batched, resume=args.resume, plot=not args.no_plot,
+                            phases=args.phases, profile_run=args.profile_run)
+    elif args.command == "plot":
+        plot_results(load_results(ResultStore(config.OUTPUT_DIR)), config.OUTPUT_DIR, band=args.band, workers=args.workers)
+    else:
+        create_comparison_table(load_results(ResultStore(config.OUTPUT_DIR)).mean_results(), config.OUTPUT_DIR)
+
 if __name__ == '__main__':
-    run_all_simulations()
\ No newline at end of file
+    main()
\ No newline at end of file
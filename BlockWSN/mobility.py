@@ -0,0 +1,325 @@
+# BlockWSN/mobility.py
+"""
+Mobile sensors: movement models and incrementally maintained range edges.
+
+With MOBILITY_MODEL set to "random_waypoint" or "trace", sensors move at the
+start of every round, for example vehicle-mounted nodes or drifting buoys.
+Gateways stay in place. A MobileNetwork keeps the node positions and the edges
+within COMMUNICATION_RANGE up to date. A uniform grid with cells of
+COMMUNICATION_RANGE puts every in-range neighbour of a node in the 3 x 3 block
+of cells around it. A round therefore only re-buckets the nodes that crossed a
+cell boundary, and only re-checks the edges of the nodes that moved, instead
+of rebuilding the whole topology.
+
+The MobileNetwork is the only source of range edges once sensors move; the
+engines update node positions in the graph but leave its edges as built.
+Edges are only maintained in the "multihop" ROUTING_MODE, the only mode that
+reads them. There, every round with movement hands the full adjacency to the
+routing forest, which then recomputes all routes.
+"""
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from . import config
+from .csr_graph import CSRGraph
+from .graph_utils import exact_distances, range_pairs
+from .rng import protocol_rng
+
+class RandomWaypoint:
+    """
+    Random-waypoint movement: each sensor travels in a straight line to a
+    uniformly drawn waypoint, pauses there, then picks the next one.
+
+    Args:
+        pos (np.ndarray): (num_sensors, 2) initial sensor positions; copied.
+        rng (np.random.Generator): The mobility stream of this run.
+    """
+
+    def __init__(self, pos: np.ndarray, rng: np.random.Generator):
+        self.pos = np.array(pos, dtype=np.float64)
+        self.rng = rng
+        n = len(self.pos)
+        self.target = self._draw_waypoints(n)
+        self.speed = self._draw_speeds(n)
+        self.pause = np.zeros(n, dtype=np.int64)
+
+    def _draw_waypoints(self, n: int) -> np.ndarray:
+        return self.rng.uniform(0, config.AREA_SIZE, size=(n, 2))
+
+    def _draw_speeds(self, n: int) -> np.ndarray:
+        return self.rng.uniform(config.MOBILITY_MIN_SPEED, config.MOBILITY_MAX_SPEED, size=n)
+
+    def step(self, current_round: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Moves the sensors for one round; round 0 keeps the initial positions.
+
+        Returns:
+            tuple: Indices of the sensors that moved and their new positions.
+        """
+        if current_round == 0:
+            return np.empty(0, dtype=np.intp), np.empty((0, 2))
+        paused = self.pause > 0
+        self.pause[paused] -= 1
+        moving = np.flatnonzero(~paused)
+
+        delta = self.target[moving] - self.pos[moving]
+        dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        speed = self.speed[moving]
+        arrives = dist <= speed
+        travel = ~arrives
+        self.pos[moving[travel]] += delta[travel] * (speed[travel] / dist[travel])[:, None]
+        arrived = moving[arrives]
+        self.pos[arrived] = self.target[arrived]
+
+        self.target[arrived] = self._draw_waypoints(arrived.size)
+        self.speed[arrived] = self._draw_speeds(arrived.size)
+        self.pause[arrived] = config.MOBILITY_PAUSE_ROUNDS
+        return moving, self.pos[moving]
+
+class TraceMobility:
+    """
+    Trace-driven movement replayed from a CSV file.
+
+    Every row is "round,sensor,x,y" and places a sensor at (x, y) from that
+    round on; sensors without a row in a round stay where they are. Lines
+    starting with # are ignored.
+
+    Args:
+        pos (np.ndarray): (num_sensors, 2) initial sensor positions.
+        path (str): Path of the trace file.
+
+    Raises:
+        ValueError: If the trace names a sensor that does not exist.
+    """
+
+    def __init__(self, pos: np.ndarray, path: str):
+        data = np.loadtxt(path, delimiter=",", comments="#", ndmin=2)
+        rounds = data[:, 0].astype(np.int64)
+        sensors = data[:, 1].astype(np.intp)
+        if len(sensors) and (sensors.min() < 0 or sensors.max() >= len(pos)):
+            raise ValueError(f"Trace {path} names sensors outside 0..{len(pos) - 1}")
+        order = np.argsort(rounds, kind="stable")
+        rounds, sensors, xy = rounds[order], sensors[order], data[order, 2:4]
+        bounds = np.flatnonzero(np.diff(rounds)) + 1
+        self._rows = {int(r[0]): (s, p) for r, s, p in
+                      zip(np.split(rounds, bounds), np.split(sensors, bounds), np.split(xy, bounds))
+                      if len(r)}
+
+    def step(self, current_round: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the sensors with a trace row in this round and their positions.
+
+        If a sensor has several rows in one round, the last one wins.
+        """
+        sensors, xy = self._rows.get(current_round, (np.empty(0, dtype=np.intp), np.empty((0, 2))))
+        if len(np.unique(sensors)) < len(sensors):
+            last = len(sensors) - 1 - np.unique(sensors[::-1], return_index=True)[1]
+            sensors, xy = sensors[last], xy[last]
+        return sensors, xy
+
+class SpatialGrid:
+    """
+    Uniform grid of square cells over the node positions.
+
+    Nodes are kept sorted by cell, so the members of any cell are one slice of
+    sorted_nodes. Moving nodes only re-inserts those that changed cell.
+
+    Args:
+        pos (np.ndarray): (num_nodes, 2) node positions. The array is kept and
+            updated in place by move.
+        cell_size (float, optional): Edge length of a cell, defaults to
+            COMMUNICATION_RANGE so that every in-range neighbour of a node lies
+            in the 3 x 3 block of cells around it.
+    """
+
+    _OFFSET = 2**30
+    _STRIDE = 2**31
+
+    def __init__(self, pos: np.ndarray, cell_size: float | None = None):
+        self.pos = pos
+        self.cell_size = cell_size or config.COMMUNICATION_RANGE
+        self.keys = self._cell_keys(pos)
+        self.sorted_nodes = np.argsort(self.keys, kind="stable")
+        self.sorted_keys = self.keys[self.sorted_nodes]
+
+    def _cell_keys(self, pos: np.ndarray) -> np.ndarray:
+        cells = np.floor(pos / self.cell_size).astype(np.int64) + self._OFFSET
+        return cells[:, 0] * self._STRIDE + cells[:, 1]
+
+    def move(self, nodes: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        """
+        Moves nodes to new positions, re-inserting only those that changed cell.
+
+        Args:
+            nodes (np.ndarray): Indices of the nodes that moved, without repeats.
+            pos (np.ndarray): Their new positions.
+
+        Returns:
+            np.ndarray: Indices of the nodes that crossed a cell boundary.
+        """
+        self.pos[nodes] = pos
+        keys = self._cell_keys(pos)
+        crossed = keys != self.keys[nodes]
+        crossers, keys = nodes[crossed], keys[crossed]
+        if crossers.size:
+            leaving = np.zeros(len(self.keys), dtype=bool)
+            leaving[crossers] = True
+            stay = ~leaving[self.sorted_nodes]
+            self.sorted_nodes, self.sorted_keys = self.sorted_nodes[stay], self.sorted_keys[stay]
+            order = np.argsort(keys, kind="stable")
+            at = np.searchsorted(self.sorted_keys, keys[order], side="right")
+            self.sorted_nodes = np.insert(self.sorted_nodes, at, crossers[order])
+            self.sorted_keys = np.insert(self.sorted_keys, at, keys[order])
+            self.keys[crossers] = keys
+        return crossers
+
+    def nearby(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs every given node with each node in the 3 x 3 block of cells around it.
+
+        Args:
+            nodes (np.ndarray): Indices of the query nodes.
+
+        Returns:
+            tuple: Query node and candidate node of every pair; each query node
+            is also paired with itself.
+        """
+        shifts = np.array([dx * self._STRIDE + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+        targets = (self.keys[nodes][:, None] + shifts).ravel()
+        lo = np.searchsorted(self.sorted_keys, targets, side="left")
+        counts = np.searchsorted(self.sorted_keys, targets, side="right") - lo
+        block = np.repeat(np.arange(len(targets)), counts)
+        starts = np.cumsum(counts) - counts
+        candidates = self.sorted_nodes[lo[block] + np.arange(len(block)) - starts[block]]
+        return nodes[block // len(shifts)], candidates
+
+class MobileNetwork:
+    """
+    Positions and range edges of a network whose sensors move.
+
+    Edges are stored once per node pair, as arrays. When nodes move, the edges
+    touching them are dropped and re-derived from the grid cells around them.
+
+    Args:
+        pos (np.ndarray): (num_nodes, 2) initial positions, sensors first; copied.
+        num_sensors (int): Number of sensors; the remaining nodes are gateways.
+        model (RandomWaypoint | TraceMobility): Movement model of the sensors.
+        chunk_size (int): Number of moved nodes whose edges are derived at once.
+        track_edges (bool): Maintain the range edges. Without them only the
+            positions are updated and adjacency is unavailable.
+
+    Attributes:
+        pos (np.ndarray): Current node positions.
+        first, second (np.ndarray): The two endpoints of every edge, first < second.
+        weights (np.ndarray): The length of every edge.
+    """
+
+    def __init__(self, pos: np.ndarray, num_sensors: int, model: RandomWaypoint | TraceMobility,
+                 chunk_size: int = 16384, track_edges: bool = True):
+        self.pos = np.array(pos, dtype=np.float64)
+        self.num_sensors = num_sensors
+        self.model = model
+        self.chunk_size = chunk_size
+        self.track_edges = track_edges
+        if track_edges:
+            self.grid = SpatialGrid(self.pos)
+            self.first, self.second, self.weights = range_pairs(self.pos)
+        else:
+            self.grid = None
+            self.first = self.second = np.empty(0, dtype=np.intp)
+            self.weights = np.empty(0)
+
+    def number_of_edges(self) -> int:
+        return len(self.first)
+
+    def _refresh_edges(self, nodes: np.ndarray) -> None:
+        """Recomputes the edges touching the given nodes from the grid cells around them."""
+        moved = np.zeros(len(self.pos), dtype=bool)
+        moved[nodes] = True
+        kept = ~(moved[self.first] | moved[self.second])
+        radius2 = (config.COMMUNICATION_RANGE * (1 + 1e-9))**2
+        firsts, seconds, weights = [self.first[kept]], [self.second[kept]], [self.weights[kept]]
+        for lo in range(0, len(nodes), self.chunk_size):
+            u, v = self.grid.nearby(nodes[lo:lo + self.chunk_size])
+            # A pair of two moved nodes is found from both ends; keep it once.
+            once = (u < v) | ((u > v) & ~moved[v])
+            u, v = u[once], v[once]
+            # Cheap float64 prefilter, with the same margin as range_pairs.
+            delta = self.pos[v] - self.pos[u]
+            near = np.einsum("ij,ij->i", delta, delta) <= radius2
+            u, v = u[near], v[near]
+            dists = exact_distances(self.pos[u], self.pos[v])
+            in_range = dists <= config.COMMUNICATION_RANGE
+            u, v = u[in_range], v[in_range]
+            firsts.append(np.minimum(u, v))
+            seconds.append(np.maximum(u, v))
+            weights.append(dists[in_range])
+        self.first, self.second, self.weights = np.concatenate(firsts), np.concatenate(seconds), np.concatenate(weights)
+
+    def step(self, current_round: int) -> np.ndarray:
+        """
+        Moves the sensors for one round and updates the edges around them, if tracked.
+
+        Returns:
+            np.ndarray: Indices of the sensors that moved; pos holds their new positions.
+        """
+        moved, pos = self.model.step(current_round)
+        if len(moved):
+            if self.track_edges:
+                self.grid.move(moved, pos)
+                self._refresh_edges(moved)
+            else:
+                self.pos[moved] = pos
+        return moved
+
+    def adjacency(self) -> sparse.csr_matrix:
+        """
+        Weighted adjacency of the current range edges in node-id order, as routing.adjacency_matrix.
+
+        The matrix is built from all edges on every call, not patched.
+
+        Raises:
+            ValueError: If the network does not track edges.
+        """
+        if not self.track_edges:
+            raise ValueError("This MobileNetwork does not track range edges")
+        n = len(self.pos)
+        rows = np.concatenate((self.first, self.second))
+        cols = np.concatenate((self.second, self.first))
+        return sparse.csr_matrix((np.concatenate((self.weights, self.weights)), (rows, cols)), shape=(n, n))
+
+def mobile_network(G: nx.Graph | CSRGraph, run: int) -> MobileNetwork | None:
+    """
+    Creates the mobility state of one protocol run, as selected by MOBILITY_MODEL.
+
+    Every protocol of a run gets its own MobileNetwork, drawn from the same
+    stream, so all protocols see the same sensor trajectories. Range edges are
+    only tracked in the "multihop" ROUTING_MODE, where the routing forest
+    needs them.
+
+    Args:
+        G (nx.Graph | CSRGraph): The run's initial topology.
+        run (int): The run index.
+
+    Returns:
+        MobileNetwork | None: None when MOBILITY_MODEL is "static".
+
+    Raises:
+        ValueError: If MOBILITY_MODEL is not a known model.
+    """
+    if config.MOBILITY_MODEL == "static":
+        return None
+    if isinstance(G, CSRGraph):
+        pos, num_sensors = G.pos, G.num_sensors
+    else:
+        sensor_ids = [n for n in G.nodes if n.startswith("S")]
+        node_ids = sensor_ids + [n for n in G.nodes if n.startswith("G")]
+        pos, num_sensors = np.array([G.nodes[n]["pos"] for n in node_ids], dtype=np.float64), len(sensor_ids)
+    if config.MOBILITY_MODEL == "random_waypoint":
+        model = RandomWaypoint(pos[:num_sensors], protocol_rng(run, "mobility"))
+    elif config.MOBILITY_MODEL == "trace":
+        model = TraceMobility(pos[:num_sensors], config.MOBILITY_TRACE)
+    else:
+        raise ValueError(f"Unknown MOBILITY_MODEL {config.MOBILITY_MODEL!r}")
+    return MobileNetwork(pos, num_sensors, model, track_edges=config.ROUTING_MODE == "multihop")
\ No newline at end of file
@@ -0,0 +1,70 @@
+# BlockWSN/rng.py
+"""
+Deterministic random number streams for the simulation.
+
+Every (run, protocol) pair gets its own numpy Generator derived from
+config.MASTER_SEED, so results are bit-reproducible regardless of the order in
+which runs are executed or how many worker processes share the work. Per-round
+decisions are drawn in bulk arrays rather than one scalar call per node.
+"""
+
+import numpy as np
+from . import config
+
+PROTOCOL_STREAMS = {"ssc": 0, "pow": 1, "leach": 2, "mobility": 3}
+
+def protocol_rng(run: int, protocol: str) -> np.random.Generator:
+    """
+    Creates the random stream for one protocol in one simulation run.
+
+    Args:
+        run (int): The run index (the same value used as the topology seed).
+        protocol (str): One of the keys of PROTOCOL_STREAMS.
+
+    Returns:
+        np.random.Generator: An independent generator for this (run, protocol).
+    """
+    seq = np.random.SeedSequence(config.MASTER_SEED, spawn_key=(run, PROTOCOL_STREAMS[protocol]))
+    return np.random.default_rng(seq)
+
+def draw_behaviour(rng: np.random.Generator, malicious: np.ndarray) -> np.ndarray:
+    """
+    Draws one round of malicious-behaviour decisions for every sensor at once.
+
+    A decision is drawn for each sensor whether or not it is active this round,
+    so the stream stays aligned across engines that skip different nodes.
+
+    Args:
+        rng (np.random.Generator): The protocol's random stream.
+        malicious (np.ndarray): Boolean mask of malicious sensors, by sensor index.
+
+    Returns:
+        np.ndarray: Boolean mask of sensors that behave maliciously this round.
+    """
+    return malicious & (rng.random(malicious.size) < config.MALICIOUS_BEHAVIOR_PROB)
+
+def draw_behaviour_rounds(rng: np.random.Generator, malicious: np.ndarray, num_rounds: int) -> np.ndarray:
+    """
+    Draws several consecutive rounds of draw_behaviour in one call.
+
+    The Generator yields the same doubles whether they are drawn round by round
+    or as one block, so row r equals the r-th of num_rounds draw_behaviour calls.
+
+    Returns:
+        np.ndarray: (num_rounds, num_sensors) boolean behaviour masks.
+    """
+    return malicious & (rng.random((num_rounds, malicious.size)) < config.MALICIOUS_BEHAVIOR_PROB)
+
+def draw_miners(rng: np.random.Generator, num_active: int, num_miners: int) -> np.ndarray:
+    """
+    Selects the PoW miners for one round without replacement.
+
+    Args:
+        rng (np.random.Generator): The protocol's random stream.
+        num_active (int): Number of active nodes to choose from.
+        num_miners (int): Number of miners to select.
+
+    Returns:
+        np.ndarray: Indices into the list of active nodes.
+    """
+    return rng.choice(num_active, size=num_miners, replace=False)
\ No newline at end of file
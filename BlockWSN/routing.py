@@ -0,0 +1,221 @@
+# BlockWSN/routing.py
+"""
+Multi-hop routing of sensor packets to the gateways over the range graph.
+
+In the "multihop" ROUTING_MODE a sensor no longer transmits straight to its
+nearest gateway. Its packet is relayed hop by hop along the shortest path
+(by edge weight) to the closest active gateway. The paths form a forest rooted
+at the gateways, computed with a single multi-source Dijkstra. Every relay
+pays to receive and retransmit the packets of its subtree.
+
+The forest is kept across rounds. When nodes run out of energy, only the
+subtrees hanging below them are re-routed, with a Dijkstra restricted to those
+nodes and seeded from the intact part of the forest around them.
+"""
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from .csr_graph import CSRGraph
+from .energy_trust import compute_energy_tx, compute_energy_rx
+
+def adjacency_matrix(G: nx.Graph | CSRGraph) -> sparse.csr_matrix:
+    """
+    Returns the weighted adjacency of a network graph in node-id order.
+
+    Args:
+        G (nx.Graph | CSRGraph): A graph created by initialize_graph or
+            initialize_csr_graph.
+
+    Returns:
+        sparse.csr_matrix: Edge lengths, sensors first and gateways after them.
+    """
+    if isinstance(G, CSRGraph):
+        n = G.number_of_nodes()
+        return sparse.csr_matrix((G.weights.astype(np.float64), G.indices, G.indptr), shape=(n, n))
+    num_sensors = sum(1 for n in G.nodes if n.startswith("S"))
+    num_gateways = G.number_of_nodes() - num_sensors
+    names = [f"S{i}" for i in range(num_sensors)] + [f"G{i}" for i in range(num_gateways)]
+    return sparse.csr_matrix(nx.to_scipy_sparse_array(G, nodelist=names, weight="weight", format="csr"))
+
+class RoutingForest:
+    """
+    Shortest-path forest from every sensor to its closest active gateway.
+
+    Args:
+        adjacency (sparse.csr_matrix): Weighted adjacency in node-id order.
+        num_sensors (int): Number of sensors; the remaining nodes are gateways.
+
+    Attributes:
+        parent (np.ndarray): Next hop of each node towards its gateway, -1 for
+            gateways and unreachable or dead nodes.
+        root (np.ndarray): Node id of the gateway each node routes to, or -1.
+        dist (np.ndarray): Path length to that gateway (inf if unreachable).
+        hop (np.ndarray): Length of the edge to the parent.
+    """
+
+    def __init__(self, adjacency: sparse.csr_matrix, num_sensors: int):
+        self.adjacency = adjacency
+        self.num_sensors = num_sensors
+        n = adjacency.shape[0]
+        self.alive = None
+        self.parent = np.full(n, -1, dtype=np.intp)
+        self.root = np.full(n, -1, dtype=np.intp)
+        self.dist = np.full(n, np.inf)
+        self.hop = np.zeros(n)
+        self._levels = []
+        self._costs = None
+
+    @classmethod
+    def from_graph(cls, G: nx.Graph | CSRGraph) -> "RoutingForest":
+        """Builds an (empty) forest over the range edges of a network graph."""
+        adjacency = adjacency_matrix(G)
+        num_sensors = G.num_sensors if isinstance(G, CSRGraph) else sum(1 for n in G.nodes if n.startswith("S"))
+        return cls(adjacency, num_sensors)
+
+    @property
+    def num_gateways(self) -> int:
+        return self.adjacency.shape[0] - self.num_sensors
+
+    def set_adjacency(self, adjacency: sparse.csr_matrix) -> None:
+        """Replaces the range edges, e.g. after nodes moved; the next update rebuilds the forest."""
+        self.adjacency = adjacency
+        self.alive = None
+
+    def _shortest_paths(self, nodes: np.ndarray, seeds: np.ndarray, seed_dist: np.ndarray) -> None:
+        """
+        Routes the given nodes from a set of seed nodes with known distances.
+
+        A virtual source is linked to every seed with the seed's distance (plus
+        a constant, since csgraph drops zero-weight edges), so one Dijkstra run
+        over the nodes and seeds gives each node its best path through the seeds.
+        """
+        sub = np.concatenate((nodes, seeds))
+        k = len(sub)
+        graph = self.adjacency[sub][:, sub]
+        links = sparse.csr_matrix((seed_dist + 1.0, (np.zeros(len(seeds), dtype=np.intp), np.arange(len(nodes), k))),
+                                  shape=(1, k))
+        graph = sparse.hstack([sparse.vstack([graph, links]), sparse.csr_matrix((k + 1, 1))], format="csr")
+        _, pred = csgraph.dijkstra(graph, indices=k, return_predecessors=True)
+
+        pred = pred[:len(nodes)]
+        reached = pred >= 0
+        self.parent[nodes] = -1
+        self.root[nodes] = -1
+        self.dist[nodes] = np.inf
+        self.hop[nodes] = 0.0
+        self.parent[nodes[reached]] = sub[pred[reached]]
+
+        # Fill in distances and roots parents-first; recomputing dist from the
+        # parent keeps it identical to an accumulation along the path.
+        order = nodes[reached]
+        pending = np.zeros(len(self.parent), dtype=bool)
+        pending[order] = True
+        while order.size:
+            ready = ~pending[self.parent[order]]
+            batch = order[ready]
+            p = self.parent[batch]
+            self.hop[batch] = np.asarray(self.adjacency[batch, p]).ravel()
+            self.dist[batch] = self.dist[p] + self.hop[batch]
+            self.root[batch] = self.root[p]
+            pending[batch] = False
+            order = order[~ready]
+
+    def _rebuild_levels(self) -> None:
+        """Groups the routed nodes by hop depth, gateways first."""
+        n = len(self.parent)
+        frontier = np.flatnonzero(self.root == np.arange(n))
+        levels = []
+        in_frontier = np.zeros(n, dtype=bool)
+        has_parent = self.parent >= 0
+        while frontier.size:
+            levels.append(frontier)
+            in_frontier[:] = False
+            in_frontier[frontier] = True
+            frontier = np.flatnonzero(has_parent & in_frontier[np.where(has_parent, self.parent, 0)])
+        self._levels = levels
+        self._costs = None
+
+    def build(self, alive: np.ndarray) -> None:
+        """Computes the forest from scratch over the alive nodes."""
+        self.alive = alive.copy()
+        gateways = np.flatnonzero(alive[self.num_sensors:]) + self.num_sensors
+        self.parent[:] = -1
+        self.root[:] = -1
+        self.dist[:] = np.inf
+        self.hop[:] = 0.0
+        self.root[gateways] = gateways
+        self.dist[gateways] = 0.0
+        sensors = np.flatnonzero(alive[:self.num_sensors])
+        if gateways.size and sensors.size:
+            self._shortest_paths(sensors, gateways, np.zeros(len(gateways)))
+        self._rebuild_levels()
+
+    def update(self, alive: np.ndarray) -> int:
+        """
+        Brings the forest up to date after nodes have died.
+
+        Only the nodes whose path ran through a node that died are re-routed.
+
+        Args:
+            alive (np.ndarray): Boolean mask over all nodes with energy left.
+
+        Returns:
+            int: The number of sensors that were re-routed.
+        """
+        if self.alive is None or (alive & ~self.alive).any():
+            # First call, or a node came back: nothing to repair incrementally.
+            self.build(alive)
+            return int(alive[:self.num_sensors].sum())
+        died = self.alive & ~alive
+        if not died.any():
+            return 0
+        self.alive = alive.copy()
+
+        affected = died.copy()
+        for level in self._levels[1:]:
+            affected[level] |= affected[self.parent[level]]
+        gone = np.flatnonzero(died)
+        self.parent[gone] = -1
+        self.root[gone] = -1
+        self.dist[gone] = np.inf
+        self.hop[gone] = 0.0
+
+        nodes = np.flatnonzero(affected & alive)
+        nodes = nodes[nodes < self.num_sensors]
+        if nodes.size:
+            neighbours = np.unique(self.adjacency[nodes].indices)
+            seeds = neighbours[alive[neighbours] & ~affected[neighbours] & np.isfinite(self.dist[neighbours])]
+            self._shortest_paths(nodes, seeds, self.dist[seeds])
+        self._rebuild_levels()
+        return int(nodes.size)
+
+    def labels(self) -> np.ndarray:
+        """Gateway index (0..NUM_GATEWAYS-1) each sensor routes to, or -1."""
+        root = self.root[:self.num_sensors]
+        return np.where(root >= 0, root - self.num_sensors, -1)
+
+    def path_lengths(self) -> np.ndarray:
+        """Total path length from each sensor to its gateway."""
+        return self.dist[:self.num_sensors]
+
+    def relay_loads(self) -> np.ndarray:
+        """Number of other sensors' packets each node forwards per round."""
+        load = np.zeros(len(self.parent), dtype=np.int64)
+        for level in reversed(self._levels[1:]):
+            np.add.at(load, self.parent[level], load[level] + 1)
+        return load
+
+    def costs(self) -> np.ndarray:
+        """
+        Per-sensor energy cost of one round of multi-hop delivery.
+
+        A sensor transmits its own packet and every packet of its subtree over
+        the hop to its parent, and receives each packet of its subtree.
+        """
+        if self._costs is None:
+            load = self.relay_loads()[:self.num_sensors]
+            hop = self.hop[:self.num_sensors]
+            self._costs = compute_energy_tx(hop) * (1 + load) + compute_energy_rx() * load
+        return self._costs
\ No newline at end of file
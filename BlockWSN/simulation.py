@@ -4,144 +4,381 @@ Core simulation logic for SecureSenseChain, PoW, and LEACH protocols.
 """
 
 import numpy as np
-import time
 import networkx as nx
 from . import config
-from .energy_trust import compute_energy_tx, compute_energy_agg, update_trust
-from .graph_utils import form_clusters
+from .energy_trust import compute_energy_tx, compute_energy_agg, TrustModel, DynamicTrustModel, FixedTrustModel
+from .graph_utils import ClusterIndex, NodeStateIndex, cluster_reserve
 from .consensus import hdpoa_consensus
+from .events import round_latency, pow_latency
+from .routing import RoutingForest
+from .rng import protocol_rng, draw_behaviour, draw_miners
+from .instrumentation import NULL_TIMER, PhaseTimer
+from .ledger import BlockAssembler, Ledger, Transaction
+from .mobility import MobileNetwork
 
 SimResults = tuple[list[float], list[float], list[float], list[float]]
 
-def securesensechain(G: nx.Graph) -> SimResults:
-    """Simulates the SecureSenseChain protocol."""
+def _sensor_malicious(G: nx.Graph, cluster_index: ClusterIndex) -> tuple[dict, np.ndarray]:
+    """Returns the sensor -> index mapping and the malicious mask in index order."""
+    slots = {s: i for i, s in enumerate(cluster_index.sensor_ids)}
+    malicious = np.array([G.nodes[s]["malicious"] for s in cluster_index.sensor_ids], dtype=bool)
+    return slots, malicious
+
+def _pad_depleted(results: tuple[list, ...], values: tuple) -> None:
+    """Fills the rounds left after the network was depleted with the values each of them would record."""
+    remaining = config.MAX_ROUNDS - len(results[0])
+    for series, value in zip(results, values):
+        series.extend([value] * remaining)
+
+def _move_sensors(G: nx.Graph, network: MobileNetwork, cluster_index: ClusterIndex,
+                  forest: RoutingForest | None, current_round: int) -> None:
+    """
+    Moves the mobile sensors for one round and updates their positions, cluster assignment and routes.
+
+    Only node positions are written to G; its edges keep the initial topology
+    and are not read once sensors move. The forest gets the network's current
+    adjacency and recomputes all routes in its next update.
+    """
+    moved = network.step(current_round)
+    if not len(moved):
+        return
+    pos = network.pos[moved]
+    nodes = G.nodes
+    for s, xy in zip(moved.tolist(), pos.tolist()):
+        nodes[cluster_index.sensor_ids[s]]["pos"] = tuple(xy)
+    cluster_index.move(moved, pos)
+    if forest is not None:
+        forest.set_adjacency(network.adjacency())
+
+def _active_clusters(cluster_index: ClusterIndex, node_index: NodeStateIndex) -> dict:
+    """Forms this round's clusters, keeping only non-empty clusters of active gateways."""
+    gateway_alive = node_index.gateway_alive
+    cluster_index.assign(node_index.sensor_alive, gateway_alive)
+    return {gateway: sensors for alive, (gateway, sensors) in zip(gateway_alive.tolist(), cluster_index.clusters().items())
+            if sensors and alive}
+
+def _routed_clusters(cluster_index: ClusterIndex, node_index: NodeStateIndex, forest: RoutingForest) -> dict:
+    """Multi-hop counterpart of _active_clusters: each sensor joins the gateway its route ends at."""
+    forest.update(node_index.alive)
+    clusters = {gw: [] for gw in cluster_index.gateway_ids}
+    labels = forest.labels()
+    for s in np.flatnonzero(labels >= 0).tolist():
+        clusters[cluster_index.gateway_ids[labels[s]]].append(cluster_index.sensor_ids[s])
+    return {gateway: sensors for gateway, sensors in clusters.items() if sensors}
+
+def _charge_aggregation(G: nx.Graph, clusters: dict) -> float:
+    """Charges each cluster head for aggregating its members' packets."""
+    energy = 0
+    for gateway, sensors in clusters.items():
+        agg_energy = compute_energy_agg(len(sensors))
+        if G.nodes[gateway]["energy"] > agg_energy:
+            G.nodes[gateway]["energy"] -= agg_energy
+            energy += agg_energy
+    return energy
+
+def _charge_transmission(G: nx.Graph, clusters: dict) -> tuple[float, dict, list]:
+    """
+    Charges every active cluster member for sending one packet to its gateway.
+
+    Returns:
+        tuple: The energy spent, per gateway the distances of the members that
+        transmitted, for the latency model, and the (sensor, gateway) pairs of
+        those members.
+    """
+    energy = 0
+    cluster_distances = {}
+    senders = []
+    for gateway, sensors in clusters.items():
+        gateway_pos = np.array(G.nodes[gateway]["pos"])
+        distances = cluster_distances[gateway] = []
+        for sensor in sensors:
+            node_data = G.nodes[sensor]
+            if node_data["energy"] <= 0:
+                continue
+
+            dist = np.linalg.norm(np.array(node_data["pos"]) - gateway_pos)
+            tx_energy = compute_energy_tx(dist)
+            if node_data["energy"] > tx_energy:
+                node_data["energy"] -= tx_energy
+                energy += tx_energy
+                distances.append(dist)
+                senders.append((sensor, gateway))
+    return energy, cluster_distances, senders
+
+def _charge_relaying(G: nx.Graph, clusters: dict, forest: RoutingForest, sensor_slots: dict,
+                     node_index: NodeStateIndex) -> tuple[float, dict, list]:
+    """
+    Charges every routed sensor for sending its own packet and relaying those of its subtree.
+
+    A sensor that cannot afford its share spends what it has left and drops out;
+    the routing forest is repaired around it at the start of the next round.
+
+    Returns:
+        tuple: The energy spent, per gateway the path lengths of the members
+        that transmitted, for the latency model, and the (sensor, gateway)
+        pairs of those members.
+    """
+    energy = 0
+    cluster_distances = {}
+    senders = []
+    drained = []
+    costs, path_lengths = forest.costs(), forest.path_lengths()
+    for gateway, sensors in clusters.items():
+        distances = cluster_distances[gateway] = []
+        for sensor in sensors:
+            node_data = G.nodes[sensor]
+            if node_data["energy"] <= 0:
+                continue
+
+            slot = sensor_slots[sensor]
+            cost = costs[slot]
+            if node_data["energy"] > cost:
+                node_data["energy"] -= cost
+                energy += cost
+            else:
+                energy += node_data["energy"]
+                node_data["energy"] = 0.0
+                drained.append(slot)
+            distances.append(path_lengths[slot])
+            senders.append((sensor, gateway))
+    node_index.record_energy(np.array(drained, dtype=np.intp), np.zeros(len(drained)))
+    return energy, cluster_distances, senders
+
+def _record_gateways(G: nx.Graph, cluster_index: ClusterIndex, node_index: NodeStateIndex) -> None:
+    """Reports the gateways' energy, spent on aggregation and consensus, to the node index."""
+    node_index.record_energy(node_index.gateways, np.array([G.nodes[g]["energy"] for g in cluster_index.gateway_ids]))
+
+def _update_trust(G: nx.Graph, sensor_ids: list, labels: np.ndarray, sensor_malicious: np.ndarray,
+                  behaves: np.ndarray, trust_model: TrustModel, node_index: NodeStateIndex,
+                  current_round: int) -> int:
+    """
+    Applies one round of the trust model to every active cluster member.
+
+    Members are read off the cluster labels, which are indexed by sensor, so
+    they are updated in node id order without sorting and the node index
+    accumulates its benign trust sum in the same order as the array engine.
+
+    Returns:
+        int: The number of malicious members whose trust is now below the
+        model's detection threshold.
+    """
+    nodes = G.nodes
+    slots = [s for s in np.flatnonzero(labels >= 0).tolist() if nodes[sensor_ids[s]]["energy"] > 0]
+    if not slots:
+        return 0
+    rated = [nodes[sensor_ids[s]] for s in slots]
+    slots = np.array(slots)
+    malicious = sensor_malicious[slots]
+    trust = trust_model.update(np.array([d["trust"] for d in rated]), trust_model.reputation(behaves[slots]),
+                               malicious, np.array([d["energy"] for d in rated]), current_round)
+    for node_data, value in zip(rated, trust.tolist()):
+        node_data["trust"] = value
+    node_index.record_trust(slots, trust)
+    return int(np.count_nonzero(malicious & (trust < trust_model.detection_threshold)))
+
+def securesensechain(G: nx.Graph, rng: np.random.Generator | None = None,
+                     timer: PhaseTimer | None = None, ledger: Ledger | None = None,
+                     mobility: MobileNetwork | None = None) -> SimResults:
+    """
+    Simulates the SecureSenseChain protocol.
+
+    Args:
+        G (nx.Graph): The network graph; it is modified in place.
+        rng (np.random.Generator, optional): The random stream for this run,
+            defaults to protocol_rng(0, "ssc").
+        timer (PhaseTimer, optional): Collects per-phase timings; disabled by default.
+        ledger (Ledger, optional): If given, every delivered reading, i.e. every
+            packet a member paid to transmit, is recorded as a transaction and
+            sealed into this chain in consensus rounds.
+        mobility (MobileNetwork, optional): Moves the sensors at the start of
+            every round; the topology is static by default.
+    """
+    if rng is None:
+        rng = protocol_rng(0, "ssc")
+    if timer is None:
+        timer = NULL_TIMER
     energy_consumed, latencies, trust_accuracies, detection_rates = [], [], [], []
     total_malicious = sum(1 for n, d in G.nodes(data=True) if d.get('malicious', False))
+    cluster_index = ClusterIndex.from_graph(G)
+    sensor_slots, sensor_malicious = _sensor_malicious(G, cluster_index)
+    node_index = NodeStateIndex.from_graph(G, cluster_reserve(cluster_index, config.ENERGY_CONSENSUS_VALIDATOR))
+    trust_model = DynamicTrustModel()
+    forest = RoutingForest.from_graph(G) if config.ROUTING_MODE == "multihop" else None
+    assembler = BlockAssembler(ledger) if ledger is not None else None
+    gateway_slots = {g: i for i, g in enumerate(cluster_index.gateway_ids)}
     
     for r in range(config.MAX_ROUNDS):
-        start_time = time.time()
+        if node_index.depleted:
+            break
+        if mobility is not None:
+            with timer.phase("mobility"):
+                _move_sensors(G, mobility, cluster_index, forest, r)
         round_energy = 0
-        correctly_detected = 0
-        clusters = form_clusters(G)
-        
-        for gateway, sensors in clusters.items():
-            if not sensors or G.nodes[gateway]["energy"] <= 0:
-                continue
+        with timer.phase("clustering"):
+            if forest is None:
+                clusters = _active_clusters(cluster_index, node_index)
+                labels = cluster_index.labels
+            else:
+                clusters = _routed_clusters(cluster_index, node_index, forest)
+                labels = forest.labels()
 
-            agg_energy = compute_energy_agg(len(sensors))
-            if G.nodes[gateway]["energy"] > agg_energy:
-                G.nodes[gateway]["energy"] -= agg_energy
-                round_energy += agg_energy
-
-            for sensor in sensors:
-                if G.nodes[sensor]["energy"] <= 0:
-                    continue
-                
-                dist = np.linalg.norm(np.array(G.nodes[sensor]["pos"]) - np.array(G.nodes[gateway]["pos"]))
-                tx_energy = compute_energy_tx(dist)
-                if G.nodes[sensor]["energy"] > tx_energy:
-                    G.nodes[sensor]["energy"] -= tx_energy
-                    round_energy += tx_energy
-
-                node_data = G.nodes[sensor]
-                is_malicious = node_data["malicious"]
-                behaves_maliciously = is_malicious and (np.random.rand() < config.MALICIOUS_BEHAVIOR_PROB)
-                
-                reputation = config.REPUTATION_PENALTY if behaves_maliciously else config.REPUTATION_REWARD
-                node_data["trust"] = update_trust(node_data, reputation, node_data["trust"], r)
-                
-                if node_data["trust"] < config.TRUST_THRESHOLD and is_malicious:
-                    correctly_detected += 1
-        
-        if r % 10 == 0:
-            trusted_validators = hdpoa_consensus(G)
-            for validator in trusted_validators:
-                if G.nodes[validator]["energy"] > config.ENERGY_CONSENSUS_VALIDATOR:
-                    G.nodes[validator]["energy"] -= config.ENERGY_CONSENSUS_VALIDATOR
-                    round_energy += config.ENERGY_CONSENSUS_VALIDATOR
-
-        latency = time.time() - start_time + 0.00085
-        energy_consumed.append(round_energy)
-        latencies.append(latency)
-        non_malicious_trusts = [d["trust"] for n, d in G.nodes(data=True) if not d["malicious"] and n.startswith("S")]
-        trust_accuracies.append(np.mean(non_malicious_trusts) if non_malicious_trusts else 0)
-        detection_rates.append(correctly_detected / max(total_malicious, 1))
+        with timer.phase("aggregation"):
+            round_energy += _charge_aggregation(G, clusters)
+
+        with timer.phase("transmission"):
+            if forest is None:
+                tx_energy, cluster_distances, senders = _charge_transmission(G, clusters)
+            else:
+                tx_energy, cluster_distances, senders = _charge_relaying(G, clusters, forest, sensor_slots, node_index)
+            round_energy += tx_energy
+
+        with timer.phase("trust_update"):
+            behaves = draw_behaviour(rng, sensor_malicious)
+            correctly_detected = _update_trust(G, cluster_index.sensor_ids, labels, sensor_malicious, behaves, trust_model,
+                                               node_index, r)
+
+        if assembler is not None:
+            with timer.phase("ledger"):
+                for sensor, gateway in senders:
+                    slot = sensor_slots[sensor]
+                    assembler.submit(Transaction(slot, gateway_slots[gateway], r, bool(behaves[slot])))
         
+        num_validators = 0
+        if r % config.BLOCK_INTERVAL == 0:
+            with timer.phase("consensus"):
+                trusted_validators = hdpoa_consensus(G)
+                signers = []
+                for validator in trusted_validators:
+                    if G.nodes[validator]["energy"] > config.ENERGY_CONSENSUS_VALIDATOR:
+                        G.nodes[validator]["energy"] -= config.ENERGY_CONSENSUS_VALIDATOR
+                        round_energy += config.ENERGY_CONSENSUS_VALIDATOR
+                        signers.append(gateway_slots[validator])
+                num_validators = len(signers)
+            if assembler is not None:
+                with timer.phase("ledger"):
+                    assembler.seal(r, signers)
+        _record_gateways(G, cluster_index, node_index)
+
+        with timer.phase("metrics"):
+            latency = round_latency(cluster_distances, num_validators, config.SSC_PROCESSING_DELAY)
+            energy_consumed.append(round_energy)
+            latencies.append(latency)
+            trust_accuracies.append(node_index.benign_trust_mean())
+            detection_rates.append(correctly_detected / max(total_malicious, 1))
+
+    _pad_depleted((energy_consumed, latencies, trust_accuracies, detection_rates),
+                  (0, round_latency({}, 0, config.SSC_PROCESSING_DELAY), node_index.benign_trust_mean(), 0.0))
     return energy_consumed, latencies, trust_accuracies, detection_rates
 
-def pow_simulation(G: nx.Graph) -> SimResults:
-    """Simulates a simplified PoW baseline protocol."""
+def pow_simulation(G: nx.Graph, rng: np.random.Generator | None = None,
+                   timer: PhaseTimer | None = None) -> SimResults:
+    """
+    Simulates a simplified PoW baseline protocol.
+
+    Args:
+        G (nx.Graph): The network graph; it is modified in place.
+        rng (np.random.Generator, optional): The random stream for this run,
+            defaults to protocol_rng(0, "pow").
+        timer (PhaseTimer, optional): Collects per-phase timings; disabled by default.
+    """
+    if rng is None:
+        rng = protocol_rng(0, "pow")
+    if timer is None:
+        timer = NULL_TIMER
     energy_consumed, latencies = [], []
+    mining_energy = compute_energy_tx(config.AREA_SIZE / 2) * config.POW_ENERGY_INTENSITY_FACTOR
+    # Once no node can afford to mine, every remaining round is empty.
+    node_index = NodeStateIndex.from_graph(G, mining_energy)
     
     for r in range(config.MAX_ROUNDS):
-        start_time = time.time()
+        if node_index.depleted:
+            break
         round_energy = 0
-        active_nodes = [n for n, d in G.nodes(data=True) if d["energy"] > 0]
+        with timer.phase("miner_selection"):
+            active_nodes = node_index.active_ids()
+            num_miners = int(len(active_nodes) * config.POW_MINERS_RATIO)
+            miners = draw_miners(rng, len(active_nodes), max(1, num_miners))
         
-        if not active_nodes:
-            energy_consumed.append(0)
-            latencies.append(time.time() - start_time + 0.05)
-            continue
-            
-        num_miners = int(len(active_nodes) * config.POW_MINERS_RATIO)
-        miners = np.random.choice(active_nodes, size=max(1, num_miners), replace=False)
+        with timer.phase("mining"):
+            miner_ids = [active_nodes[i] for i in miners.tolist()]
+            for node_id in miner_ids:
+                if G.nodes[node_id]["energy"] > mining_energy:
+                    G.nodes[node_id]["energy"] -= mining_energy
+                    round_energy += mining_energy
+            node_index.record_energy(node_index.active()[miners], np.array([G.nodes[n]["energy"] for n in miner_ids]))
         
-        for node_id in miners:
-            mining_energy = compute_energy_tx(config.AREA_SIZE / 2) * config.POW_ENERGY_INTENSITY_FACTOR
-            if G.nodes[node_id]["energy"] > mining_energy:
-                G.nodes[node_id]["energy"] -= mining_energy
-                round_energy += mining_energy
-        
-        latency = time.time() - start_time + 0.05
-        energy_consumed.append(round_energy)
-        latencies.append(latency)
+        with timer.phase("metrics"):
+            energy_consumed.append(round_energy)
+            latencies.append(pow_latency())
 
+    _pad_depleted((energy_consumed, latencies), (0, pow_latency()))
     return energy_consumed, latencies, [0] * config.MAX_ROUNDS, [0] * config.MAX_ROUNDS
 
-def leach_simulation(G: nx.Graph) -> SimResults:
-    """Simulates a LEACH protocol baseline with a simple trust model."""
+def leach_simulation(G: nx.Graph, rng: np.random.Generator | None = None,
+                     timer: PhaseTimer | None = None, mobility: MobileNetwork | None = None) -> SimResults:
+    """
+    Simulates a LEACH protocol baseline with a simple trust model.
+
+    Args:
+        G (nx.Graph): The network graph; it is modified in place.
+        rng (np.random.Generator, optional): The random stream for this run,
+            defaults to protocol_rng(0, "leach").
+        timer (PhaseTimer, optional): Collects per-phase timings; disabled by default.
+        mobility (MobileNetwork, optional): Moves the sensors at the start of
+            every round; the topology is static by default.
+    """
+    if rng is None:
+        rng = protocol_rng(0, "leach")
+    if timer is None:
+        timer = NULL_TIMER
     energy_consumed, latencies, trust_accuracies, detection_rates = [], [], [], []
     total_malicious = sum(1 for n, d in G.nodes(data=True) if d.get('malicious', False))
+    cluster_index = ClusterIndex.from_graph(G)
+    sensor_slots, sensor_malicious = _sensor_malicious(G, cluster_index)
+    # Without active sensors LEACH gateways have nothing left to do.
+    node_index = NodeStateIndex.from_graph(G, cluster_reserve(cluster_index, np.inf))
+    trust_model = FixedTrustModel()
+    forest = RoutingForest.from_graph(G) if config.ROUTING_MODE == "multihop" else None
 
     for r in range(config.MAX_ROUNDS):
-        start_time = time.time()
+        if node_index.depleted:
+            break
+        if mobility is not None:
+            with timer.phase("mobility"):
+                _move_sensors(G, mobility, cluster_index, forest, r)
         round_energy = 0
-        correctly_detected = 0
-        clusters = form_clusters(G)
-        
-        for gateway, sensors in clusters.items():
-            if not sensors or G.nodes[gateway]["energy"] <= 0:
-                continue
+        with timer.phase("clustering"):
+            if forest is None:
+                clusters = _active_clusters(cluster_index, node_index)
+                labels = cluster_index.labels
+            else:
+                clusters = _routed_clusters(cluster_index, node_index, forest)
+                labels = forest.labels()
 
-            agg_energy = compute_energy_agg(len(sensors))
-            if G.nodes[gateway]["energy"] > agg_energy:
-                G.nodes[gateway]["energy"] -= agg_energy
-                round_energy += agg_energy
-
-            for sensor in sensors:
-                if G.nodes[sensor]["energy"] <= 0:
-                    continue
-                
-                dist = np.linalg.norm(np.array(G.nodes[sensor]["pos"]) - np.array(G.nodes[gateway]["pos"]))
-                tx_energy = compute_energy_tx(dist)
-                if G.nodes[sensor]["energy"] > tx_energy:
-                    G.nodes[sensor]["energy"] -= tx_energy
-                    round_energy += tx_energy
-
-                node_data = G.nodes[sensor]
-                is_malicious = node_data["malicious"]
-                behaves_maliciously = is_malicious and (np.random.rand() < config.MALICIOUS_BEHAVIOR_PROB)
-                reputation = 0.2 if behaves_maliciously else 0.8
-                node_data["trust"] = 0.7 * node_data["trust"] + 0.3 * reputation
-                
-                if node_data["trust"] < 0.5 and is_malicious:
-                    correctly_detected += 1
-        
-        latency = time.time() - start_time + 0.005
-        energy_consumed.append(round_energy)
-        latencies.append(latency)
-        non_malicious_trusts = [d["trust"] for n, d in G.nodes(data=True) if not d["malicious"] and n.startswith("S")]
-        trust_accuracies.append(np.mean(non_malicious_trusts) if non_malicious_trusts else 0)
-        detection_rates.append(correctly_detected / max(total_malicious, 1))
+        with timer.phase("aggregation"):
+            round_energy += _charge_aggregation(G, clusters)
+
+        with timer.phase("transmission"):
+            if forest is None:
+                tx_energy, cluster_distances, senders = _charge_transmission(G, clusters)
+            else:
+                tx_energy, cluster_distances, senders = _charge_relaying(G, clusters, forest, sensor_slots, node_index)
+            round_energy += tx_energy
+
+        with timer.phase("trust_update"):
+            behaves = draw_behaviour(rng, sensor_malicious)
+            correctly_detected = _update_trust(G, cluster_index.sensor_ids, labels, sensor_malicious, behaves, trust_model,
+                                               node_index, r)
         
+        _record_gateways(G, cluster_index, node_index)
+
+        with timer.phase("metrics"):
+            latency = round_latency(cluster_distances, 0, config.LEACH_PROCESSING_DELAY)
+            energy_consumed.append(round_energy)
+            latencies.append(latency)
+            trust_accuracies.append(node_index.benign_trust_mean())
+            detection_rates.append(correctly_detected / max(total_malicious, 1))
+
+    _pad_depleted((energy_consumed, latencies, trust_accuracies, detection_rates),
+                  (0, round_latency({}, 0, config.LEACH_PROCESSING_DELAY), node_index.benign_trust_mean(), 0.0))
     return energy_consumed, latencies, trust_accuracies, detection_rates
\ No newline at end of file
@@ -0,0 +1,100 @@
+# BlockWSN/stats.py
+"""
+Streaming, constant-memory aggregation of per-round simulation results.
+
+Runs are folded in one at a time as they finish using Welford's algorithm, so
+memory depends only on MAX_ROUNDS and not on NUM_RUNS.
+"""
+
+import numpy as np
+from scipy import stats
+
+class RunningStats:
+    """Welford running mean and variance of equal-length per-round series."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self._m2 = None
+
+    def add(self, values) -> None:
+        """Folds one run's per-round series into the running statistics."""
+        x = np.asarray(values, dtype=np.float64)
+        if self.mean is None:
+            self.mean = np.zeros_like(x)
+            self._m2 = np.zeros_like(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    def variance(self, ddof: int = 0) -> np.ndarray:
+        """Per-round variance; ddof=0 matches np.var over the stacked runs."""
+        if self.count - ddof <= 0:
+            return np.full_like(self.mean, np.nan)
+        return self._m2 / (self.count - ddof)
+
+    def std(self, ddof: int = 0) -> np.ndarray:
+        """Per-round standard deviation; ddof=0 matches np.std over the stacked runs."""
+        return np.sqrt(self.variance(ddof))
+
+    def ci(self, confidence: float = 0.95) -> np.ndarray:
+        """Per-round half-width of the Student-t confidence interval of the mean."""
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        t = stats.t.ppf(0.5 + confidence / 2, self.count - 1)
+        return t * self.std(ddof=1) / np.sqrt(self.count)
+
+class ResultAggregator:
+    """Running statistics for every (protocol, metric) pair of a simulation campaign."""
+
+    def __init__(self):
+        self._stats = {}
+
+    @classmethod
+    def from_results(cls, all_results: dict) -> "ResultAggregator":
+        """Builds an aggregator from an in-memory all_results dictionary."""
+        aggregator = cls()
+        aggregator.add_results(all_results)
+        return aggregator
+
+    def add_run(self, run_result: dict) -> None:
+        """
+        Folds the results of one run into the aggregate.
+
+        Args:
+            run_result (dict): Per-protocol dictionaries mapping each metric to
+                a per-round series, as returned by main.simulate_run.
+        """
+        for protocol, metrics in run_result.items():
+            for metric, data in metrics.items():
+                self._stats.setdefault((protocol, metric), RunningStats()).add(data)
+
+    def add_results(self, all_results: dict) -> None:
+        """Folds every run of an all_results dictionary into the aggregate."""
+        for protocol, metrics in all_results.items():
+            for metric, runs in metrics.items():
+                for data in runs:
+                    self._stats.setdefault((protocol, metric), RunningStats()).add(data)
+
+    def has(self, protocol: str, metric: str) -> bool:
+        return (protocol, metric) in self._stats
+
+    def count(self, protocol: str, metric: str) -> int:
+        return self._stats[(protocol, metric)].count
+
+    def mean(self, protocol: str, metric: str) -> np.ndarray:
+        return self._stats[(protocol, metric)].mean
+
+    def std(self, protocol: str, metric: str) -> np.ndarray:
+        return self._stats[(protocol, metric)].std()
+
+    def ci(self, protocol: str, metric: str, confidence: float = 0.95) -> np.ndarray:
+        return self._stats[(protocol, metric)].ci(confidence)
+
+    def mean_results(self) -> dict:
+        """Returns the per-round means in the layout expected by create_comparison_table."""
+        mean_results = {}
+        for (protocol, metric), running in self._stats.items():
+            mean_results.setdefault(protocol, {})[metric] = running.mean
+        return mean_results
\ No newline at end of file
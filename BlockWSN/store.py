@@ -0,0 +1,130 @@
+# BlockWSN/store.py
+"""
+On-disk store of finished simulation runs.
+
+Each run's per-round arrays are written as a single .npy file under
+OUTPUT_DIR/runs/<config hash>/ as soon as the run finishes, and a JSON manifest
+keyed by config hash and seed records which runs are complete. A campaign that
+dies part-way can therefore be resumed, and stored runs can be read back
+zero-copy through memory maps without rerunning anything.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from . import config
+
+# Row order of the (protocol, metric) series inside every run file.
+LAYOUT = [
+    ('ssc', 'energy'), ('ssc', 'latency'), ('ssc', 'trust'), ('ssc', 'detection'),
+    ('pow', 'energy'), ('pow', 'latency'),
+    ('leach', 'energy'), ('leach', 'latency'), ('leach', 'trust'), ('leach', 'detection'),
+]
+
+# Settings that do not change the result of an individual run.
+_UNHASHED = {"NUM_RUNS", "OUTPUT_DIR", "PLOT_MAX_POINTS", "LEDGER_ENABLED", "BLOCK_SIZE",
+             "STREAM_HOST", "STREAM_PORT", "STREAM_QUEUE_SIZE", "STREAM_BATCH_SIZE"}
+
+def config_values(overrides: dict | None = None) -> dict:
+    """Returns the simulation parameters defined in config.py, with any overrides in place of their values."""
+    return {k: v for k, v in {**vars(config), **(overrides or {})}.items()
+            if k.isupper() and k not in _UNHASHED and isinstance(v, (int, float, str, bool))}
+
+def config_hash(overrides: dict | None = None) -> str:
+    """Returns a short, stable hash of the parameters that affect a run's results."""
+    payload = json.dumps(config_values(overrides), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+class ResultStore:
+    """
+    Append-only store of per-run results for one configuration.
+
+    Args:
+        root (str): Directory holding the store, normally config.OUTPUT_DIR.
+        key (str, optional): The configuration hash; defaults to config_hash().
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root: str, key: str | None = None):
+        self.root = root
+        self.key = key or config_hash()
+        self.run_dir = os.path.join(root, "runs", self.key)
+        self._manifest_path = os.path.join(root, "runs", self.MANIFEST)
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path):
+            return {}
+        with open(self._manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self) -> None:
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _entry(self) -> dict:
+        return self._manifest.get(self.key, {"config": config_values(), "runs": {}})
+
+    def seeds(self) -> list[int]:
+        """Returns the seeds of all stored runs, in ascending order."""
+        return sorted(int(seed) for seed in self._entry()["runs"])
+
+    def has(self, seed: int) -> bool:
+        return str(seed) in self._entry()["runs"]
+
+    def save(self, seed: int, run_result: dict) -> None:
+        """
+        Writes one finished run and records it in the manifest.
+
+        Args:
+            seed (int): The run's seed.
+            run_result (dict): Per-protocol metric series, as returned by main.simulate_run.
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        data = np.stack([np.asarray(run_result[protocol][metric], dtype=np.float64)
+                         for protocol, metric in LAYOUT])
+        filename = f"run_{seed}.npy"
+        tmp_path = os.path.join(self.run_dir, filename + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp_path, os.path.join(self.run_dir, filename))
+
+        entry = self._entry()
+        entry["runs"][str(seed)] = filename
+        self._manifest[self.key] = entry
+        self._write_manifest()
+
+    def load(self, seed: int) -> dict:
+        """
+        Reads one stored run through a read-only memory map.
+
+        Args:
+            seed (int): The run's seed.
+
+        Returns:
+            dict: Per-protocol metric series, as returned by main.simulate_run.
+        """
+        filename = self._entry()["runs"][str(seed)]
+        data = np.load(os.path.join(self.run_dir, filename), mmap_mode="r")
+        run_result = {}
+        for row, (protocol, metric) in zip(data, LAYOUT):
+            run_result.setdefault(protocol, {})[metric] = row
+        return run_result
+
+    def save_phases(self, seed: int, phases: dict) -> None:
+        """Writes a run's per-phase timing breakdown next to its results."""
+        os.makedirs(self.run_dir, exist_ok=True)
+        with open(os.path.join(self.run_dir, f"run_{seed}.phases.json"), "w") as f:
+            json.dump(phases, f, indent=2)
+
+    def load_phases(self, seed: int) -> dict | None:
+        """Reads a run's per-phase timing breakdown, or None if it was not recorded."""
+        path = os.path.join(self.run_dir, f"run_{seed}.phases.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
\ No newline at end of file
@@ -0,0 +1,508 @@
+# BlockWSN/streaming.py
+"""
+Online trust scoring of a stream of sensor observation records.
+
+Instead of simulating a whole run, the scorer applies SecureSenseChain's trust
+model to observation records as they arrive, from a file or from a local socket
+fed by the replay tool:
+
+    python -m BlockWSN.streaming generate trace.csv --seed 0
+    python -m BlockWSN.streaming score --input trace.csv --seed 0 --output alerts.jsonl
+
+    python -m BlockWSN.streaming score --listen --seed 0
+    python -m BlockWSN.streaming replay trace.csv --rate 50000
+
+Every record is a CSV row "round,sensor,gateway,falsified,energy": a reading of
+the sensor delivered to the gateway in that round, whether it was falsified,
+and the sensor's residual energy. Records are scored against the topology of
+the given seed, which supplies the initial trust, the malicious flags the trust
+model uses, and the gateways for consensus.
+
+The reader, scorer and writer are asyncio tasks joined by bounded queues, so a
+slow stage holds back the stages before it instead of buffering without limit.
+The scorer drains the queued blocks of records into one micro-batch and updates
+its trust with array operations. It raises an alert when a sensor's trust falls
+below TRUST_THRESHOLD, and runs HDPoA consensus whenever the stream enters a
+new BLOCK_INTERVAL. At the end it reports the sustained events/sec and the
+latency from reading a record to scoring it.
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+import warnings
+from typing import NamedTuple
+import networkx as nx
+import numpy as np
+from . import config
+from .consensus import hdpoa_consensus
+from .csr_graph import CSRGraph, initialize_csr_graph
+from .energy_trust import TrustModel, DynamicTrustModel
+from .graph_utils import ClusterIndex, initialize_graph
+from .rng import protocol_rng, draw_behaviour
+from .vectorized import graph_to_arrays
+
+READ_SIZE = 1 << 16  # Bytes read from the source at a time
+MALFORMED = (-1, -1, -1, 0, 0.0)  # Stand-in for a malformed line; the scorer rejects it as an unknown sensor
+
+class RecordBatch(NamedTuple):
+    """Observation records in column form, with the time each one was read."""
+    round: np.ndarray
+    sensor: np.ndarray
+    gateway: np.ndarray
+    falsified: np.ndarray
+    energy: np.ndarray
+    ingest_ns: np.ndarray
+
+def _parse_lines(text: str) -> np.ndarray:
+    """Parses records line by line, replacing every malformed line with MALFORMED."""
+    rows = []
+    for line in text.splitlines():
+        line = line.partition("#")[0].strip()
+        if not line:
+            continue
+        fields = line.split(",")
+        try:
+            row = tuple(float(field) for field in fields)
+        except ValueError:
+            row = MALFORMED
+        rows.append(row if len(row) == 5 else MALFORMED)
+    return np.array(rows, dtype=np.float64).reshape(-1, 5)
+
+def parse_records(data: bytes, ingest_ns: int) -> RecordBatch:
+    """
+    Parses complete lines of observation records.
+
+    A line that does not hold five numeric fields, e.g. a truncated or garbled
+    one, does not stop the stream. It is kept as a record of sensor -1, which
+    TrustScorer.score rejects and counts in num_rejected like any other record
+    naming an unknown sensor.
+
+    Args:
+        data (bytes): Lines of "round,sensor,gateway,falsified,energy"; lines
+            starting with # are ignored.
+        ingest_ns (int): perf_counter_ns at which the lines were read.
+
+    Returns:
+        RecordBatch: The records, in input order.
+    """
+    text = data.decode(errors="replace")
+    try:
+        with warnings.catch_warnings():
+            # A block of comment lines only is not an error.
+            warnings.simplefilter("ignore", UserWarning)
+            rows = np.loadtxt(io.StringIO(text), delimiter=",", comments="#", ndmin=2)
+        if rows.size and rows.shape[1] != 5:
+            raise ValueError(f"Expected 5 fields per record, got {rows.shape[1]}")
+    except ValueError:
+        # Fall back to the slow path only for blocks with malformed lines.
+        rows = _parse_lines(text)
+    if rows.size == 0:
+        rows = np.empty((0, 5))
+    # nan or inf cannot be converted to a round, sensor or gateway.
+    rows[~np.isfinite(rows[:, :3]).all(axis=1)] = MALFORMED
+    return RecordBatch(rows[:, 0].astype(np.int64), rows[:, 1].astype(np.intp), rows[:, 2].astype(np.intp),
+                       rows[:, 3] != 0, rows[:, 4], np.full(len(rows), ingest_ns, dtype=np.int64))
+
+def _concat(batches: list[RecordBatch]) -> RecordBatch:
+    if len(batches) == 1:
+        return batches[0]
+    return RecordBatch(*(np.concatenate(columns) for columns in zip(*batches)))
+
+class TrustScorer:
+    """
+    Trust state of the sensors of one topology, updated record by record.
+
+    Args:
+        G (nx.Graph | CSRGraph): The topology the records come from.
+        trust_model (TrustModel, optional): Defaults to SecureSenseChain's
+            DynamicTrustModel.
+
+    Attributes:
+        trust (np.ndarray): Current trust of every sensor.
+        alerted (np.ndarray): Sensors whose trust is below the detection
+            threshold; a sensor alerts again only after recovering.
+        num_rejected (int): Records dropped for naming an unknown sensor or a
+            negative round, including malformed lines (see parse_records).
+    """
+
+    def __init__(self, G: nx.Graph | CSRGraph, trust_model: TrustModel | None = None):
+        state = graph_to_arrays(G)
+        S = state.num_sensors
+        self.G = G
+        self.trust_model = trust_model or DynamicTrustModel()
+        self.trust = state.trust[:S].copy()
+        self.malicious = state.malicious[:S].copy()
+        self.alerted = np.zeros(S, dtype=bool)
+        self.num_rejected = 0
+        self._block = -1
+
+    def score(self, batch: RecordBatch) -> tuple[RecordBatch, np.ndarray, np.ndarray]:
+        """
+        Folds a micro-batch of records into the sensors' trust.
+
+        The records of one sensor are applied in input order, and records of
+        different sensors are applied together. Rounds past MAX_ROUNDS keep the
+        last weight of the alpha schedule.
+
+        Args:
+            batch (RecordBatch): The records to score.
+
+        Returns:
+            tuple: The accepted records, the trust of each record's sensor once
+            it was applied, and a mask of the records that raised an alert.
+        """
+        valid = (batch.sensor >= 0) & (batch.sensor < len(self.trust)) & (batch.round >= 0)
+        if not valid.all():
+            self.num_rejected += int(np.count_nonzero(~valid))
+            batch = RecordBatch(*(column[valid] for column in batch))
+        n = len(batch.sensor)
+        scores = np.empty(n)
+        alerts = np.zeros(n, dtype=bool)
+        if n == 0:
+            return batch, scores, alerts
+
+        # The k-th records of distinct sensors are independent; update them in
+        # one step per (k, round).
+        order = np.argsort(batch.sensor, kind="stable")
+        sorted_sensors = batch.sensor[order]
+        starts = np.flatnonzero(np.r_[True, sorted_sensors[1:] != sorted_sensors[:-1]])
+        occurrence = np.empty(n, dtype=np.intp)
+        occurrence[order] = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+        rounds = np.minimum(batch.round, config.MAX_ROUNDS - 1)
+        steps = np.lexsort((rounds, occurrence))
+        bounds = np.flatnonzero((np.diff(occurrence[steps]) != 0) | (np.diff(rounds[steps]) != 0)) + 1
+
+        reputation = self.trust_model.reputation(batch.falsified)
+        threshold = self.trust_model.detection_threshold
+        for idx in np.split(steps, bounds):
+            sensors = batch.sensor[idx]
+            trust = self.trust_model.update(self.trust[sensors], reputation[idx], self.malicious[sensors],
+                                            batch.energy[idx], int(rounds[idx[0]]))
+            below = trust < threshold
+            alerts[idx] = below & ~self.alerted[sensors]
+            self.alerted[sensors] = below
+            self.trust[sensors] = trust
+            scores[idx] = trust
+        return batch, scores, alerts
+
+    def consensus(self, rounds: np.ndarray) -> list[tuple[int, list[str]]]:
+        """
+        Runs hdpoa_consensus once for every BLOCK_INTERVAL the stream has entered.
+
+        Args:
+            rounds (np.ndarray): Rounds of the records just scored.
+
+        Returns:
+            list[tuple[int, list[str]]]: The first round of each new interval and
+            its trusted validators.
+        """
+        blocks = np.unique(rounds // config.BLOCK_INTERVAL)
+        blocks = blocks[blocks > self._block]
+        if blocks.size:
+            self._block = int(blocks[-1])
+        return [(int(b) * config.BLOCK_INTERVAL, hdpoa_consensus(self.G)) for b in blocks]
+
+async def _read(read, inbox: asyncio.Queue) -> None:
+    """Puts the complete lines of the source into the queue as RecordBatches, then None."""
+    pending = b""
+    while data := await read(READ_SIZE):
+        ingest_ns = time.perf_counter_ns()
+        data = pending + data
+        end = data.rfind(b"\n") + 1
+        pending = data[end:]
+        if end:
+            await inbox.put(parse_records(data[:end], ingest_ns))
+    if pending.strip():
+        await inbox.put(parse_records(pending, time.perf_counter_ns()))
+    await inbox.put(None)
+
+async def _score(scorer: TrustScorer, inbox: asyncio.Queue, outbox: asyncio.Queue, batch_size: int,
+                 latencies: list[np.ndarray], span: list[int]) -> None:
+    """Scores micro-batches of the queued records until the reader is done."""
+    done = False
+    while not done:
+        batch = await inbox.get()
+        if batch is None:
+            break
+        batches, size = [batch], len(batch.sensor)
+        while size < batch_size and not inbox.empty():
+            batch = inbox.get_nowait()
+            if batch is None:
+                done = True
+                break
+            batches.append(batch)
+            size += len(batch.sensor)
+        batch = _concat(batches)
+        records, scores, alerts = scorer.score(batch)
+        consensus = scorer.consensus(records.round)
+        scored_ns = time.perf_counter_ns()
+        if len(batch.ingest_ns):
+            # The window runs from the first record read to the last record scored.
+            if not span:
+                span.append(int(batch.ingest_ns[0]))
+            span[1:] = [scored_ns]
+        latencies.append(scored_ns - records.ingest_ns)
+        await outbox.put((records, scores, alerts, consensus))
+        # Let the reader and writer run between micro-batches.
+        await asyncio.sleep(0)
+    await outbox.put(None)
+
+async def _write(outbox: asyncio.Queue, out, include_scores: bool, counts: dict) -> None:
+    """Writes the scorer's output as JSON lines until the scorer is done."""
+    while (item := await outbox.get()) is not None:
+        records, scores, alerts, consensus = item
+        lines = []
+        if include_scores:
+            lines.extend(f'{{"event": "trust", "round": {r}, "sensor": {s}, "trust": {t!r}}}\n'
+                         for r, s, t in zip(records.round.tolist(), records.sensor.tolist(), scores.tolist()))
+        for i in np.flatnonzero(alerts).tolist():
+            lines.append(json.dumps({"event": "alert", "round": int(records.round[i]), "sensor": int(records.sensor[i]),
+                                     "gateway": int(records.gateway[i]), "trust": float(scores[i])}) + "\n")
+        for r, validators in consensus:
+            lines.append(json.dumps({"event": "consensus", "round": r, "validators": validators}) + "\n")
+        counts["alerts"] += int(np.count_nonzero(alerts))
+        counts["consensus_rounds"] += len(consensus)
+        if out is not None:
+            out.write("".join(lines))
+
+async def score_stream(read, scorer: TrustScorer, out=None, include_scores: bool = False,
+                       batch_size: int | None = None, queue_size: int | None = None) -> dict:
+    """
+    Scores every record of a stream and reports the throughput and latency.
+
+    Args:
+        read: Coroutine function returning up to n bytes of the stream, and b""
+            at its end, e.g. asyncio.StreamReader.read.
+        scorer (TrustScorer): The trust state to update.
+        out (TextIO, optional): Where to write alerts and consensus rounds as JSON lines.
+        include_scores (bool): Also write the trust score of every record.
+        batch_size (int, optional): Records per micro-batch, defaults to STREAM_BATCH_SIZE.
+        queue_size (int, optional): Capacity of the queues, defaults to STREAM_QUEUE_SIZE.
+
+    Returns:
+        dict: The number of events, alerts and consensus rounds, events per
+        second from the first record read to the last one scored, and the
+        p50, p99 and maximum scoring latency in milliseconds.
+    """
+    inbox = asyncio.Queue(queue_size or config.STREAM_QUEUE_SIZE)
+    outbox = asyncio.Queue(queue_size or config.STREAM_QUEUE_SIZE)
+    latencies, span = [], []
+    counts = {"alerts": 0, "consensus_rounds": 0}
+    tasks = [asyncio.ensure_future(_read(read, inbox)),
+             asyncio.ensure_future(_score(scorer, inbox, outbox, batch_size or config.STREAM_BATCH_SIZE,
+                                          latencies, span)),
+             asyncio.ensure_future(_write(outbox, out, include_scores, counts))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    latency_ms = np.concatenate(latencies) / 1e6 if latencies else np.empty(0)
+    if latency_ms.size == 0:
+        latency_ms = np.zeros(1)
+    seconds = (span[1] - span[0]) / 1e9 if len(span) == 2 else 0.0
+    num_events = sum(len(l) for l in latencies)
+    return {
+        "events": num_events,
+        "rejected": scorer.num_rejected,
+        "alerts": counts["alerts"],
+        "consensus_rounds": counts["consensus_rounds"],
+        "micro_batches": len(latencies),
+        "seconds": seconds,
+        "events_per_second": num_events / seconds if seconds > 0 else 0.0,
+        "latency_p50_ms": float(np.percentile(latency_ms, 50)),
+        "latency_p99_ms": float(np.percentile(latency_ms, 99)),
+        "latency_max_ms": float(latency_ms.max()),
+    }
+
+async def score_file(path: str, scorer: TrustScorer, **kwargs) -> dict:
+    """Scores the records of a trace file; keyword arguments as for score_stream."""
+    with open(path, "rb") as f:
+        async def read(n: int) -> bytes:
+            return f.read(n)
+        return await score_stream(read, scorer, **kwargs)
+
+async def score_socket(scorer: TrustScorer, host: str | None = None, port: int | None = None, **kwargs) -> dict:
+    """
+    Listens on a local socket and scores the records of the first connection.
+
+    Args:
+        scorer (TrustScorer): The trust state to update.
+        host (str, optional): Address to listen on, defaults to STREAM_HOST.
+        port (int, optional): Port to listen on, defaults to STREAM_PORT.
+        **kwargs: Passed on to score_stream.
+
+    Returns:
+        dict: The report of score_stream, once the sender closes the connection.
+    """
+    host, port = host or config.STREAM_HOST, port or config.STREAM_PORT
+    finished = asyncio.get_running_loop().create_future()
+    busy = False
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal busy
+        if busy:
+            # Only one stream is scored; later connections are turned away.
+            writer.close()
+            return
+        busy = True
+        try:
+            finished.set_result(await score_stream(reader.read, scorer, **kwargs))
+        except Exception as e:
+            finished.set_exception(e)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logging.info(f"Listening for records on {host}:{port}")
+    async with server:
+        return await finished
+
+async def replay(path: str, host: str | None = None, port: int | None = None, rate: float = 0.0) -> int:
+    """
+    Sends the records of a trace file to a listening scorer.
+
+    Args:
+        path (str): The trace file.
+        host (str, optional): Address of the scorer, defaults to STREAM_HOST.
+        port (int, optional): Port of the scorer, defaults to STREAM_PORT.
+        rate (float): Records per second to send; 0 sends as fast as the
+            scorer accepts them.
+
+    Returns:
+        int: The number of lines sent.
+    """
+    _, writer = await asyncio.open_connection(host or config.STREAM_HOST, port or config.STREAM_PORT)
+    # Pace in blocks of about a millisecond of records.
+    block_lines = max(1, int(rate // 1000)) if rate > 0 else 1024
+    num_sent = 0
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            while lines := list(itertools.islice(f, block_lines)):
+                writer.write(b"".join(lines))
+                await writer.drain()
+                num_sent += len(lines)
+                if rate > 0:
+                    delay = start + num_sent / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return num_sent
+
+def write_trace(G: nx.Graph | CSRGraph, run: int, path: str, num_rounds: int | None = None) -> int:
+    """
+    Writes the observation records of a SecureSenseChain run in direct mode.
+
+    Every round, each sensor that can still pay for a transmission reports to
+    its nearest gateway. Falsified readings are drawn by draw_behaviour from
+    the run's "ssc" stream.
+
+    Args:
+        G (nx.Graph | CSRGraph): The run's topology.
+        run (int): The run index.
+        path (str): Path of the CSV file.
+        num_rounds (int, optional): Number of rounds, defaults to MAX_ROUNDS.
+
+    Returns:
+        int: The number of records written.
+    """
+    state = graph_to_arrays(G)
+    S = state.num_sensors
+    cluster_index = ClusterIndex(list(range(S)), list(range(state.num_gateways)), state.pos[:S], state.pos[S:])
+    labels = cluster_index.assign(np.ones(S, dtype=bool), np.ones(state.num_gateways, dtype=bool))
+    delta = state.pos[:S] - state.pos[S + np.maximum(labels, 0)]
+    tx_energy = config.E_ELEC * config.PACKET_SIZE + config.E_AMP * config.PACKET_SIZE * np.einsum("ij,ij->i", delta, delta)
+    energy = state.energy[:S].copy()
+    malicious = state.malicious[:S]
+    rng = protocol_rng(run, "ssc")
+
+    num_records = 0
+    with open(path, "w") as f:
+        f.write("# round,sensor,gateway,falsified,energy\n")
+        for r in range(num_rounds or config.MAX_ROUNDS):
+            behaves = draw_behaviour(rng, malicious)
+            reporting = np.flatnonzero((labels >= 0) & (energy > tx_energy))
+            if reporting.size == 0:
+                break
+            energy[reporting] -= tx_energy[reporting]
+            rows = np.column_stack((np.full(reporting.size, r), reporting, labels[reporting],
+                                    behaves[reporting], energy[reporting]))
+            np.savetxt(f, rows, fmt=["%d", "%d", "%d", "%d", "%.17g"], delimiter=",")
+            num_records += reporting.size
+    return num_records
+
+def _topology(seed: int) -> nx.Graph | CSRGraph:
+    return initialize_csr_graph(seed=seed) if config.GRAPH_BACKEND == "csr" else initialize_graph(seed=seed)
+
+def main(argv: list[str] | None = None) -> None:
+    """Parses the command line and dispatches to the requested subcommand."""
+    parser = argparse.ArgumentParser(prog="python -m BlockWSN.streaming", description="Score a stream of sensor records.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="write the observation records of a simulated run")
+    generate_parser.add_argument("path", help="CSV file to write")
+    generate_parser.add_argument("--seed", type=int, default=0, help="run index and topology seed (default: 0)")
+    generate_parser.add_argument("--rounds", type=int, default=config.MAX_ROUNDS,
+                                 help="number of rounds (default: MAX_ROUNDS)")
+
+    replay_parser = subparsers.add_parser("replay", help="send a trace file to a listening scorer")
+    replay_parser.add_argument("path", help="CSV file of records")
+    replay_parser.add_argument("--rate", type=float, default=0.0,
+                               help="records per second; 0 sends as fast as possible (default: 0)")
+    replay_parser.add_argument("--port", type=int, default=config.STREAM_PORT,
+                               help="port of the scorer (default: STREAM_PORT)")
+
+    score_parser = subparsers.add_parser("score", help="score records from a file or a local socket")
+    source = score_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="CSV file of records")
+    source.add_argument("--listen", action="store_true", help="score the records sent to STREAM_HOST:--port")
+    score_parser.add_argument("--port", type=int, default=config.STREAM_PORT,
+                              help="port to listen on (default: STREAM_PORT)")
+    score_parser.add_argument("--seed", type=int, default=0,
+                              help="seed of the topology the records come from (default: 0)")
+    score_parser.add_argument("--output", help="JSON-lines file for alerts and consensus rounds")
+    score_parser.add_argument("--scores", action="store_true", help="also write the trust score of every record")
+    score_parser.add_argument("--batch-size", type=int, default=config.STREAM_BATCH_SIZE,
+                              help="records per micro-batch (default: STREAM_BATCH_SIZE)")
+
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "generate":
+        num_records = write_trace(_topology(args.seed), args.seed, args.path, args.rounds)
+        logging.info(f"Wrote {num_records} records to {args.path}")
+    elif args.command == "replay":
+        start = time.perf_counter()
+        num_sent = asyncio.run(replay(args.path, port=args.port, rate=args.rate))
+        logging.info(f"Sent {num_sent} lines in {time.perf_counter() - start:.2f} s")
+    else:
+        scorer = TrustScorer(_topology(args.seed))
+        if args.output:
+            os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        out = open(args.output, "w") if args.output else None
+        try:
+            kwargs = {"out": out, "include_scores": args.scores, "batch_size": args.batch_size}
+            if args.listen:
+                report = asyncio.run(score_socket(scorer, port=args.port, **kwargs))
+            else:
+                report = asyncio.run(score_file(args.input, scorer, **kwargs))
+        finally:
+            if out is not None:
+                out.close()
+        logging.info(f"Scored {report['events']} events ({report['rejected']} rejected) in {report['seconds']:.2f} s: "
+                     f"{report['events_per_second']:.0f} events/s, latency p50 {report['latency_p50_ms']:.3f} ms, "
+                     f"p99 {report['latency_p99_ms']:.3f} ms; {report['alerts']} alerts, "
+                     f"{report['consensus_rounds']} consensus rounds")
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - [%(levelname)s] - %(message)s')
+    main()
\ No newline at end of file
@@ -0,0 +1,260 @@
+# BlockWSN/sweep.py
+"""
+Parallel parameter sweeps over the simulation settings.
+
+A sweep runs every point of a parameter grid, for example TRUST_THRESHOLD x
+MALICIOUS_PROB x NUM_SENSORS, for a range of seeds:
+
+    python -m BlockWSN.sweep --param TRUST_THRESHOLD=0.5,0.6,0.7 --param MALICIOUS_PROB=0.1,0.2 --runs 10 --workers 8
+
+Each grid point is an immutable SimConfig. A worker applies it to config.py
+for the duration of a task, so the simulation code keeps reading config.X.
+SimConfig is therefore a key and a recipe, not a parameter passed to the
+simulation: applying it, and with it SimConfig.key and run_sweep, rewrites
+the config module globals of the calling process for a while.
+Points that share a seed and topology settings are run in the same task on a
+single memoized topology. Those are points that differ only in protocol or
+trust settings. Every finished (config hash, seed) run is written to the
+ResultStore, and later sweeps load it instead of simulating it again.
+"""
+
+import argparse
+import contextlib
+import csv
+import dataclasses
+import functools
+import itertools
+import logging
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from . import config
+from .config_utils import override_config
+from .csr_graph import initialize_csr_graph
+from .graph_utils import initialize_graph
+from .main import simulate_run
+from .stats import ResultAggregator
+from .store import ResultStore, config_hash
+
+# Settings that determine the topology built by initialize_graph.
+TOPOLOGY_SETTINGS = (
+    "NUM_SENSORS", "NUM_GATEWAYS", "AREA_SIZE", "COMMUNICATION_RANGE", "MALICIOUS_PROB", "MIN_MALICIOUS_NODES",
+    "INITIAL_ENERGY_SENSOR", "INITIAL_ENERGY_GATEWAY", "INITIAL_TRUST_SCORE", "GRAPH_BACKEND",
+)
+
+@dataclasses.dataclass(frozen=True)
+class SimConfig:
+    """
+    Immutable snapshot of the settings in config.py.
+
+    Settings are read as attributes, e.g. sim_config.TRUST_THRESHOLD. Instances
+    are hashable and picklable, so they can key caches and be sent to worker
+    processes.
+
+    Args:
+        settings (tuple): (name, value) pairs, sorted by name.
+    """
+    settings: tuple[tuple[str, int | float | str | bool], ...]
+
+    @classmethod
+    def current(cls, **overrides) -> "SimConfig":
+        """
+        Snapshots config.py, with the given settings replaced.
+
+        Raises:
+            ValueError: If an override does not name a setting of config.py.
+        """
+        values = {name: value for name, value in vars(config).items()
+                  if name.isupper() and isinstance(value, (int, float, str, bool))}
+        unknown = sorted(set(overrides) - set(values))
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+        values.update(overrides)
+        return cls(tuple(sorted(values.items())))
+
+    def __getattr__(self, name: str):
+        if not name.isupper():
+            raise AttributeError(name)
+        for key, value in self.settings:
+            if key == name:
+                return value
+        raise AttributeError(name)
+
+    def replace(self, **overrides) -> "SimConfig":
+        """Returns a copy with the given settings replaced."""
+        values = dict(self.settings)
+        unknown = sorted(set(overrides) - set(values))
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+        values.update(overrides)
+        return SimConfig(tuple(sorted(values.items())))
+
+    def topology_key(self) -> tuple:
+        """The values of TOPOLOGY_SETTINGS; points with equal keys share topologies."""
+        return tuple(getattr(self, name) for name in TOPOLOGY_SETTINGS)
+
+    def key(self) -> str:
+        """The ResultStore key of this configuration, see store.config_hash."""
+        return config_hash(dict(self.settings))
+
+    def applied(self) -> contextlib.AbstractContextManager:
+        """Context manager that applies these settings to config.py."""
+        return override_config(**dict(self.settings))
+
+def grid(base: SimConfig, params: dict[str, list]) -> list[SimConfig]:
+    """
+    Expands a parameter grid into sweep points.
+
+    Args:
+        base (SimConfig): Settings shared by every point.
+        params (dict[str, list]): Values to sweep for each setting.
+
+    Returns:
+        list[SimConfig]: One point per combination, the last parameter varying fastest.
+    """
+    names = list(params)
+    return [base.replace(**dict(zip(names, values))) for values in itertools.product(*params.values())]
+
+@functools.lru_cache(maxsize=8)
+def _topology(topology_key: tuple, seed: int):
+    """Builds the topology for the applied settings; memoized per worker process."""
+    return initialize_csr_graph(seed=seed) if config.GRAPH_BACKEND == "csr" else initialize_graph(seed=seed)
+
+def _run_group(points: list[SimConfig], seed: int) -> list[dict]:
+    """Simulates one seed for points that share their topology settings."""
+    results = []
+    for point in points:
+        # Ledgers are per run index and would collide between points.
+        with point.applied(), override_config(LEDGER_ENABLED=False):
+            G = _topology(point.topology_key(), seed)
+            results.append(simulate_run(seed, G=G))
+    return results
+
+def _store(point: SimConfig, root: str) -> ResultStore:
+    # Opened afresh for every access: each store rewrites the shared manifest.
+    with point.applied():
+        return ResultStore(root)
+
+def run_sweep(points: list[SimConfig], seeds: range, workers: int = 1,
+              root: str | None = None) -> list[ResultAggregator]:
+    """
+    Simulates every point of a sweep for every seed.
+
+    Runs already in the ResultStore are loaded instead of simulated. Pending
+    runs are grouped by seed and topology settings, and each group is one task
+    for the process pool.
+
+    The sweep applies each point to the config module globals of this process
+    while it reads and writes the store (and of the worker while it simulates).
+    It is not re-entrant and not thread-safe: do not run two sweeps, or a sweep
+    and another simulation, concurrently in one process.
+
+    Args:
+        points (list[SimConfig]): The sweep points, e.g. from grid.
+        seeds (range): The seeds (run indices) to simulate for each point.
+        workers (int): Number of worker processes.
+        root (str, optional): Directory of the ResultStore, defaults to OUTPUT_DIR.
+
+    Returns:
+        list[ResultAggregator]: The aggregated results of each point, in order.
+    """
+    from tqdm import tqdm
+
+    root = root or config.OUTPUT_DIR
+    os.makedirs(root, exist_ok=True)
+    groups = {}
+    num_cached = 0
+    for point in dict.fromkeys(points):
+        store = _store(point, root)
+        for seed in seeds:
+            if store.has(seed):
+                num_cached += 1
+            else:
+                groups.setdefault((seed, point.topology_key()), []).append(point)
+    num_pending = sum(len(group) for group in groups.values())
+    logging.info(f"--- Sweep: {len(points)} points x {len(seeds)} seeds, {num_cached} runs cached, "
+                 f"{num_pending} to simulate on {len(groups)} topologies ---")
+
+    tasks = [(group, seed) for (seed, _), group in groups.items()]
+    executor = None
+    if workers > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        group_results = executor.map(_run_group, *zip(*tasks))
+    else:
+        group_results = (_run_group(group, seed) for group, seed in tasks)
+    try:
+        for (group, seed), results in tqdm(zip(tasks, group_results), total=len(tasks), desc="Sweep Progress"):
+            for point, run_result in zip(group, results):
+                _store(point, root).save(seed, run_result)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    aggregators = []
+    for point in points:
+        store = _store(point, root)
+        aggregator = ResultAggregator()
+        for seed in seeds:
+            aggregator.add_run(store.load(seed))
+        aggregators.append(aggregator)
+    return aggregators
+
+def write_summary(points: list[SimConfig], aggregators: list[ResultAggregator], params: list[str], path: str) -> None:
+    """
+    Writes one CSV row per sweep point with its swept settings and averaged metrics.
+
+    Args:
+        points (list[SimConfig]): The sweep points.
+        aggregators (list[ResultAggregator]): Their results, as returned by run_sweep.
+        params (list[str]): The swept settings, written as the leading columns.
+        path (str): Path of the CSV file.
+    """
+    metrics = [("ssc", "energy"), ("ssc", "latency"), ("ssc", "trust"), ("ssc", "detection"),
+               ("pow", "energy"), ("pow", "latency"),
+               ("leach", "energy"), ("leach", "latency"), ("leach", "trust"), ("leach", "detection")]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(params + ["config_hash"] + [f"{protocol}_{metric}" for protocol, metric in metrics])
+        for point, aggregator in zip(points, aggregators):
+            writer.writerow([getattr(point, name) for name in params] + [point.key()]
+                            + [float(np.mean(aggregator.mean(protocol, metric))) for protocol, metric in metrics])
+    logging.info(f"Sweep summary saved to {path}")
+
+def _parse_param(spec: str) -> tuple[str, list]:
+    """Parses NAME=V1,V2,... converting the values to the type of the setting in config.py."""
+    name, sep, values = spec.partition("=")
+    if not sep or not values or not name.isupper() or not hasattr(config, name):
+        raise ValueError(f"Expected NAME=V1,V2,... with NAME a setting of config.py, got {spec!r}")
+    kind = type(getattr(config, name))
+    if kind is bool:
+        convert = lambda v: v.strip().lower() in ("1", "true", "yes")
+    else:
+        convert = lambda v: kind(v.strip())
+    return name, [convert(v) for v in values.split(",")]
+
+def main(argv: list[str] | None = None) -> None:
+    """Parses the command line and runs the sweep."""
+    parser = argparse.ArgumentParser(prog="python -m BlockWSN.sweep", description="Run a parameter sweep.")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="a setting of config.py and the values to sweep; repeat for a grid")
+    parser.add_argument("--runs", type=int, default=config.NUM_RUNS,
+                        help="number of seeds per point (default: NUM_RUNS)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--output", default=os.path.join(config.OUTPUT_DIR, "sweep_results.csv"),
+                        help="path of the CSV summary (default: OUTPUT_DIR/sweep_results.csv)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if not args.param:
+        parser.error("at least one --param is required")
+
+    try:
+        params = dict(_parse_param(spec) for spec in args.param)
+    except ValueError as e:
+        parser.error(str(e))
+    points = grid(SimConfig.current(), params)
+    aggregators = run_sweep(points, range(args.runs), workers=args.workers)
+    write_summary(points, aggregators, list(params), args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
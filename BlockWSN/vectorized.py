@@ -0,0 +1,210 @@
+# BlockWSN/vectorized.py
+"""
+Vectorized struct-of-arrays round engine for the SecureSenseChain and LEACH protocols.
+
+Node state (position, energy, trust and the malicious flag) is held in contiguous
+NumPy arrays indexed by integer node id, with sensors occupying ids
+0..NUM_SENSORS-1 and gateways the ids that follow. Each round is advanced with
+whole-array operations instead of per-node dictionary access, while returning
+the same SimResults tuple as the graph-based functions in simulation.py.
+"""
+
+import numpy as np
+import networkx as nx
+from . import config
+from .csr_graph import CSRGraph
+from .energy_trust import TrustModel, DynamicTrustModel, FixedTrustModel
+from .graph_utils import ClusterIndex, NodeStateIndex, cluster_reserve
+from .events import round_latency_arrays
+from .rng import protocol_rng, draw_behaviour
+from .routing import RoutingForest
+from .instrumentation import NULL_TIMER, PhaseTimer
+from .ledger import BlockAssembler, Ledger, Transaction
+from .mobility import MobileNetwork
+from .simulation import SimResults
+
+class NodeArrays:
+    """Contiguous per-node state arrays for one simulation run."""
+
+    def __init__(self, pos: np.ndarray, energy: np.ndarray, trust: np.ndarray,
+                 malicious: np.ndarray, num_sensors: int):
+        self.pos = pos
+        self.energy = energy
+        self.trust = trust
+        self.malicious = malicious
+        self.num_sensors = num_sensors
+
+    @property
+    def num_gateways(self) -> int:
+        return self.energy.shape[-1] - self.num_sensors
+
+def graph_to_arrays(G: nx.Graph | CSRGraph) -> NodeArrays:
+    """
+    Copies the node attributes of a network graph into contiguous arrays.
+
+    Args:
+        G (nx.Graph | CSRGraph): A network graph created by initialize_graph
+            or initialize_csr_graph.
+
+    Returns:
+        NodeArrays: The node state, sensors first and gateways after them.
+    """
+    if isinstance(G, CSRGraph):
+        return NodeArrays(G.pos.copy(), G.energy.copy(), G.trust.copy(), G.malicious.copy(), G.num_sensors)
+    node_ids = [f"S{i}" for i in range(config.NUM_SENSORS)] + [f"G{i}" for i in range(config.NUM_GATEWAYS)]
+    nodes = [G.nodes[n] for n in node_ids]
+    return NodeArrays(
+        pos=np.array([d["pos"] for d in nodes], dtype=np.float64),
+        energy=np.array([d["energy"] for d in nodes], dtype=np.float64),
+        trust=np.array([d["trust"] for d in nodes], dtype=np.float64),
+        malicious=np.array([d["malicious"] for d in nodes], dtype=bool),
+        num_sensors=config.NUM_SENSORS,
+    )
+
+def _run_rounds(state: NodeArrays, rng: np.random.Generator, trust_model: TrustModel,
+                with_consensus: bool, processing_delay: float, timer: PhaseTimer,
+                forest: RoutingForest | None = None, ledger: Ledger | None = None,
+                mobility: MobileNetwork | None = None) -> SimResults:
+    """
+    Runs MAX_ROUNDS of a cluster-based protocol over the array state.
+
+    Packets are routed multi-hop if a forest is given, and sensors move at the
+    start of every round if a mobile network is given.
+    """
+    S = state.num_sensors
+    energy, trust, malicious = state.energy, state.trust, state.malicious
+    sensor_malicious = malicious[:S]
+    total_malicious = int(malicious.sum())
+    tx_fixed = config.E_ELEC * config.PACKET_SIZE
+    tx_amp = config.E_AMP * config.PACKET_SIZE
+
+    energy_consumed = np.zeros(config.MAX_ROUNDS)
+    latencies = np.zeros(config.MAX_ROUNDS)
+    trust_accuracies = np.zeros(config.MAX_ROUNDS)
+    detection_rates = np.zeros(config.MAX_ROUNDS)
+    cluster_index = ClusterIndex(list(range(S)), list(range(state.num_gateways)), state.pos[:S], state.pos[S:])
+    gateway_reserve = config.ENERGY_CONSENSUS_VALIDATOR if with_consensus else np.inf
+    node_index = NodeStateIndex(list(range(len(energy))), energy, trust, malicious, S,
+                                cluster_reserve(cluster_index, gateway_reserve))
+    assembler = BlockAssembler(ledger) if ledger is not None else None
+
+    for r in range(config.MAX_ROUNDS):
+        if node_index.depleted:
+            # Nothing can change any more: every remaining round is empty.
+            energy_consumed[r:] = 0.0
+            latencies[r:] = round_latency_arrays(np.empty(0, dtype=np.intp), np.empty(0), state.num_gateways, 0,
+                                                 processing_delay)
+            trust_accuracies[r:] = node_index.benign_trust_mean()
+            detection_rates[r:] = 0.0
+            break
+        if mobility is not None:
+            with timer.phase("mobility"):
+                moved = mobility.step(r)
+                if moved.size:
+                    state.pos[moved] = mobility.pos[moved]
+                    cluster_index.move(moved, state.pos[moved])
+                    if forest is not None:
+                        forest.set_adjacency(mobility.adjacency())
+        round_energy = 0.0
+        correctly_detected = 0
+        num_validators = 0
+        senders = np.empty(0, dtype=np.intp)
+        tx_labels, tx_dist = np.empty(0, dtype=np.intp), np.empty(0)
+        with timer.phase("clustering"):
+            if forest is None:
+                labels = cluster_index.assign(node_index.sensor_alive, node_index.gateway_alive)
+            else:
+                forest.update(node_index.alive)
+                labels = forest.labels()
+            members = np.flatnonzero(labels >= 0)
+
+        if members.size:
+            with timer.phase("aggregation"):
+                gw_energy = energy[S:]
+                counts = np.bincount(labels[members], minlength=state.num_gateways)
+                agg_energy = counts * config.E_DA * config.PACKET_SIZE
+                pays_agg = (counts > 0) & (gw_energy > agg_energy)
+                gw_energy[pays_agg] -= agg_energy[pays_agg]
+                round_energy += agg_energy[pays_agg].sum()
+
+            with timer.phase("transmission"):
+                if forest is None:
+                    delta = state.pos[members] - state.pos[S + labels[members]]
+                    dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+                    tx_energy = tx_fixed + tx_amp * (dist**2)
+                    pays_tx = energy[members] > tx_energy
+                    energy[members[pays_tx]] -= tx_energy[pays_tx]
+                    round_energy += tx_energy[pays_tx].sum()
+                    senders = members[pays_tx]
+                    tx_labels, tx_dist = labels[senders], dist[pays_tx]
+                else:
+                    # Sensors that cannot afford their relaying share are drained.
+                    tx_energy = forest.costs()[members]
+                    pays_tx = energy[members] > tx_energy
+                    drained = members[~pays_tx]
+                    round_energy += tx_energy[pays_tx].sum() + energy[drained].sum()
+                    energy[members[pays_tx]] -= tx_energy[pays_tx]
+                    energy[drained] = 0.0
+                    node_index.record_energy(drained, energy[drained])
+                    senders = members
+                    tx_labels, tx_dist = labels[senders], forest.path_lengths()[senders]
+
+        with timer.phase("trust_update"):
+            behaves = draw_behaviour(rng, sensor_malicious)
+            # Members drained during transmission take no part in this round's trust update.
+            rated = members[energy[members] > 0]
+            if rated.size:
+                rated_malicious = sensor_malicious[rated]
+                trust[rated] = trust_model.update(trust[rated], trust_model.reputation(behaves[rated]),
+                                                  rated_malicious, energy[rated], r)
+                correctly_detected = int(np.count_nonzero(rated_malicious & (trust[rated] < trust_model.detection_threshold)))
+                node_index.record_trust(rated, trust[rated])
+
+        if assembler is not None:
+            with timer.phase("ledger"):
+                # Only the members that transmitted, as counted by the latency model, reach the ledger.
+                for s, g, b in zip(senders.tolist(), tx_labels.tolist(), behaves[senders].tolist()):
+                    assembler.submit(Transaction(s, g, r, b))
+
+        if with_consensus and r % config.BLOCK_INTERVAL == 0:
+            with timer.phase("consensus"):
+                gw_energy, gw_trust = energy[S:], trust[S:]
+                validators = (gw_energy > 0) & (gw_trust >= config.TRUST_THRESHOLD) \
+                    & (gw_energy > config.ENERGY_CONSENSUS_VALIDATOR)
+                gw_energy[validators] -= config.ENERGY_CONSENSUS_VALIDATOR
+                num_validators = int(np.count_nonzero(validators))
+                round_energy += config.ENERGY_CONSENSUS_VALIDATOR * num_validators
+            if assembler is not None:
+                with timer.phase("ledger"):
+                    assembler.seal(r, np.flatnonzero(validators).tolist())
+        node_index.record_energy(node_index.gateways, energy[S:])
+
+        with timer.phase("metrics"):
+            latencies[r] = round_latency_arrays(tx_labels, tx_dist, state.num_gateways, num_validators, processing_delay)
+            energy_consumed[r] = round_energy
+            trust_accuracies[r] = node_index.benign_trust_mean()
+            detection_rates[r] = correctly_detected / max(total_malicious, 1)
+
+    return energy_consumed.tolist(), latencies.tolist(), trust_accuracies.tolist(), detection_rates.tolist()
+
+def _routing_forest(G: nx.Graph | CSRGraph) -> RoutingForest | None:
+    return RoutingForest.from_graph(G) if config.ROUTING_MODE == "multihop" else None
+
+def securesensechain_vectorized(G: nx.Graph, rng: np.random.Generator | None = None,
+                                timer: PhaseTimer | None = None, ledger: Ledger | None = None,
+                                mobility: MobileNetwork | None = None) -> SimResults:
+    """Simulates the SecureSenseChain protocol on the array engine."""
+    if rng is None:
+        rng = protocol_rng(0, "ssc")
+    return _run_rounds(graph_to_arrays(G), rng, DynamicTrustModel(),
+                       with_consensus=True, processing_delay=config.SSC_PROCESSING_DELAY, timer=timer or NULL_TIMER,
+                       forest=_routing_forest(G), ledger=ledger, mobility=mobility)
+
+def leach_simulation_vectorized(G: nx.Graph, rng: np.random.Generator | None = None,
+                                timer: PhaseTimer | None = None, mobility: MobileNetwork | None = None) -> SimResults:
+    """Simulates the LEACH baseline on the array engine."""
+    if rng is None:
+        rng = protocol_rng(0, "leach")
+    return _run_rounds(graph_to_arrays(G), rng, FixedTrustModel(),
+                       with_consensus=False, processing_delay=config.LEACH_PROCESSING_DELAY, timer=timer or NULL_TIMER,
+                       forest=_routing_forest(G), mobility=mobility)
\ No newline at end of file
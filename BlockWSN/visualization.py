@@ -1,67 +1,135 @@
 # BlockWSN/visualization.py
 """
 Functions for plotting simulation results and creating a summary table.
+
+matplotlib and pandas are imported lazily inside the functions that need them,
+so importing this module (or running simulations) never loads them.
 """
 
-import matplotlib.pyplot as plt
-import pandas as pd
 import os
 import numpy as np
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from . import config
+from .stats import ResultAggregator
+
+PROTOCOLS = {
+    'ssc': {'label': 'SecureSenseChain', 'color': 'blue', 'style': '-'},
+    'pow': {'label': 'PoW', 'color': 'red', 'style': '--'},
+    'leach': {'label': 'LEACH', 'color': 'green', 'style': '-.'}
+}
+
+METRICS_TO_PLOT = [
+    {'title': 'Energy Consumption Comparison', 'ylabel': 'Energy (J)', 'metric': 'energy'},
+    {'title': 'Transaction Latency Comparison', 'ylabel': 'Latency (s)', 'metric': 'latency'},
+    {'title': 'Average Trust Score of Non-Malicious Nodes', 'ylabel': 'Trust Score', 'metric': 'trust'},
+    {'title': 'Malicious Node Detection Rate', 'ylabel': 'Detection Rate', 'metric': 'detection'}
+]
+
+def lttb(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Selects points of a series with Largest-Triangle-Three-Buckets downsampling.
+
+    Args:
+        y (np.ndarray): The series, sampled at x = 0, 1, 2, ...
+        n_out (int): Number of points to keep (at least 3).
 
-def plot_results(all_results: dict, output_dir: str) -> None:
+    Returns:
+        np.ndarray: Sorted indices of the retained points, always including the
+        first and last sample.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # The next bucket's centroid stands in for the point still to be chosen.
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = (nlo + nhi - 1) / 2, y[nlo:nhi].mean()
+        xs = np.arange(lo, hi)
+        area = np.abs((a - cx) * (y[lo:hi] - y[a]) - (a - xs) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def _render_metric(plot_info: dict, curves: list[dict], output_path: str) -> str:
+    """Renders one metric's comparison plot to a PDF with the non-interactive backend."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.style.use('seaborn-v0_8-whitegrid')
+    fig, ax = plt.subplots(figsize=(10, 7))
+    metric = plot_info['metric']
+
+    for curve in curves:
+        proto_info = PROTOCOLS[curve['protocol']]
+        x, mean, spread = curve['x'], curve['mean'], curve['spread']
+        ax.plot(x, mean, label=proto_info['label'], color=proto_info['color'], linestyle=proto_info['style'], linewidth=2.5)
+        ax.fill_between(x, mean - spread, mean + spread, color=proto_info['color'], alpha=0.15)
+
+    ax.set_title(plot_info['title'], fontsize=18, fontweight='bold')
+    ax.set_xlabel("Round", fontsize=14)
+    ax.set_ylabel(plot_info['ylabel'], fontsize=14)
+    ax.legend(fontsize=12)
+    ax.tick_params(axis='both', which='major', labelsize=12)
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+
+    if metric in ['trust', 'detection']:
+        ax.set_ylim(0, 1.1)
+
+    plt.savefig(output_path, format='pdf', bbox_inches='tight')
+    plt.close(fig)
+    return output_path
+
+def plot_results(results: ResultAggregator | dict, output_dir: str, band: str = "std", workers: int = 4) -> None:
     """
     Generates and saves a separate, high-quality PDF for each metric.
 
+    Curves longer than config.PLOT_MAX_POINTS are downsampled with LTTB before
+    plotting, and the PDFs are rendered in parallel worker processes.
+
     Args:
-        all_results (dict): A nested dictionary containing the results from all simulation runs.
+        results (ResultAggregator | dict): Aggregated results, or a nested dictionary
+            containing the per-run results from all simulation runs.
         output_dir (str): The directory where the output plots will be saved.
+        band (str): Shaded band around each mean curve, either "std" for one standard
+            deviation or "ci" for the 95% confidence interval of the mean.
+        workers (int): Number of processes used to render the PDFs; 1 renders in-process.
     """
-    plt.style.use('seaborn-v0_8-whitegrid')
-    protocols = {
-        'ssc': {'label': 'SecureSenseChain', 'color': 'blue', 'style': '-'},
-        'pow': {'label': 'PoW', 'color': 'red', 'style': '--'},
-        'leach': {'label': 'LEACH', 'color': 'green', 'style': '-.'}
-    }
-    
-    metrics_to_plot = [
-        {'title': 'Energy Consumption Comparison', 'ylabel': 'Energy (J)', 'metric': 'energy'},
-        {'title': 'Transaction Latency Comparison', 'ylabel': 'Latency (s)', 'metric': 'latency'},
-        {'title': 'Average Trust Score of Non-Malicious Nodes', 'ylabel': 'Trust Score', 'metric': 'trust'},
-        {'title': 'Malicious Node Detection Rate', 'ylabel': 'Detection Rate', 'metric': 'detection'}
-    ]
-    
-    for plot_info in metrics_to_plot:
-        fig, ax = plt.subplots(figsize=(10, 7))
+    if isinstance(results, dict):
+        results = ResultAggregator.from_results(results)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for plot_info in METRICS_TO_PLOT:
         metric = plot_info['metric']
-        
-        for proto_key, proto_info in protocols.items():
+        curves = []
+        for proto_key in PROTOCOLS:
             if proto_key == 'pow' and metric in ['trust', 'detection']:
                 continue
 
-            data = np.array(all_results[proto_key][metric])
-            mean = np.mean(data, axis=0)
-            std = np.std(data, axis=0)
-            
-            ax.plot(mean, label=proto_info['label'], color=proto_info['color'], linestyle=proto_info['style'], linewidth=2.5)
-            ax.fill_between(range(len(mean)), mean - std, mean + std, color=proto_info['color'], alpha=0.15)
-        
-        ax.set_title(plot_info['title'], fontsize=18, fontweight='bold')
-        ax.set_xlabel("Round", fontsize=14)
-        ax.set_ylabel(plot_info['ylabel'], fontsize=14)
-        ax.legend(fontsize=12)
-        ax.tick_params(axis='both', which='major', labelsize=12)
-        ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-        
-        if metric in ['trust', 'detection']:
-            ax.set_ylim(0, 1.1)
-        
-        output_filename = f"{metric}_comparison.pdf"
-        output_path = os.path.join(output_dir, output_filename)
-        
-        plt.savefig(output_path, format='pdf', bbox_inches='tight')
+            mean = results.mean(proto_key, metric)
+            spread = results.ci(proto_key, metric) if band == "ci" else results.std(proto_key, metric)
+            keep = lttb(mean, config.PLOT_MAX_POINTS)
+            curves.append({'protocol': proto_key, 'x': keep, 'mean': mean[keep], 'spread': spread[keep]})
+
+        output_path = os.path.join(output_dir, f"{metric}_comparison.pdf")
+        jobs.append((plot_info, curves, output_path))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            saved = list(executor.map(_render_metric, *zip(*jobs)))
+    else:
+        saved = [_render_metric(*job) for job in jobs]
+
+    for output_path in saved:
         logging.info(f"High-quality plot saved to {output_path}")
-        plt.close(fig)
 
 def create_comparison_table(mean_results: dict, output_dir: str) -> None:
     """
@@ -71,6 +139,9 @@ def create_comparison_table(mean_results: dict, output_dir: str) -> None:
         mean_results (dict): A dictionary with the mean results for each protocol.
         output_dir (str): The directory where the output CSV will be saved.
     """
+    import pandas as pd
+
+    os.makedirs(output_dir, exist_ok=True)
     metrics = {
         "Method": ["SecureSenseChain", "PoW", "LEACH"],
         "Avg Energy (J)": [
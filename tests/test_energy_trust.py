@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from BlockWSN import config
+from BlockWSN.energy_trust import (update_trust, update_trust_array, alpha_schedule, TrustModel,
+                                   DynamicTrustModel, FixedTrustModel)
+
+def test_dynamic_model_matches_scalar_update_trust():
+    rng = np.random.default_rng(0)
+    n = 500
+    trust = rng.uniform(0, 1, n)
+    malicious = rng.random(n) < 0.3
+    energy = rng.uniform(0, 0.3, n)
+    model = DynamicTrustModel()
+    reputation = model.reputation(rng.random(n) < 0.4)
+
+    for r in range(config.MAX_ROUNDS):
+        expected = np.array([update_trust({"malicious": m, "energy": e}, rep, t, r)
+                             for m, e, rep, t in zip(malicious.tolist(), energy.tolist(), reputation.tolist(),
+                                                     trust.tolist())])
+        trust = model.update(trust, reputation, malicious, energy, r)
+        np.testing.assert_array_equal(trust, expected)
+
+def test_alpha_schedule_matches_update_trust():
+    alpha = alpha_schedule()
+    for r in (0, 1, config.MAX_ROUNDS // 2, config.MAX_ROUNDS - 1):
+        # With reputation 0 and an honest, depleted node, update_trust returns alpha * trust.
+        assert update_trust({"malicious": False, "energy": 0.0}, 0.0, 1.0, r) == alpha[r]
+        assert update_trust_array(np.ones(1), np.zeros(1), np.zeros(1, dtype=bool), np.zeros(1), alpha[r])[0] == alpha[r]
+
+def test_fixed_model_reputation():
+    model = FixedTrustModel()
+    np.testing.assert_array_equal(model.reputation(np.array([True, False])), [0.2, 0.8])
+    assert model.detection_threshold == 0.5
+
+def test_incomplete_trust_model_cannot_be_instantiated():
+    class NoThreshold(TrustModel):
+        penalty = 0.1
+        reward = 0.9
+
+        def update(self, trust, reputation, malicious, energy, current_round):
+            return trust
+
+    with pytest.raises(TypeError):
+        NoThreshold()
+
+    class Complete(NoThreshold):
+        detection_threshold = 0.5
+
+    assert Complete().detection_threshold == 0.5
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from BlockWSN import config
+from BlockWSN.batched import run_batched
+from BlockWSN.events import round_latency_arrays, round_latency_batched
+from BlockWSN.graph_utils import initialize_graph
+from BlockWSN.main import simulate_run
+from BlockWSN.mobility import mobile_network
+from BlockWSN.rng import protocol_rng, draw_behaviour, draw_behaviour_rounds
+from BlockWSN.simulation import securesensechain, leach_simulation
+from BlockWSN.vectorized import securesensechain_vectorized, leach_simulation_vectorized
+
+ENGINES = {
+    "ssc": (securesensechain, securesensechain_vectorized),
+    "leach": (leach_simulation, leach_simulation_vectorized),
+}
+
+@pytest.fixture
+def scarce_energy(monkeypatch):
+    """Little enough energy that sensors and gateways die part-way through a run."""
+    monkeypatch.setattr(config, "MAX_ROUNDS", 60)
+    monkeypatch.setattr(config, "INITIAL_ENERGY_SENSOR", 0.01)
+    monkeypatch.setattr(config, "INITIAL_ENERGY_GATEWAY", 0.003)
+
+def _assert_same_series(expected, actual) -> None:
+    """Trust and detection must match exactly; energy and latency up to summation order."""
+    energy, latency, trust, detection = (np.asarray(series) for series in expected)
+    np.testing.assert_allclose(actual[0], energy, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(actual[1], latency, rtol=1e-12, atol=1e-15)
+    np.testing.assert_array_equal(actual[2], trust)
+    np.testing.assert_array_equal(actual[3], detection)
+
+@pytest.mark.parametrize("protocol", ["ssc", "leach"])
+@pytest.mark.parametrize("routing", ["direct", "multihop"])
+@pytest.mark.parametrize("mobility", ["static", "random_waypoint"])
+def test_graph_and_vectorized_engines_agree(monkeypatch, scarce_energy, protocol, routing, mobility):
+    monkeypatch.setattr(config, "ROUTING_MODE", routing)
+    monkeypatch.setattr(config, "MOBILITY_MODEL", mobility)
+    graph_engine, array_engine = ENGINES[protocol]
+    for seed in range(3):
+        G = initialize_graph(seed=seed)
+        expected = graph_engine(G.copy(), protocol_rng(seed, protocol), mobility=mobile_network(G, seed))
+        actual = array_engine(G.copy(), protocol_rng(seed, protocol), mobility=mobile_network(G, seed))
+        _assert_same_series(expected, actual)
+        assert len(actual[0]) == config.MAX_ROUNDS
+
+@pytest.mark.parametrize("routing", ["direct", "multihop"])
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_batched_engine_matches_per_run_engine(monkeypatch, scarce_energy, routing, backend):
+    monkeypatch.setattr(config, "ROUTING_MODE", routing)
+    monkeypatch.setattr(config, "GRAPH_BACKEND", backend)
+    monkeypatch.setattr(config, "ENGINE", "vectorized")
+    runs = range(3)
+    batch = run_batched(runs)
+    for k, run in enumerate(runs):
+        expected = simulate_run(run)
+        for protocol, metrics in expected.items():
+            for metric, series in metrics.items():
+                actual = batch[protocol][metric][k]
+                if metric == "trust":
+                    # The batch sums benign trust afresh each round instead of incrementally.
+                    np.testing.assert_allclose(actual, series, rtol=1e-12)
+                else:
+                    np.testing.assert_allclose(actual, series, rtol=1e-12, atol=1e-15)
+
+def test_engines_agree_on_csr_backend(monkeypatch, scarce_energy):
+    monkeypatch.setattr(config, "GRAPH_BACKEND", "csr")
+    results = {}
+    for engine in ("graph", "vectorized"):
+        monkeypatch.setattr(config, "ENGINE", engine)
+        results[engine] = simulate_run(1)
+    for protocol, metrics in results["graph"].items():
+        for metric, series in metrics.items():
+            np.testing.assert_allclose(results["vectorized"][protocol][metric], series, rtol=1e-12, atol=1e-15)
+
+def test_batched_round_latency_matches_per_run():
+    rng = np.random.default_rng(0)
+    labels = rng.integers(-1, 4, size=(6, 40))
+    labels[2] = -1
+    dist = rng.random((6, 40)) * 50
+    num_validators = np.array([0, 3, 2, 0, 1, 0])
+    expected = [round_latency_arrays(labels[k][labels[k] >= 0], dist[k][labels[k] >= 0], 4, int(num_validators[k]), 0.01)
+                for k in range(6)]
+    np.testing.assert_allclose(round_latency_batched(labels, dist, 4, num_validators, 0.01), expected, rtol=1e-12)
+
+def test_behaviour_rounds_match_consecutive_draws():
+    malicious = np.random.default_rng(1).random(50) < 0.3
+    rng = np.random.default_rng(7)
+    expected = np.stack([draw_behaviour(rng, malicious) for _ in range(5)])
+    np.testing.assert_array_equal(draw_behaviour_rounds(np.random.default_rng(7), malicious, 5), expected)
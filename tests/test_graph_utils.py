@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from BlockWSN import config
+from BlockWSN.graph_utils import (ClusterIndex, NodeStateIndex, initialize_graph, range_pairs, cluster_reserve,
+                                  form_clusters)
+from BlockWSN.csr_graph import range_adjacency
+
+def _fresh_labels(index: ClusterIndex, sensor_alive: np.ndarray, gateway_alive: np.ndarray) -> np.ndarray:
+    fresh = ClusterIndex(index.sensor_ids, index.gateway_ids, index.sensor_pos.copy(), index.gateway_pos)
+    return fresh.assign(sensor_alive, gateway_alive).copy()
+
+def test_cluster_index_matches_rebuild(monkeypatch):
+    monkeypatch.setattr(config, "NUM_SENSORS", 500)
+    monkeypatch.setattr(config, "NUM_GATEWAYS", 12)
+    G = initialize_graph(seed=4)
+    index = ClusterIndex.from_graph(G)
+    rng = np.random.default_rng(0)
+    sensor_alive = np.ones(500, dtype=bool)
+    gateway_alive = np.ones(12, dtype=bool)
+
+    for step in range(30):
+        sensor_alive[rng.integers(500, size=10)] = False
+        if step % 5 == 4:
+            # Gateways die and come back, sensors are revived.
+            gateway_alive = rng.random(12) < 0.7
+            sensor_alive[rng.integers(500, size=5)] = True
+        moved = np.unique(rng.integers(500, size=25))
+        index.move(moved, rng.uniform(0, config.AREA_SIZE, size=(len(moved), 2)))
+        labels = index.assign(sensor_alive, gateway_alive)
+        np.testing.assert_array_equal(labels, _fresh_labels(index, sensor_alive, gateway_alive))
+
+def test_cluster_index_without_active_gateways():
+    G = initialize_graph(seed=0)
+    index = ClusterIndex.from_graph(G)
+    labels = index.assign(np.ones(len(index.sensor_ids), dtype=bool), np.zeros(len(index.gateway_ids), dtype=bool))
+    assert (labels == -1).all()
+
+def test_form_clusters_assigns_nearest_gateway():
+    G = initialize_graph(seed=2)
+    clusters = form_clusters(G)
+    gateways = list(clusters)
+    gateway_pos = np.array([G.nodes[g]["pos"] for g in gateways])
+    for gateway, sensors in clusters.items():
+        for sensor in sensors:
+            d = np.linalg.norm(gateway_pos - np.array(G.nodes[sensor]["pos"]), axis=1)
+            assert gateways[int(np.argmin(d))] == gateway
+
+def test_range_pairs_matches_brute_force():
+    pos = np.random.default_rng(1).uniform(0, 100, size=(300, 2))
+    first, second, weights = range_pairs(pos)
+    d = np.linalg.norm(pos[:, None] - pos[None], axis=2)
+    i, j = np.nonzero(np.triu(d <= config.COMMUNICATION_RANGE, k=1))
+    np.testing.assert_array_equal(first, i)
+    np.testing.assert_array_equal(second, j)
+    np.testing.assert_allclose(weights, d[i, j], rtol=1e-15)
+
+def test_range_adjacency_matches_brute_force():
+    pos = np.random.default_rng(1).uniform(0, 100, size=(300, 2))
+    indptr, indices, weights = range_adjacency(pos, chunk_size=64)
+    d = np.linalg.norm(pos[:, None] - pos[None], axis=2)
+    i, j = np.nonzero((d <= config.COMMUNICATION_RANGE) & ~np.eye(len(pos), dtype=bool))
+    np.testing.assert_array_equal(np.repeat(np.arange(len(pos)), np.diff(indptr)), i)
+    np.testing.assert_array_equal(indices, j)
+    np.testing.assert_allclose(weights, d[i, j], rtol=1e-6)
+
+@pytest.mark.parametrize("n, expected_indptr, expected_indices", [(0, [0], []), (1, [0, 0], []), (2, [0, 1, 2], [1, 0])])
+def test_range_adjacency_of_tiny_networks(n, expected_indptr, expected_indices):
+    indptr, indices, weights = range_adjacency(np.zeros((n, 2)))
+    np.testing.assert_array_equal(indptr, expected_indptr)
+    np.testing.assert_array_equal(indices, expected_indices)
+    assert indices.dtype == np.int32 and weights.dtype == np.float32
+
+def _assert_matches_fresh(index: NodeStateIndex, energy: np.ndarray, trust: np.ndarray, malicious: np.ndarray) -> None:
+    fresh = NodeStateIndex(index.node_ids, energy, trust, malicious, index.num_sensors, index.reserve)
+    np.testing.assert_array_equal(index.alive, fresh.alive)
+    np.testing.assert_array_equal(index.funded, fresh.funded)
+    assert index.num_funded == fresh.num_funded
+    assert index.depleted == fresh.depleted
+    np.testing.assert_array_equal(index.active(), fresh.active())
+    assert index.active_ids() == fresh.active_ids()
+    assert index.benign_trust_mean() == pytest.approx(fresh.benign_trust_mean(), rel=1e-12)
+
+def test_node_state_index_matches_rebuild():
+    rng = np.random.default_rng(3)
+    num_sensors, num_gateways = 200, 8
+    n = num_sensors + num_gateways
+    energy = rng.uniform(0.01, 1.0, n)
+    trust = np.full(n, 0.5)
+    malicious = np.zeros(n, dtype=bool)
+    malicious[rng.choice(num_sensors, size=20, replace=False)] = True
+    reserve = np.concatenate((np.zeros(num_sensors), np.full(num_gateways, 0.3)))
+    index = NodeStateIndex([f"N{i}" for i in range(n)], energy, trust, malicious, num_sensors, reserve)
+
+    for _ in range(50):
+        nodes = np.unique(rng.integers(n, size=15))
+        energy[nodes] = np.maximum(energy[nodes] - rng.uniform(0, 0.4, len(nodes)), 0.0)
+        index.record_energy(nodes, energy[nodes])
+        rated = np.unique(rng.integers(num_sensors, size=30))
+        trust[rated] = rng.uniform(0, 1, len(rated))
+        index.record_trust(rated, trust[rated])
+        _assert_matches_fresh(index, energy, trust, malicious)
+
+    energy[:] = 0.0
+    index.record_energy(np.arange(n), energy)
+    assert index.depleted
+    _assert_matches_fresh(index, energy, trust, malicious)
+
+def test_cluster_reserve():
+    G = initialize_graph(seed=0)
+    reserve = cluster_reserve(ClusterIndex.from_graph(G), 0.25)
+    np.testing.assert_array_equal(reserve, [0.0] * config.NUM_SENSORS + [0.25] * config.NUM_GATEWAYS)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import pytest
+from BlockWSN import config
+from BlockWSN.graph_utils import initialize_graph
+from BlockWSN.ledger import Block, BlockAssembler, Ledger, Transaction, merkle_root
+from BlockWSN.rng import protocol_rng
+from BlockWSN.simulation import securesensechain
+from BlockWSN.vectorized import securesensechain_vectorized
+
+def _ledger(path=None, num_rounds: int = 30) -> Ledger:
+    ledger = Ledger(path)
+    assembler = BlockAssembler(ledger, block_size=4)
+    for r in range(num_rounds):
+        for sensor in range(r % 7):
+            assembler.submit(Transaction(sensor, sensor % 3, r, sensor % 2 == 0))
+        if r % 10 == 0:
+            assembler.seal(r, [0, 2])
+    assembler.seal(num_rounds, [1])
+    return ledger
+
+def test_merkle_root():
+    leaves = [hashlib.sha256(bytes([i])).digest() for i in range(3)]
+    pair = hashlib.sha256(leaves[0] + leaves[1]).digest()
+    last = hashlib.sha256(leaves[2] + leaves[2]).digest()
+    assert merkle_root(leaves) == hashlib.sha256(pair + last).digest()
+    assert merkle_root(leaves[:1]) == leaves[0]
+    assert merkle_root([]) == hashlib.sha256(b"").digest()
+
+def test_sealed_chain_verifies_and_is_written(tmp_path):
+    path = tmp_path / "ledger.jsonl"
+    ledger = _ledger(str(path))
+    assert ledger.verify()
+    assert ledger.num_transactions == sum(r % 7 for r in range(30))
+    assert all(len(block.transactions) <= 4 for block in ledger.blocks)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["hash"] for line in lines] == [block.hash.hex() for block in ledger.blocks]
+
+def test_seal_without_validators_keeps_transactions_pending():
+    ledger = Ledger()
+    assembler = BlockAssembler(ledger)
+    assembler.submit(Transaction(1, 0, 0, False))
+    assert assembler.seal(0, []) == []
+    assert assembler.num_pending() == 1 and ledger.height == 0
+    assert len(assembler.seal(1, [0])) == 1 and assembler.num_pending() == 0
+
+def test_tampered_transaction_is_detected():
+    ledger = _ledger()
+    block = ledger.blocks[3]
+    sensor, gateway, r, falsified = block.transactions[0]
+    block.transactions[0] = Transaction(sensor, gateway, r, not falsified)
+    assert not block.verify()
+    assert not ledger.verify()
+
+def test_tampered_signature_is_detected():
+    ledger = _ledger()
+    block = ledger.blocks[1]
+    validator, signature = next(iter(block.signatures.items()))
+    block.signatures[validator] = bytes(len(signature))
+    assert not ledger.verify()
+
+def test_rewritten_block_breaks_the_hash_link():
+    ledger = _ledger()
+    block = ledger.blocks[2]
+    block.transactions = block.transactions[:-1]
+    block.merkle_root = merkle_root([tx.digest() for tx in block.transactions])
+    block.signatures = {}
+    block.sign(0)
+    # The block is valid on its own, but its successor no longer links to it.
+    assert block.verify()
+    assert not ledger.verify()
+
+def test_append_rejects_invalid_blocks():
+    ledger = _ledger()
+    detached = Block(ledger.height, bytes(32), 99, 0, [Transaction(0, 0, 99, False)])
+    detached.sign(0)
+    with pytest.raises(ValueError):
+        ledger.append(detached)
+    unsigned = Block(ledger.height, ledger.head_hash, 99, 0, [Transaction(0, 0, 99, False)])
+    with pytest.raises(ValueError):
+        ledger.append(unsigned)
+
+def test_seal_does_not_reverify_its_own_blocks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Block, "verify", lambda block: calls.append(block) or True)
+    ledger = _ledger()
+    assert ledger.height > 0 and not calls
+    assert ledger.verify()
+    assert len(calls) == ledger.height
+
+@pytest.mark.parametrize("routing", ["direct", "multihop"])
+def test_engines_record_the_same_chain(monkeypatch, routing):
+    # Sensors run short of energy, so some members cannot pay for their packet.
+    monkeypatch.setattr(config, "ROUTING_MODE", routing)
+    monkeypatch.setattr(config, "INITIAL_ENERGY_SENSOR", 0.005)
+    G = initialize_graph(seed=0)
+    graph_ledger, array_ledger = Ledger(), Ledger()
+    securesensechain(G.copy(), protocol_rng(0, "ssc"), ledger=graph_ledger)
+    securesensechain_vectorized(G.copy(), protocol_rng(0, "ssc"), ledger=array_ledger)
+    assert graph_ledger.verify()
+    assert graph_ledger.num_transactions == array_ledger.num_transactions > 0
+    assert graph_ledger.head_hash == array_ledger.head_hash
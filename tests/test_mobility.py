@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from BlockWSN import config
+from BlockWSN.csr_graph import initialize_csr_graph
+from BlockWSN.graph_utils import initialize_graph, range_pairs
+from BlockWSN.main import simulate_run
+from BlockWSN.mobility import MobileNetwork, RandomWaypoint, SpatialGrid, TraceMobility, mobile_network
+from BlockWSN.rng import protocol_rng
+from BlockWSN.routing import adjacency_matrix
+
+def _edges(first, second, weights) -> dict:
+    return dict(zip(zip(first.tolist(), second.tolist()), weights.tolist()))
+
+def _node_positions(G) -> np.ndarray:
+    names = [f"S{i}" for i in range(config.NUM_SENSORS)] + [f"G{i}" for i in range(config.NUM_GATEWAYS)]
+    return np.array([G.nodes[n]["pos"] for n in names])
+
+def test_refreshed_edges_match_rebuild(monkeypatch):
+    monkeypatch.setattr(config, "NUM_SENSORS", 400)
+    monkeypatch.setattr(config, "MOBILITY_MAX_SPEED", 15.0)
+    pos = _node_positions(initialize_graph(seed=5))
+    network = MobileNetwork(pos, config.NUM_SENSORS, RandomWaypoint(pos[:config.NUM_SENSORS], protocol_rng(5, "mobility")),
+                            chunk_size=64)
+    for r in range(1, 20):
+        moved = network.step(r)
+        assert len(moved)
+        assert _edges(network.first, network.second, network.weights) == _edges(*range_pairs(network.pos))
+        grid = network.grid
+        np.testing.assert_array_equal(grid.sorted_keys, grid.keys[grid.sorted_nodes])
+        assert (np.diff(grid.sorted_keys) >= 0).all()
+
+def test_initial_adjacency_matches_graph():
+    G = initialize_graph(seed=0)
+    pos = _node_positions(G)
+    network = MobileNetwork(pos, config.NUM_SENSORS, RandomWaypoint(pos[:config.NUM_SENSORS], protocol_rng(0, "mobility")))
+    assert (network.adjacency() != adjacency_matrix(G)).nnz == 0
+
+def test_spatial_grid_nearby_covers_every_neighbour():
+    pos = np.random.default_rng(2).uniform(0, 200, size=(500, 2))
+    grid = SpatialGrid(pos.copy(), cell_size=config.COMMUNICATION_RANGE)
+    nodes = np.arange(0, 500, 7)
+    u, v = grid.nearby(nodes)
+    found = set(zip(u.tolist(), v.tolist()))
+    d = np.linalg.norm(pos[nodes][:, None] - pos[None], axis=2)
+    for k, node in enumerate(nodes.tolist()):
+        for other in np.flatnonzero(d[k] <= config.COMMUNICATION_RANGE).tolist():
+            assert (node, other) in found
+
+def test_edges_are_only_tracked_for_multihop_routing(monkeypatch):
+    monkeypatch.setattr(config, "MOBILITY_MODEL", "random_waypoint")
+    G = initialize_graph(seed=1)
+    tracked = {}
+    for routing in ("direct", "multihop"):
+        monkeypatch.setattr(config, "ROUTING_MODE", routing)
+        network = mobile_network(G, 1)
+        for r in range(5):
+            network.step(r)
+        tracked[routing] = network
+    assert not tracked["direct"].track_edges and tracked["multihop"].track_edges
+    np.testing.assert_array_equal(tracked["direct"].pos, tracked["multihop"].pos)
+    with pytest.raises(ValueError):
+        tracked["direct"].adjacency()
+
+def test_static_model_has_no_mobile_network():
+    assert mobile_network(initialize_graph(seed=0), 0) is None
+
+def test_trace_mobility_last_row_wins(tmp_path):
+    path = tmp_path / "trace.csv"
+    path.write_text("# round,sensor,x,y\n1,0,5,5\n1,2,7,7\n1,0,6,6\n3,1,1,2\n")
+    trace = TraceMobility(np.zeros((3, 2)), str(path))
+    sensors, xy = trace.step(1)
+    assert dict(zip(sensors.tolist(), map(tuple, xy.tolist()))) == {0: (6.0, 6.0), 2: (7.0, 7.0)}
+    assert len(trace.step(2)[0]) == 0
+    np.testing.assert_array_equal(trace.step(3)[1], [[1.0, 2.0]])
+
+def test_mobile_run_leaves_the_csr_topology_unchanged(monkeypatch):
+    monkeypatch.setattr(config, "MOBILITY_MODEL", "random_waypoint")
+    monkeypatch.setattr(config, "MAX_ROUNDS", 40)
+    G = initialize_csr_graph(seed=0)
+    pos = G.pos.copy()
+    csr_result = simulate_run(0, G=G)
+    np.testing.assert_array_equal(G.pos, pos)
+
+    nx_result = simulate_run(0, G=initialize_graph(seed=0))
+    for protocol in ("ssc", "leach"):
+        for metric, series in nx_result[protocol].items():
+            np.testing.assert_allclose(csr_result[protocol][metric], series, rtol=1e-12, atol=1e-15)
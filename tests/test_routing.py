@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from BlockWSN import config
+from BlockWSN.csr_graph import initialize_csr_graph
+from BlockWSN.graph_utils import initialize_graph
+from BlockWSN.routing import RoutingForest
+
+def _assert_same_forest(forest: RoutingForest, fresh: RoutingForest) -> None:
+    np.testing.assert_array_equal(forest.parent, fresh.parent)
+    np.testing.assert_array_equal(forest.root, fresh.root)
+    np.testing.assert_array_equal(forest.dist, fresh.dist)
+    np.testing.assert_array_equal(forest.hop, fresh.hop)
+    np.testing.assert_array_equal(forest.costs(), fresh.costs())
+
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_update_matches_build_after_random_deaths(monkeypatch, backend):
+    monkeypatch.setattr(config, "NUM_SENSORS", 2000)
+    monkeypatch.setattr(config, "NUM_GATEWAYS", 20)
+    monkeypatch.setattr(config, "AREA_SIZE", 450)
+    G = initialize_csr_graph(seed=3) if backend == "csr" else initialize_graph(seed=3)
+    forest = RoutingForest.from_graph(G)
+    alive = np.ones(G.number_of_nodes(), dtype=bool)
+    forest.update(alive)
+    rng = np.random.default_rng(0)
+
+    for _ in range(15):
+        alive[rng.choice(np.flatnonzero(alive[:forest.num_sensors]), size=20, replace=False)] = False
+        forest.update(alive)
+        fresh = RoutingForest(forest.adjacency, forest.num_sensors)
+        fresh.build(alive)
+        _assert_same_forest(forest, fresh)
+
+def test_update_matches_build_after_gateway_death(monkeypatch):
+    monkeypatch.setattr(config, "NUM_SENSORS", 300)
+    G = initialize_graph(seed=1)
+    forest = RoutingForest.from_graph(G)
+    alive = np.ones(G.number_of_nodes(), dtype=bool)
+    forest.update(alive)
+
+    alive[forest.num_sensors] = False
+    forest.update(alive)
+    fresh = RoutingForest(forest.adjacency, forest.num_sensors)
+    fresh.build(alive)
+    _assert_same_forest(forest, fresh)
+    assert not (forest.labels() == 0).any()
+
+def test_update_rebuilds_when_a_node_revives(monkeypatch):
+    monkeypatch.setattr(config, "NUM_SENSORS", 300)
+    G = initialize_graph(seed=2)
+    forest = RoutingForest.from_graph(G)
+    alive = np.ones(G.number_of_nodes(), dtype=bool)
+    alive[:10] = False
+    forest.update(alive)
+
+    alive[:10] = True
+    assert forest.update(alive) == forest.num_sensors
+    fresh = RoutingForest(forest.adjacency, forest.num_sensors)
+    fresh.build(alive)
+    _assert_same_forest(forest, fresh)
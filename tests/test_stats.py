@@ -0,0 +1,39 @@
+import numpy as np
+from scipy import stats
+from BlockWSN.stats import RunningStats, ResultAggregator
+
+def test_running_stats_match_stacked_runs():
+    runs = np.random.default_rng(0).normal(5.0, 2.0, size=(40, 100))
+    running = RunningStats()
+    for run in runs:
+        running.add(run)
+    assert running.count == 40
+    np.testing.assert_allclose(running.mean, runs.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(running.std(), runs.std(axis=0), rtol=1e-10)
+    np.testing.assert_allclose(running.std(ddof=1), runs.std(axis=0, ddof=1), rtol=1e-10)
+    half_width = stats.t.ppf(0.975, 39) * runs.std(axis=0, ddof=1) / np.sqrt(40)
+    np.testing.assert_allclose(running.ci(), half_width, rtol=1e-10)
+
+def test_running_stats_of_one_run():
+    running = RunningStats()
+    running.add([1.0, 2.0])
+    np.testing.assert_array_equal(running.std(), [0.0, 0.0])
+    assert np.isnan(running.ci()).all()
+
+def test_aggregator_add_run_matches_from_results():
+    rng = np.random.default_rng(1)
+    runs = [{"ssc": {"energy": rng.random(10), "trust": rng.random(10)}, "pow": {"energy": rng.random(10)}}
+            for _ in range(5)]
+    incremental = ResultAggregator()
+    for run in runs:
+        incremental.add_run(run)
+    all_results = {protocol: {metric: [run[protocol][metric] for run in runs] for metric in metrics}
+                   for protocol, metrics in runs[0].items()}
+    batch = ResultAggregator.from_results(all_results)
+    for protocol, metrics in all_results.items():
+        for metric, series in metrics.items():
+            assert incremental.count(protocol, metric) == 5
+            np.testing.assert_array_equal(incremental.mean(protocol, metric), batch.mean(protocol, metric))
+            np.testing.assert_allclose(incremental.mean(protocol, metric), np.mean(series, axis=0), rtol=1e-12)
+    assert not incremental.has("leach", "energy")
+    assert set(incremental.mean_results()) == {"ssc", "pow"}
@@ -0,0 +1,104 @@
+import json
+import os
+import numpy as np
+import pytest
+from BlockWSN import config, main
+from BlockWSN.store import LAYOUT, ResultStore, config_hash
+from BlockWSN.sweep import SimConfig
+
+def _run_result(seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    result = {}
+    for protocol, metric in LAYOUT:
+        result.setdefault(protocol, {})[metric] = rng.random(config.MAX_ROUNDS)
+    return result
+
+def test_save_load_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    for seed in (3, 0, 7):
+        store.save(seed, _run_result(seed))
+    reopened = ResultStore(str(tmp_path))
+    assert reopened.seeds() == [0, 3, 7]
+    assert reopened.has(3) and not reopened.has(1)
+    for seed in (0, 3, 7):
+        loaded = reopened.load(seed)
+        for protocol, metrics in _run_result(seed).items():
+            for metric, series in metrics.items():
+                np.testing.assert_array_equal(loaded[protocol][metric], series)
+    with open(tmp_path / "runs" / "manifest.json") as f:
+        assert set(json.load(f)) == {store.key}
+
+def test_phases_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    assert store.load_phases(0) is None
+    store.save_phases(0, {"ssc": {"clustering": {"total_ns": 5}}})
+    assert store.load_phases(0) == {"ssc": {"clustering": {"total_ns": 5}}}
+
+def test_config_hash_tracks_result_settings(monkeypatch):
+    key = config_hash()
+    monkeypatch.setattr(config, "OUTPUT_DIR", "elsewhere")
+    monkeypatch.setattr(config, "NUM_RUNS", 3)
+    assert config_hash() == key
+    monkeypatch.setattr(config, "TRUST_THRESHOLD", 0.7)
+    assert config_hash() != key
+
+def test_sim_config_key_does_not_touch_config(monkeypatch):
+    point = SimConfig.current(TRUST_THRESHOLD=0.7, NUM_RUNS=3)
+    monkeypatch.setattr(config, "TRUST_THRESHOLD", object())
+    assert point.key() == config_hash({"TRUST_THRESHOLD": 0.7})
+    with point.applied():
+        assert point.key() == config_hash()
+
+def test_stores_of_different_configurations_are_separate(tmp_path, monkeypatch):
+    ResultStore(str(tmp_path)).save(0, _run_result(0))
+    monkeypatch.setattr(config, "MOBILITY_MODEL", "random_waypoint")
+    other = ResultStore(str(tmp_path))
+    assert other.seeds() == []
+    other.save(1, _run_result(1))
+    monkeypatch.undo()
+    assert ResultStore(str(tmp_path)).seeds() == [0]
+
+@pytest.fixture
+def campaign(tmp_path, monkeypatch):
+    """A short campaign writing to a temporary OUTPUT_DIR."""
+    monkeypatch.setattr(config, "MAX_ROUNDS", 20)
+    monkeypatch.setattr(config, "OUTPUT_DIR", str(tmp_path / "resumed"))
+    return monkeypatch
+
+def test_resume_only_simulates_missing_runs(tmp_path, campaign):
+    simulated = []
+    simulate_run = main.simulate_run
+
+    def recording_simulate_run(run, **kwargs):
+        simulated.append(run)
+        return simulate_run(run, **kwargs)
+
+    campaign.setattr(main, "simulate_run", recording_simulate_run)
+    campaign.setattr(config, "NUM_RUNS", 2)
+    main.run_all_simulations(plot=False)
+    # The campaign is extended, as after an interruption at run 2.
+    campaign.setattr(config, "NUM_RUNS", 4)
+    main.run_all_simulations(resume=True, plot=False)
+    assert simulated == [0, 1, 2, 3]
+    resumed = main.load_results(ResultStore(config.OUTPUT_DIR))
+
+    campaign.setattr(config, "OUTPUT_DIR", str(tmp_path / "fresh"))
+    main.run_all_simulations(plot=False)
+    fresh = main.load_results(ResultStore(config.OUTPUT_DIR))
+    for protocol, metric in LAYOUT:
+        assert resumed.count(protocol, metric) == 4
+        np.testing.assert_array_equal(resumed.mean(protocol, metric), fresh.mean(protocol, metric))
+
+def test_load_results_without_runs(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        main.load_results(ResultStore(str(tmp_path)))
+
+def test_batched_rejects_workers_and_mobility(campaign):
+    with pytest.raises(ValueError):
+        main.run_all_simulations(workers=2, batched=True, plot=False)
+    campaign.setattr(config, "MOBILITY_MODEL", "random_waypoint")
+    with pytest.raises(ValueError):
+        main.run_all_simulations(batched=True, plot=False)
+    with pytest.raises(SystemExit):
+        main.main(["run", "--batched", "--no-plot"])
+    assert not os.path.exists(os.path.join(config.OUTPUT_DIR, "runs"))
@@ -0,0 +1,73 @@
+import asyncio
+import io
+import numpy as np
+import pytest
+from BlockWSN import config
+from BlockWSN.graph_utils import initialize_graph
+from BlockWSN.rng import protocol_rng
+from BlockWSN.simulation import securesensechain
+from BlockWSN.streaming import parse_records, score_file, score_stream, write_trace, TrustScorer
+
+def test_parse_records_reads_well_formed_lines():
+    batch = parse_records(b"# round,sensor,gateway,falsified,energy\n3,7,1,1,0.25\n4,8,2,0,0.5\n", 42)
+    np.testing.assert_array_equal(batch.round, [3, 4])
+    np.testing.assert_array_equal(batch.sensor, [7, 8])
+    np.testing.assert_array_equal(batch.gateway, [1, 2])
+    np.testing.assert_array_equal(batch.falsified, [True, False])
+    np.testing.assert_array_equal(batch.energy, [0.25, 0.5])
+    np.testing.assert_array_equal(batch.ingest_ns, [42, 42])
+
+def test_parse_records_keeps_malformed_lines_as_unknown_sensors():
+    data = b"1,2,0,1,0.4\n1,2,0,1\ngarbage\n1,nan,0,0,0.1\n\xff\xfe,1,1,1,1\n2,3,1,0,0.3\n"
+    batch = parse_records(data, 0)
+    np.testing.assert_array_equal(batch.sensor, [2, -1, -1, -1, -1, 3])
+    assert len(parse_records(b"# only a comment\n", 0).sensor) == 0
+
+def test_score_stream_survives_malformed_lines():
+    scorer = TrustScorer(initialize_graph(seed=0))
+    lines = ["0,1,0,0,0.4"] * 3 + ["0,1,0"] + ["1,2,0,1,0.4"] * 2 + ["x,y,z,w,v", "0,100000,0,0,0.4"]
+    stream = io.BytesIO(("\n".join(lines) + "\n").encode())
+
+    async def read(n: int) -> bytes:
+        return stream.read(n)
+
+    report = asyncio.run(score_stream(read, scorer))
+    assert report["events"] == 5
+    assert report["rejected"] == 3
+
+def test_scored_trace_reproduces_securesensechain_trust(tmp_path):
+    G = initialize_graph(seed=3)
+    path = tmp_path / "trace.csv"
+    assert write_trace(G, 3, str(path)) > 0
+    scorer = TrustScorer(G)
+    report = asyncio.run(score_file(str(path), scorer, batch_size=64))
+    assert report["rejected"] == 0
+
+    H = G.copy()
+    securesensechain(H, protocol_rng(3, "ssc"))
+    expected = np.array([H.nodes[f"S{i}"]["trust"] for i in range(config.NUM_SENSORS)])
+    np.testing.assert_array_equal(scorer.trust, expected)
+
+@pytest.mark.parametrize("data", [b"", b"# round,sensor,gateway,falsified,energy\n", b"# header\n\n# another\n"])
+def test_score_stream_of_a_trace_without_records(data):
+    stream = io.BytesIO(data)
+
+    async def read(n: int) -> bytes:
+        return stream.read(n)
+
+    report = asyncio.run(score_stream(read, TrustScorer(initialize_graph(seed=0))))
+    assert report["events"] == 0
+    assert report["seconds"] == 0.0 and report["events_per_second"] == 0.0
+    assert report["latency_max_ms"] == 0.0
+
+def test_throughput_window_starts_at_the_first_record():
+    chunks = [b"# header only\n", b"0,1,0,0,0.4\n0,2,0,0,0.4\n"]
+
+    async def read(n: int) -> bytes:
+        # Let the scorer take the comment-only block before the records arrive.
+        await asyncio.sleep(0.05)
+        return chunks.pop(0) if chunks else b""
+
+    report = asyncio.run(score_stream(read, TrustScorer(initialize_graph(seed=0))))
+    assert report["events"] == 2
+    assert 0.0 < report["seconds"] < 0.05
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from BlockWSN.visualization import lttb
+
+def test_lttb_keeps_one_point_per_bucket():
+    y = np.sin(np.linspace(0, 20, 5000)) + np.random.default_rng(2).normal(0, 0.1, 5000)
+    y[1234] = 50.0
+    selected = lttb(y, 300)
+    assert len(selected) == 300
+    assert selected[0] == 0 and selected[-1] == len(y) - 1
+    assert (np.diff(selected) > 0).all()
+    edges = np.linspace(1, len(y) - 1, 299).astype(int)
+    np.testing.assert_array_equal(np.searchsorted(edges, selected[1:-1], side="right") - 1, np.arange(298))
+    # A spike is the largest triangle in its bucket.
+    assert 1234 in selected
+
+@pytest.mark.parametrize("n_out", [2, 100, 1000])
+def test_lttb_keeps_short_series(n_out):
+    np.testing.assert_array_equal(lttb(np.arange(100.0), n_out), np.arange(100))